@@ -1,24 +1,91 @@
 import os
-import hashlib
+import re
 import mimetypes
-import PyPDF2
-import pytesseract
-from PIL import Image
-import nltk
-from nltk.tokenize import word_tokenize
-from nltk.corpus import stopwords
 import logging
+from collections import Counter
+from dedup import DuplicateFinder
+from instrumentation import span, timed
+from config import PDF_OCR_DPI, PDF_MAX_PAGES, PDF_OCR_MAX_PAGES, TAG_TEXT_CHARS
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Download required NLTK data
-nltk.download('punkt', quiet=True)
-nltk.download('stopwords', quiet=True)
+# NLTK's English stopword list, used when the NLTK corpus isn't installed locally.
+# NLTK, PyPDF2, pytesseract and Pillow are imported on first use so that importing
+# this module stays cheap and never touches the network.
+ENGLISH_STOP_WORDS = frozenset("""
+i me my myself we our ours ourselves you you're you've you'll you'd your yours yourself
+yourselves he him his himself she she's her hers herself it it's its itself they them their
+theirs themselves what which who whom this that that'll these those am is are was were be
+been being have has had having do does did doing a an the and but if or because as until
+while of at by for with about against between into through during before after above below
+to from up down in out on off over under again further then once here there when where why
+how all any both each few more most other some such no nor not only own same so than too
+very s t can will just don don't should should've now d ll m o re ve y ain aren aren't
+couldn couldn't didn didn't doesn doesn't hadn hadn't hasn hasn't haven haven't isn isn't
+ma mightn mightn't mustn mustn't needn needn't shan shan't shouldn shouldn't wasn wasn't
+weren weren't won won't wouldn wouldn't
+""".split())
+
+
+# Word tokens as NLTK's word_tokenize would produce them, restricted to the purely
+# alphanumeric ones generate_tags keeps. A run of letters and digits only counts
+# when it is bounded by something the Treebank rules split on, so "e-mail", "3.14",
+# "and/or" and "foo_bar" are single non-alphanumeric tokens there and are skipped
+# here; clitics come off the way Treebank does them ("john's" -> "john",
+# "doesn't" -> "does").
+TOKEN_SPLIT = r"""\s"«“‘„`»”’;@#$%&‒-―?!*()\[\]{}<>"""
+TOKEN_CLOSE = r"""\]\)}>"'»”’"""
+TOKEN_END = rf"""(?:\Z|[{TOKEN_SPLIT}]|[:,](?!\d)|\.\.|--|\.[{TOKEN_CLOSE}]*(?:\s|\Z))"""
+WORD_RE = re.compile(rf"""
+    (?:\A|(?<=[{TOKEN_SPLIT}])|(?<=[:,])(?=\D)|(?<=\.\.)|(?<=--)|(?<=(?<!\w)')(?!(?:re|ve|ll|m|t|s|d|n)\b))
+    (?:[^\W_]+?(?=n't{TOKEN_END})
+      |[^\W_]+(?=(?:'(?:s|m|d|ll|re|ve)?)?{TOKEN_END}))
+""", re.X)
+# Treebank also splits a few run-together words ("cannot" -> "can not")
+CONTRACTIONS_RE = re.compile(r"\b(can(?=not\b)|gim(?=me\b)|gon(?=na\b)|got(?=ta\b)|lem(?=me\b)|more(?='n\b)|wan(?=na\s)|'t(?=is\b|was\b))")
+TEXT_CHUNK_CHARS = 1024 * 1024
+CHUNK_TAIL_RE = re.compile(r"\S*\Z")
+
+
+def count_words(chunks, stop_words=frozenset()):
+    counts = Counter()
+    tail = ""
+    for chunk in chunks:
+        # A word cut off at the end of a chunk is carried over to the next one
+        chunk = tail + chunk.lower()
+        cut = CHUNK_TAIL_RE.search(chunk).start()
+        tail = chunk[cut:]
+        counts.update(WORD_RE.findall(CONTRACTIONS_RE.sub(r"\1 ", chunk[:cut])))
+    counts.update(WORD_RE.findall(CONTRACTIONS_RE.sub(r"\1 ", tail)))
+    for word in stop_words & counts.keys():
+        del counts[word]
+    return counts
+
+
+def nltk_data_available(resource):
+    import nltk
+    try:
+        nltk.data.find(resource)
+        return True
+    except LookupError:
+        return False
+
+
+def load_stop_words():
+    if nltk_data_available('corpora/stopwords'):
+        from nltk.corpus import stopwords
+        return frozenset(stopwords.words('english'))
+    logger.info("NLTK stopwords not installed; using the built-in English list")
+    return ENGLISH_STOP_WORDS
+
+# Types whose text comes from PDF parsing or OCR; these are worth looking up in the
+# extraction cache, while plain text is cheaper to read again than to hash
+CACHED_EXTRACTION_EXTS = {".pdf", ".jpg", ".png", ".jpeg"}
 
 class AIDirectoryManager:
-    def __init__(self):
+    def __init__(self, extraction_cache=None):
         self.categories = {
             "Images": [".jpg", ".png", ".jpeg", ".gif", ".bmp"],
             "Documents": [".pdf", ".doc", ".docx", ".txt"],
@@ -27,7 +94,14 @@ class AIDirectoryManager:
             "Code": [".py", ".cpp", ".java", ".js"],
             "Other": []
         }
-        self.stop_words = set(stopwords.words('english'))
+        self._stop_words = None
+        self.extraction_cache = extraction_cache
+
+    @property
+    def stop_words(self):
+        if self._stop_words is None:
+            self._stop_words = load_stop_words()
+        return self._stop_words
 
     def categorize_file(self, file_path):
         ext = os.path.splitext(file_path)[1].lower()
@@ -46,79 +120,148 @@ class AIDirectoryManager:
                 return "Audio"
         return "Other"
 
+    # {category: [file names]} for the files directly in directory. Files already
+    # sitting in their category folder stay where they are rather than moving into
+    # a folder of the same name inside it.
     def suggest_folder_structure(self, directory):
         structure = {}
-        for item in os.listdir(directory):
-            full_path = os.path.join(directory, item)
-            if os.path.isfile(full_path):
-                category = self.categorize_file(full_path)
-                if category not in structure:
-                    structure[category] = []
-                structure[category].append(item)
+        own_name = os.path.basename(os.path.abspath(directory))
+        with span("ai.suggest_folder_structure") as s:
+            for item in os.listdir(directory):
+                full_path = os.path.join(directory, item)
+                if os.path.isfile(full_path):
+                    category = self.categorize_file(full_path)
+                    if category == own_name:
+                        continue
+                    if category not in structure:
+                        structure[category] = []
+                    structure[category].append(item)
+                    s.add(files=1)
         return structure
 
-    def get_file_hash(self, file_path):
-        hash_md5 = hashlib.md5()
-        try:
-            with open(file_path, "rb") as f:
-                for chunk in iter(lambda: f.read(4096), b""):
-                    hash_md5.update(chunk)
-        except Exception as e:
-            logger.error(f"Error hashing {file_path}: {e}")
-        return hash_md5.hexdigest()
-
-    def find_duplicates(self, directory):
-        hashes = {}
-        duplicates = []
-        for item in os.listdir(directory):
-            full_path = os.path.join(directory, item)
-            if os.path.isfile(full_path):
-                file_hash = self.get_file_hash(full_path)
-                if file_hash in hashes:
-                    duplicates.append((full_path, hashes[file_hash]))
-                else:
-                    hashes[file_hash] = full_path
-        return duplicates
-
-    def extract_text(self, file_path):
+    def find_duplicates(self, directory, cancel=None, progress=None):
+        finder = DuplicateFinder(hash_cache=self.extraction_cache, cancel=cancel, progress=progress)
+        with span("ai.find_duplicates") as s:
+            groups = finder.find(directory)
+            s.add(finder.files_scanned, finder.bytes_read)
+        return groups
+
+    # max_chars lets callers that only need a sample of the text (tagging) stop
+    # reading early; None reads up to the configured page caps
+    def extract_text(self, file_path, max_chars=None):
         ext = os.path.splitext(file_path)[1].lower()
+        cache = self.extraction_cache if ext in CACHED_EXTRACTION_EXTS else None
         try:
-            if ext == ".txt":
-                with open(file_path, "r", encoding="utf-8") as f:
-                    return f.read()
-            elif ext == ".pdf":
-                try:
-                    # Try text extraction first
-                    with open(file_path, "rb") as f:
-                        pdf = PyPDF2.PdfReader(f)
-                        text = " ".join(page.extract_text() or "" for page in pdf.pages)
-                        if text.strip():
-                            return text
-                    # Fallback to OCR for scanned PDFs
-                    from pdf2image import convert_from_path
-                    images = convert_from_path(file_path)
-                    text = " ".join(pytesseract.image_to_string(img) for img in images)
-                    return text if text.strip() else ""
-                except Exception as e:
-                    logger.error(f"Error extracting text from PDF {file_path}: {e}")
-                    return ""
-            elif ext in [".jpg", ".png", ".jpeg"]:
-                text = pytesseract.image_to_string(Image.open(file_path))
-                return text if text.strip() else ""
+            if cache:
+                with span("ai.extraction_cache.lookup"):
+                    digest = cache.digest(file_path)
+                    text = cache.get_text(digest, max_chars)
+                if text is not None:
+                    return text
+            with span("ai.extract_text", ext=ext) as s:
+                if s:
+                    s.add(1, os.path.getsize(file_path))
+                text, complete = self._extract_text(file_path, ext, max_chars)
+            if cache:
+                cache.put_text(digest, text, complete)
+            return text
         except Exception as e:
             logger.error(f"Error extracting text from {file_path}: {e}")
         return ""
 
+    # Returns (text, complete); complete is False when the text stops short of
+    # everything the file holds, so the cache can tell a sample from the whole
+    def _extract_text(self, file_path, ext, max_chars):
+        if ext == ".txt":
+            with open(file_path, "r", encoding="utf-8") as f:
+                return (f.read(max_chars) if max_chars else f.read()), True
+        elif ext == ".pdf":
+            parts = []
+            length = 0
+            try:
+                for text in self.iter_pdf_text(file_path):
+                    parts.append(text)
+                    length += len(text)
+                    if max_chars and length >= max_chars:
+                        return " ".join(parts), False
+            except Exception as e:
+                # Nothing read means nothing worth keeping; otherwise keep the pages
+                # read before the failure without caching them as the full text
+                if not parts:
+                    raise
+                logger.error(f"Error extracting text from PDF {file_path}: {e}")
+                return " ".join(parts), False
+            return " ".join(parts), True
+        elif ext in [".jpg", ".png", ".jpeg"]:
+            import pytesseract
+            from PIL import Image
+            with span("ai.ocr_image"), Image.open(file_path) as img:
+                text = pytesseract.image_to_string(img)
+            return (text if text.strip() else ""), True
+        return "", True
+
+    # Yields a PDF's text one page at a time: the text layer where a page has one,
+    # otherwise OCR of just that page. Only one rendered page is held in memory,
+    # and callers stop the work early by not asking for more pages.
+    def iter_pdf_text(self, file_path):
+        import PyPDF2
+        with open(file_path, "rb") as f:
+            pdf = PyPDF2.PdfReader(f)
+            ocr_pages = 0
+            for number, page in enumerate(pdf.pages, start=1):
+                if number > PDF_MAX_PAGES:
+                    break
+                with span("ai.pdf_page_text"):
+                    text = page.extract_text() or ""
+                if not text.strip() and ocr_pages < PDF_OCR_MAX_PAGES:
+                    ocr_pages += 1
+                    text = self.ocr_pdf_page(file_path, number)
+                if text.strip():
+                    yield text
+
+    @staticmethod
+    @timed("ai.ocr_pdf_page")
+    def ocr_pdf_page(file_path, number):
+        import pytesseract
+        from pdf2image import convert_from_path
+        images = convert_from_path(file_path, dpi=PDF_OCR_DPI, first_page=number, last_page=number, grayscale=True)
+        try:
+            return " ".join(pytesseract.image_to_string(img) for img in images)
+        finally:
+            for img in images:
+                img.close()
+
+    # Yields the file's text in chunks of at most TEXT_CHUNK_CHARS for plain text;
+    # PDFs and images come through extract_text and its cache as a single piece
+    def iter_text(self, file_path, max_chars=None):
+        ext = os.path.splitext(file_path)[1].lower()
+        if ext != ".txt":
+            text = self.extract_text(file_path, max_chars)
+            if text:
+                yield text
+            return
+        remaining = max_chars
+        with open(file_path, "r", encoding="utf-8") as f:
+            while remaining is None or remaining > 0:
+                chunk = f.read(TEXT_CHUNK_CHARS if remaining is None else min(TEXT_CHUNK_CHARS, remaining))
+                if not chunk:
+                    break
+                if remaining is not None:
+                    remaining -= len(chunk)
+                yield chunk
+
     def generate_tags(self, file_path):
         if not os.path.isfile(file_path):
             return []
-        text = self.extract_text(file_path)
         tags = []
-        if text:
-            tokens = word_tokenize(text.lower())
-            tags = [word for word in tokens if word.isalnum() and word not in self.stop_words]
-            tag_freq = nltk.FreqDist(tags)
-            tags = [tag for tag, _ in tag_freq.most_common(5)]
+        with span("ai.generate_tags") as s:
+            if s:
+                s.add(1, os.path.getsize(file_path))
+            try:
+                counts = count_words(self.iter_text(file_path, TAG_TEXT_CHARS), self.stop_words)
+                tags = [tag for tag, _ in counts.most_common(5)]
+            except Exception as e:
+                logger.error(f"Error extracting text from {file_path}: {e}")
         # Fallback: use file extension or name-based tags
         if not tags:
             ext = os.path.splitext(file_path)[1].lower()
@@ -0,0 +1,78 @@
+import re
+import sys
+import json
+import time
+import argparse
+from collections import Counter
+from ai import AIDirectoryManager, count_words, nltk_data_available
+from benchmarks.synthetic import make_corpus
+
+SENTENCE_RE = re.compile(r"(?<=[.!?])\s+")
+
+
+# The tag ranking generate_tags used before the regex tokenizer: NLTK
+# word_tokenize over the whole text, alphanumeric tokens only, minus stopwords.
+# Without the Punkt data, sentences are split on end punctuation instead.
+def legacy_tokenizer():
+    if nltk_data_available("tokenizers/punkt_tab") or nltk_data_available("tokenizers/punkt"):
+        from nltk.tokenize import word_tokenize
+        return word_tokenize
+    from nltk.tokenize import NLTKWordTokenizer
+    words = NLTKWordTokenizer().tokenize
+    return lambda text: [token for sentence in SENTENCE_RE.split(text) for token in words(sentence)]
+
+
+def legacy_tags(text, tokenize, stop_words):
+    tokens = tokenize(text.lower())
+    return [tag for tag, _ in Counter(t for t in tokens if t.isalnum() and t not in stop_words).most_common(5)]
+
+
+def fast_tags(text, stop_words):
+    return [tag for tag, _ in count_words([text], stop_words).most_common(5)]
+
+
+def run(documents):
+    stop_words = AIDirectoryManager().stop_words
+    tokenize = legacy_tokenizer()
+    chars = sum(len(doc) for doc in documents)
+
+    started = time.perf_counter()
+    expected = [legacy_tags(doc, tokenize, stop_words) for doc in documents]
+    legacy_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    actual = [fast_tags(doc, stop_words) for doc in documents]
+    fast_seconds = time.perf_counter() - started
+
+    mismatches = [i for i, (a, b) in enumerate(zip(expected, actual)) if a != b]
+    return {
+        "documents": len(documents),
+        "chars": chars,
+        "legacy_seconds": round(legacy_seconds, 4),
+        "fast_seconds": round(fast_seconds, 4),
+        "speedup": round(legacy_seconds / max(fast_seconds, 1e-9), 2),
+        "legacy_mb_per_sec": round(chars / legacy_seconds / 1e6, 2),
+        "fast_mb_per_sec": round(chars / fast_seconds / 1e6, 2),
+        "matching_tag_sets": len(documents) - len(mismatches),
+        "mismatches": [{"document": i, "legacy": expected[i], "fast": actual[i]} for i in mismatches[:10]],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare the regex tag pipeline against NLTK tokenization.")
+    parser.add_argument("files", nargs="*", help="extra UTF-8 text files to add to the synthetic corpus")
+    parser.add_argument("--documents", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    documents = make_corpus(args.seed, args.documents)
+    for path in args.files:
+        with open(path, "r", encoding="utf-8") as f:
+            documents.append(f.read())
+    result = run(documents)
+    print(json.dumps(result, indent=2))
+    return 1 if result["mismatches"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
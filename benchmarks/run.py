@@ -0,0 +1,384 @@
+import os
+import sys
+import json
+import time
+import shutil
+import random
+import argparse
+import datetime
+import platform
+import tempfile
+import subprocess
+import statistics
+import logging
+from benchmarks.synthetic import TreeSpec, generate_tree
+
+logger = logging.getLogger(__name__)
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_FORMAT = 1
+CASE_GROUPS = ("scan", "dedup", "tags", "visualize", "startup")
+# Slowdowns smaller than this are timer noise, whatever the percentage
+NOISE_FLOOR_SECONDS = 0.002
+
+
+# Runs func repeat times and keeps the wall-clock timings. setup runs before each
+# timed call (outside the timing) for cases that must start cold every time.
+def measure(func, repeat, setup=None):
+    runs = []
+    result = None
+    for _ in range(repeat):
+        if setup:
+            setup()
+        started = time.perf_counter()
+        result = func()
+        runs.append(time.perf_counter() - started)
+    return runs, result
+
+
+def case_record(runs, items=None, num_bytes=None, **extra):
+    best = min(runs)
+    record = {
+        "seconds": {
+            "min": round(best, 6),
+            "median": round(statistics.median(runs), 6),
+            "mean": round(statistics.fmean(runs), 6),
+        },
+        "runs": [round(run, 6) for run in runs],
+    }
+    if items is not None:
+        record["items"] = items
+        record["items_per_sec"] = round(items / max(best, 1e-9), 1)
+    if num_bytes is not None:
+        record["bytes"] = num_bytes
+        record["mb_per_sec"] = round(num_bytes / max(best, 1e-9) / (1024 * 1024), 2)
+    record.update(extra)
+    return record
+
+
+# Creates the tree for spec under workdir, or reuses the one already there when it
+# was generated from the same spec
+def prepare_tree(spec, workdir):
+    root = os.path.join(workdir, "tree")
+    manifest_path = os.path.join(workdir, "manifest.json")
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest["spec"] == spec.to_dict() and os.path.isdir(root):
+            logger.info(f"Reusing benchmark tree in {root}")
+            return root, manifest["summary"]
+    except (OSError, ValueError, KeyError):
+        pass
+    shutil.rmtree(root, ignore_errors=True)
+    logger.info(f"Generating {spec.files} files in {root}")
+    started = time.perf_counter()
+    summary = generate_tree(spec, root)
+    summary["generate_seconds"] = round(time.perf_counter() - started, 3)
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump({"spec": spec.to_dict(), "summary": summary}, f, indent=2)
+    return root, summary
+
+
+def scan_listing(scanner, directory):
+    job = scanner.start(directory)
+    rows = []
+    while True:
+        batch = job.batches.get()
+        if batch is None:
+            return rows
+        rows.extend(batch)
+
+
+def bench_scan(root, args):
+    from scanner import DirectoryScanner
+    from file_list import SORT_KEYS, sort_rows
+    from snapshot import DirectorySnapshot
+
+    scanner = DirectoryScanner()
+    directories = DirectorySnapshot.build(root).dirs
+    listed = []
+
+    def list_all():
+        listed[:] = []
+        for directory in directories:
+            listed.extend(scan_listing(scanner, directory))
+        return len(listed)
+
+    runs, count = measure(list_all, args.repeat)
+    cases = {"scan.list_directory": case_record(runs, items=count, directories=len(directories))}
+    for column in SORT_KEYS:
+        rows = list(listed)
+        runs, _ = measure(lambda: sort_rows(rows, column), args.repeat, setup=lambda: random.Random(0).shuffle(rows))
+        cases[f"scan.sort.{column.lower()}"] = case_record(runs, items=len(rows))
+    return cases
+
+
+def bench_dedup(root, args):
+    from dedup import DuplicateFinder
+    from extraction_cache import ExtractionCache
+
+    finder = DuplicateFinder(max_workers=args.workers)
+    runs, groups = measure(lambda: finder.find(root), args.repeat)
+    cases = {"dedup.find_duplicates": case_record(
+        runs, items=finder.files_scanned, num_bytes=finder.bytes_total,
+        groups=len(groups), bytes_hashed=finder.bytes_read,
+    )}
+
+    # Second pass over an unchanged tree with a warm hash cache, as on a re-run
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = ExtractionCache(os.path.join(cache_dir, "cache.db"))
+        try:
+            finder = DuplicateFinder(max_workers=args.workers, hash_cache=cache)
+            finder.find(root)
+            runs, groups = measure(lambda: finder.find(root), args.repeat)
+        finally:
+            cache.close()
+    cases["dedup.find_duplicates_cached"] = case_record(
+        runs, items=finder.files_scanned, num_bytes=finder.bytes_total,
+        groups=len(groups), bytes_hashed=finder.bytes_read,
+    )
+    return cases
+
+
+def bench_tags(root, args):
+    from ai import AIDirectoryManager
+    from snapshot import DirectorySnapshot
+    from extraction_cache import ExtractionCache
+
+    snapshot = DirectorySnapshot.build(root)
+    paths = sorted(snapshot.path(i) for i in range(len(snapshot)))
+    skipped = 0
+    if not shutil.which("tesseract"):
+        # Without Tesseract every image would only time the OCR failure path
+        kept = [path for path in paths if os.path.splitext(path)[1].lower() not in (".png", ".jpg", ".jpeg")]
+        skipped = len(paths) - len(kept)
+        paths = kept
+    paths = random.Random(0).sample(paths, min(args.tag_files, len(paths)))
+    num_bytes = sum(os.path.getsize(path) for path in paths)
+
+    cases = {}
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache_path = os.path.join(cache_dir, "cache.db")
+        cache = ExtractionCache(cache_path)
+        try:
+            manager = AIDirectoryManager(cache)
+            # Load the stopword list up front so it isn't charged to the first file
+            manager.stop_words
+
+            def clear_cache():
+                with cache.lock:
+                    cache.conn.execute("DELETE FROM texts")
+                    cache.conn.execute("DELETE FROM hashes")
+                    cache.conn.commit()
+
+            tag_all = lambda: sum(1 for path in paths if manager.generate_tags(path))
+            runs, tagged = measure(tag_all, args.repeat, setup=clear_cache)
+            cases["tags.generate_tags"] = case_record(runs, items=len(paths), num_bytes=num_bytes,
+                                                      tagged=tagged, skipped_images=skipped)
+            runs, tagged = measure(tag_all, args.repeat)
+            cases["tags.generate_tags_cached"] = case_record(runs, items=len(paths), num_bytes=num_bytes,
+                                                             tagged=tagged, skipped_images=skipped)
+        finally:
+            cache.close()
+    return cases
+
+
+def bench_visualize(root, args):
+    import matplotlib
+    matplotlib.use("Agg")
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from visualization import VisualizationManager
+
+    manager = VisualizationManager()
+    runs, snapshot = measure(lambda: manager.build_snapshot(root), args.repeat)
+    files = len(snapshot)
+    cases = {"visualize.snapshot": case_record(runs, items=files, directories=len(snapshot.dirs))}
+
+    def reset():
+        snapshot._dir_totals = snapshot._files_by_dir = snapshot._dirs_by_parent = None
+
+    runs, _ = measure(lambda: manager.get_file_type_distribution(snapshot), args.repeat)
+    cases["visualize.file_type_distribution"] = case_record(runs, items=files)
+    runs, _ = measure(snapshot.dir_totals, args.repeat, setup=reset)
+    cases["visualize.dir_totals"] = case_record(runs, items=files)
+    runs, _ = measure(lambda: manager.tree_map_nodes(snapshot, 0), args.repeat, setup=reset)
+    cases["visualize.tree_map_nodes"] = case_record(runs, items=files)
+
+    # Each chart drawn into an off-screen figure, including the render, the way the
+    # window's canvas would show it
+    figure = Figure(figsize=(10, 6))
+    canvas = FigureCanvasAgg(figure)
+    charts = {
+        "tree_map": manager.plot_tree_map,
+        "timeline": manager.plot_timeline,
+        "depth_pie": manager.plot_depth_pie,
+        "file_age_bar": manager.plot_file_age_bar,
+    }
+    for name, plot in charts.items():
+        def draw():
+            figure.clf()
+            plot(figure.add_subplot(111), snapshot)
+            canvas.draw()
+        runs, _ = measure(draw, args.repeat, setup=reset)
+        cases[f"visualize.plot.{name}"] = case_record(runs, items=files)
+    return cases
+
+
+# Launch cost as a fresh interpreter sees it: importing the app and building its
+# window on the top folder until Tk is first idle, checked against the same budget
+# the app warns about at startup
+def bench_startup(root, args):
+    from config import STARTUP_BUDGET_SECONDS
+    from benchmarks.startup import measure_startup
+    runs = []
+    imports = []
+    home = tempfile.mkdtemp(prefix="dirmanager-home-")
+    try:
+        for _ in range(args.repeat):
+            result = measure_startup(root, home)
+            reason = result.get("skipped") or result.get("error")
+            if reason:
+                logger.warning(f"Skipping startup benchmark: {reason}")
+                return {"startup.first_window": {"skipped": reason}}
+            imports.append(result["import_seconds"])
+            runs.append(result["seconds"])
+    finally:
+        shutil.rmtree(home, ignore_errors=True)
+    return {"startup.first_window": case_record(
+        runs, import_seconds=round(min(imports), 6),
+        budget_seconds=STARTUP_BUDGET_SECONDS, within_budget=min(runs) <= STARTUP_BUDGET_SECONDS,
+    )}
+
+
+BENCHMARKS = {
+    "scan": bench_scan,
+    "dedup": bench_dedup,
+    "tags": bench_tags,
+    "visualize": bench_visualize,
+    "startup": bench_startup,
+}
+
+
+def git_commit():
+    try:
+        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR, capture_output=True, text=True)
+    except OSError:
+        return None
+    return result.stdout.strip() or None
+
+
+# Cases whose best time grew by more than tolerance (a fraction) over the baseline.
+# Cases missing from either side, or skipped, are left out.
+def compare(baseline, current, tolerance):
+    rows = []
+    for name, record in current["cases"].items():
+        before = baseline.get("cases", {}).get(name)
+        if not before or "seconds" not in before or "seconds" not in record:
+            continue
+        old, new = before["seconds"]["min"], record["seconds"]["min"]
+        change = (new - old) / old if old else 0.0
+        rows.append({"case": name, "baseline": old, "current": new, "change": round(change, 4),
+                     "regression": change > tolerance and new - old > NOISE_FLOOR_SECONDS})
+    return rows
+
+
+def over_budget(results):
+    return {name: record for name, record in results["cases"].items() if record.get("within_budget") is False}
+
+
+def print_comparison(rows, stream=sys.stderr):
+    for row in rows:
+        flag = "REGRESSION" if row["regression"] else ""
+        stream.write(f"{row['case']:<40} {row['baseline'] * 1000:>10.2f}ms {row['current'] * 1000:>10.2f}ms {row['change']:>+8.1%} {flag}\n")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Time the app's hot paths against a generated directory tree and write the results as JSON."
+    )
+    parser.add_argument("--workdir", help="where to keep the generated tree; reused on later runs with the same spec (default: a temporary folder)")
+    parser.add_argument("--output", help="write results here instead of stdout")
+    parser.add_argument("--baseline", help="earlier results file to compare against; exits with 1 on a regression")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown over the baseline (default: 0.2 = 20%%)")
+    parser.add_argument("--cases", default=",".join(CASE_GROUPS), help=f"comma-separated groups to run (default: {','.join(CASE_GROUPS)})")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per case; the best one is compared")
+    parser.add_argument("--workers", type=int, default=None, help="worker count for duplicate detection")
+    parser.add_argument("--tag-files", type=int, default=200, help="files sampled for the tagging benchmark")
+
+    tree = parser.add_argument_group("synthetic tree")
+    tree.add_argument("--files", type=int, default=2000)
+    tree.add_argument("--depth", type=int, default=3, help="folder levels below the root")
+    tree.add_argument("--fanout", type=int, default=4, help="subfolders per folder")
+    tree.add_argument("--size-distribution", choices=("lognormal", "uniform", "fixed"), default="lognormal")
+    tree.add_argument("--median-size", type=int, default=8 * 1024, help="bytes")
+    tree.add_argument("--size-sigma", type=float, default=1.2, help="spread of the lognormal distribution")
+    tree.add_argument("--max-size", type=int, default=4 * 1024 * 1024, help="bytes")
+    tree.add_argument("--duplicate-ratio", type=float, default=0.1, help="share of files that copy an earlier one")
+    tree.add_argument("--mix", type=TreeSpec.parse_mix, default=None,
+                      help="weights per file kind, e.g. text=0.6,pdf=0.15,image=0.15,binary=0.1")
+    tree.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-v", "--verbose", action="store_true")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING)
+    groups = [group.strip() for group in args.cases.split(",") if group.strip()]
+    unknown = set(groups) - set(BENCHMARKS)
+    if unknown:
+        print(f"Unknown benchmark groups: {', '.join(sorted(unknown))}", file=sys.stderr)
+        return 2
+    spec = TreeSpec(
+        files=args.files, depth=args.depth, fanout=args.fanout, size_distribution=args.size_distribution,
+        median_size=args.median_size, size_sigma=args.size_sigma, max_size=args.max_size,
+        duplicate_ratio=args.duplicate_ratio, mix=args.mix, seed=args.seed,
+    )
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="dirmanager-bench-")
+    try:
+        os.makedirs(workdir, exist_ok=True)
+        root, summary = prepare_tree(spec, workdir)
+        cases = {}
+        for group in groups:
+            logger.info(f"Running {group} benchmarks")
+            cases.update(BENCHMARKS[group](root, args))
+    finally:
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    results = {
+        "format": RESULTS_FORMAT,
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "repeat": args.repeat,
+        "tree": {"spec": spec.to_dict(), **summary},
+        "cases": cases,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
+
+    status = 0
+    # A case with a budget (startup) fails the run on its own, baseline or not
+    for name, record in over_budget(results).items():
+        print(f"{name} took {record['seconds']['min']:.3f}s, over its {record['budget_seconds']:.3f}s budget", file=sys.stderr)
+        status = 1
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        rows = compare(baseline, results, args.tolerance)
+        print_comparison(rows)
+        if any(row["regression"] for row in rows):
+            status = 1
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,54 @@
+import os
+import sys
+import json
+import time
+import subprocess
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# Runs in a fresh interpreter so every import is cold: builds the app's window,
+# hidden, listing directory, and stops once Tk is first idle. That is the span
+# the app itself checks against STARTUP_BUDGET_SECONDS. Prints the timings as
+# JSON, or the reason it could not run (no display).
+def main(directory):
+    started = time.perf_counter()
+    import tkinter as tk
+    import interface
+    imported = time.perf_counter()
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        print(json.dumps({"skipped": str(e)}))
+        return 0
+    root.withdraw()
+    app = interface.FileManagerApp(root, start_path=directory)
+    app.root.withdraw()
+    timings = {}
+
+    def idle():
+        timings["seconds"] = time.perf_counter() - started
+        app.root.quit()
+
+    app.root.after_idle(idle)
+    app.root.mainloop()
+    app.on_close()
+    root.destroy()
+    print(json.dumps({"seconds": timings["seconds"], "import_seconds": imported - started}))
+    return 0
+
+
+# Times one startup in a child process. home stands in for the user's home folder,
+# so the app's databases and recycle bin are made there and not in the real one.
+def measure_startup(directory, home):
+    env = dict(os.environ, HOME=home, USERPROFILE=home)
+    result = subprocess.run([sys.executable, "-m", "benchmarks.startup", directory], cwd=REPO_DIR,
+                            env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        reason = result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "failed"
+        return {"error": reason}
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1]))
@@ -0,0 +1,242 @@
+import os
+import math
+import time
+import random
+import shutil
+import textwrap
+
+# Common English words, stopwords included, so generated prose has a realistic
+# share of tokens that tagging throws away
+COMMON_WORDS = (
+    "the of and to a in is it you that he was for on are with as his they be at one have this from "
+    "or had by word but what some we can out other were all there when up use your how said an each "
+    "she which do their time if will way about many then them write would like so these her long make "
+    "thing see him two has look more day could go come did number sound no most people my over know "
+    "water than call first who may down side been now find report budget project meeting invoice "
+    "contract schedule design review quarterly revenue forecast customer product release"
+).split()
+
+# Pieces that exercise the tokenizer's edge cases: clitics, hyphenation, numbers
+# with separators, paths, markup and the like
+TRICKY_TOKENS = [
+    "don't", "isn't", "doesn't", "can't", "won't", "it's", "John's", "they're", "we've", "cannot",
+    "e-mail", "well-known", "state-of-the-art", "3.14", "1,000", "10:30", "U.S.", "and/or",
+    "foo_bar", "(see", "below)", "\"quoted\"", "'single'", "@user", "#tag", "$5.00", "20%",
+    "http://example.com/page", "--", "...", "e.g.", "Mr.", "naïve", "café", "résumé",
+]
+
+
+def make_vocabulary(rng, size=2000):
+    letters = "etaoinshrdlcumwfgypbvkjxqz"
+    weights = [26 - i for i in range(len(letters))]
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choices(letters, weights, k=rng.randint(3, 11))))
+    return sorted(words)
+
+
+# Zipf-distributed prose: sentences of common and generated words, capitalised
+# and punctuated, with a sprinkling of tricky tokens
+def make_text(rng, word_count, vocabulary=None, tricky_ratio=0.02):
+    vocabulary = vocabulary or make_vocabulary(rng)
+    pool = COMMON_WORDS + vocabulary
+    weights = [1.0 / (rank + 1) for rank in range(len(pool))]
+    words = rng.choices(pool, weights, k=word_count)
+    out = []
+    sentence_left = 0
+    for word in words:
+        if rng.random() < tricky_ratio:
+            word = rng.choice(TRICKY_TOKENS)
+        if sentence_left == 0:
+            if out:
+                out[-1] += rng.choice(".....?!")
+            sentence_left = rng.randint(5, 25)
+            word = word[:1].upper() + word[1:]
+        elif rng.random() < 0.08:
+            out[-1] += ","
+        out.append(word)
+        sentence_left -= 1
+    if out:
+        out[-1] += "."
+    return " ".join(out)
+
+
+def make_corpus(seed=0, documents=50, min_words=200, max_words=20000):
+    rng = random.Random(seed)
+    vocabulary = make_vocabulary(rng)
+    return [make_text(rng, rng.randint(min_words, max_words), vocabulary) for _ in range(documents)]
+
+
+# A reproducible directory tree for the benchmarks. The same spec and seed always
+# write the same folders, names and bytes; only the modification times follow the
+# clock, so the age charts see files spread back from the day the tree was made.
+class TreeSpec:
+    KINDS = ("text", "pdf", "image", "binary")
+
+    def __init__(self, files=2000, depth=3, fanout=4, size_distribution="lognormal", median_size=8 * 1024,
+                 size_sigma=1.2, max_size=4 * 1024 * 1024, duplicate_ratio=0.1, mix=None, seed=0):
+        self.files = files
+        self.depth = depth
+        self.fanout = fanout
+        self.size_distribution = size_distribution
+        self.median_size = median_size
+        self.size_sigma = size_sigma
+        self.max_size = max_size
+        self.duplicate_ratio = duplicate_ratio
+        self.mix = dict(mix or {"text": 0.6, "pdf": 0.15, "image": 0.15, "binary": 0.1})
+        self.seed = seed
+        unknown = set(self.mix) - set(self.KINDS)
+        if unknown:
+            raise ValueError(f"Unknown file kinds in mix: {', '.join(sorted(unknown))}")
+        if size_distribution not in ("lognormal", "uniform", "fixed"):
+            raise ValueError(f"Unknown size distribution: {size_distribution}")
+
+    # "text=0.6,pdf=0.2,image=0.2" -> {"text": 0.6, "pdf": 0.2, "image": 0.2}
+    @staticmethod
+    def parse_mix(value):
+        mix = {}
+        for part in value.split(","):
+            kind, _, weight = part.partition("=")
+            mix[kind.strip()] = float(weight)
+        return mix
+
+    def to_dict(self):
+        return {
+            "files": self.files, "depth": self.depth, "fanout": self.fanout,
+            "size_distribution": self.size_distribution, "median_size": self.median_size,
+            "size_sigma": self.size_sigma, "max_size": self.max_size,
+            "duplicate_ratio": self.duplicate_ratio, "mix": self.mix, "seed": self.seed,
+        }
+
+    def draw_size(self, rng):
+        if self.size_distribution == "fixed":
+            size = self.median_size
+        elif self.size_distribution == "uniform":
+            size = rng.uniform(0, 2 * self.median_size)
+        else:
+            size = rng.lognormvariate(math.log(self.median_size), self.size_sigma)
+        return max(64, min(self.max_size, int(size)))
+
+
+# Builds text files by slicing a handful of topic corpora rather than generating
+# every word, which keeps a tree of a few hundred megabytes quick to write
+class TextSource:
+    def __init__(self, rng, topics=8, topic_chars=512 * 1024):
+        self.corpora = []
+        for _ in range(topics):
+            vocabulary = make_vocabulary(rng, 500)
+            self.corpora.append(make_text(rng, topic_chars // 6, vocabulary))
+
+    def take(self, rng, size, header):
+        corpus = rng.choice(self.corpora)
+        start = rng.randrange(len(corpus))
+        parts = [header, "\n"]
+        length = len(header) + 1
+        while length < size:
+            piece = corpus[start:start + size - length]
+            parts.append(piece)
+            length += len(piece)
+            start = 0
+        return "".join(parts)
+
+
+def pdf_escape(line):
+    return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+# A minimal PDF with a text layer: one Helvetica content stream per page, enough
+# for PyPDF2 to extract the words back out
+def make_pdf(text, lines_per_page=60, line_chars=90):
+    lines = textwrap.wrap(text, line_chars) or [""]
+    pages = [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)]
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for page in pages:
+        body = " T* ".join(f"({pdf_escape(line)}) Tj" for line in page)
+        stream = f"BT /F1 10 Tf 12 TL 40 800 Td {body} ET".encode("latin-1", "replace")
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] "
+                       b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % len(objects))
+        kids.append(len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(b"%d 0 R" % kid for kid in kids), len(kids))
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+# Noise compresses badly, so an image's pixel count tracks the size asked for
+def make_image(rng, size, path):
+    from PIL import Image
+    side = max(8, min(2048, int(math.sqrt(size / 3))))
+    with Image.frombytes("RGB", (side, side), rng.randbytes(side * side * 3)) as img:
+        img.save(path)
+
+
+def tree_directories(root, depth, fanout):
+    dirs = [root]
+    level = [root]
+    for d in range(depth):
+        level = [os.path.join(parent, f"dir_{d + 1}_{i}") for parent in level for i in range(fanout)]
+        dirs.extend(level)
+    return dirs
+
+
+# Writes the tree for spec under root and returns a summary of what went in it
+def generate_tree(spec, root):
+    rng = random.Random(spec.seed)
+    dirs = tree_directories(root, spec.depth, spec.fanout)
+    for directory in dirs:
+        os.makedirs(directory, exist_ok=True)
+    text_source = TextSource(rng)
+    kinds = list(spec.mix)
+    weights = [spec.mix[kind] for kind in kinds]
+    now = time.time()
+    written = {kind: [] for kind in TreeSpec.KINDS}
+    summary = {"files": 0, "bytes": 0, "dirs": len(dirs), "duplicates": 0, "kinds": dict.fromkeys(TreeSpec.KINDS, 0)}
+
+    for index in range(spec.files):
+        kind = rng.choices(kinds, weights)[0]
+        directory = rng.choice(dirs)
+        original = None
+        if written[kind] and rng.random() < spec.duplicate_ratio:
+            original = rng.choice(written[kind])
+        if original:
+            path = os.path.join(directory, f"copy_{index:06d}{os.path.splitext(original)[1]}")
+            shutil.copyfile(original, path)
+            summary["duplicates"] += 1
+        else:
+            size = spec.draw_size(rng)
+            header = f"Document {index} {kind}"
+            if kind == "text":
+                path = os.path.join(directory, f"notes_{index:06d}.txt")
+                data = text_source.take(rng, size, header).encode("utf-8")[:size]
+                with open(path, "wb") as f:
+                    f.write(data)
+            elif kind == "pdf":
+                path = os.path.join(directory, f"report_{index:06d}.pdf")
+                # Roughly half of a PDF's bytes are page text
+                with open(path, "wb") as f:
+                    f.write(make_pdf(text_source.take(rng, size // 2, header)))
+            elif kind == "image":
+                path = os.path.join(directory, f"photo_{index:06d}.{rng.choice(('png', 'jpg'))}")
+                make_image(rng, size, path)
+            else:
+                path = os.path.join(directory, f"blob_{index:06d}.bin")
+                with open(path, "wb") as f:
+                    f.write(header.encode() + rng.randbytes(size))
+            written[kind].append(path)
+        mtime = now - rng.expovariate(1 / (90 * 86400))
+        os.utime(path, (mtime, mtime))
+        summary["files"] += 1
+        summary["kinds"][kind] += 1
+        summary["bytes"] += os.path.getsize(path)
+    return summary
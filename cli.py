@@ -0,0 +1,215 @@
+import os
+import sys
+import json
+import time
+import argparse
+import datetime
+
+
+class Reporter:
+    def __init__(self, stream=sys.stdout):
+        self.stream = stream
+        self.started = time.perf_counter()
+        self.files = 0
+        self.bytes = 0
+
+    def emit(self, record):
+        self.stream.write(json.dumps(record) + "\n")
+        self.stream.flush()
+
+    def count(self, files=1, num_bytes=0):
+        self.files += files
+        self.bytes += num_bytes
+
+    def summary(self, command, **extra):
+        elapsed = max(time.perf_counter() - self.started, 1e-9)
+        self.emit({
+            "type": "summary",
+            "command": command,
+            "files": self.files,
+            "bytes": self.bytes,
+            "seconds": round(elapsed, 3),
+            "files_per_sec": round(self.files / elapsed, 1),
+            "mb_per_sec": round(self.bytes / elapsed / (1024 * 1024), 2),
+            **extra
+        })
+
+
+def run_tag(args, reporter):
+    from snapshot import DirectorySnapshot
+    from tagging import TaggingEngine
+    from tag_store import TagStore
+
+    snapshot = DirectorySnapshot.build(args.path)
+    store = None if args.no_store else TagStore()
+    sizes = {}
+    pending = []
+    for i in range(len(snapshot)):
+        path = os.path.abspath(snapshot.path(i))
+        if store is not None and not args.force:
+            tags = store.get(path)
+            if tags is not None:
+                reporter.emit({"type": "tag", "path": path, "tags": tags, "cached": True})
+                continue
+        sizes[path] = int(snapshot.sizes[i])
+        pending.append(path)
+
+    engine = TaggingEngine(args.workers)
+    batch = {}
+    failed = 0
+    try:
+        for path, tags, error in engine.iter_tags(pending):
+            reporter.count(1, sizes.get(path, 0))
+            record = {"type": "tag", "path": path, "tags": tags}
+            if error and not tags:
+                record["error"] = error
+                failed += 1
+            else:
+                batch[path] = tags
+            reporter.emit(record)
+            if store is not None and len(batch) >= 200:
+                store.update(batch)
+                batch = {}
+    finally:
+        if store is not None:
+            store.update(batch)
+            store.close()
+        engine.shutdown()
+    reporter.summary("tag", tagged=len(pending) - failed, failed=failed, cached=len(snapshot) - len(pending))
+
+
+def run_dedup(args, reporter):
+    from dedup import DuplicateFinder
+    from extraction_cache import ExtractionCache
+
+    cache = ExtractionCache()
+    try:
+        finder = DuplicateFinder(max_workers=args.workers, hash_cache=cache)
+        groups = finder.find(args.path)
+    finally:
+        cache.close()
+    for group in groups:
+        size = os.path.getsize(group[0]) if os.path.exists(group[0]) else 0
+        reporter.emit({"type": "duplicates", "size": size, "paths": group})
+    reporter.count(finder.files_scanned, finder.bytes_total)
+    reporter.summary("dedup", groups=len(groups), bytes_hashed=finder.bytes_read)
+
+
+def run_categorize(args, reporter):
+    from ai import AIDirectoryManager
+    from move_journal import plan_moves
+
+    manager = AIDirectoryManager()
+    if args.recursive:
+        from snapshot import DirectorySnapshot
+        directories = DirectorySnapshot.build(args.path).dirs
+    else:
+        directories = [args.path]
+    planned = 0
+    new_folders = 0
+    for directory in directories:
+        # The same plan the GUI's Categorize carries out for this folder, names
+        # already taken in a category folder included
+        moves, new_dirs = plan_moves(directory, manager.suggest_folder_structure(directory))
+        new_folders += len(new_dirs)
+        for src, dst in moves:
+            try:
+                size = os.lstat(src).st_size
+            except OSError:
+                size = 0
+            planned += 1
+            reporter.count(1, size)
+            reporter.emit({
+                "type": "categorize",
+                "path": src,
+                "category": os.path.basename(os.path.dirname(dst)),
+                "target": dst
+            })
+    reporter.summary("categorize", planned=planned, new_folders=new_folders)
+
+
+def run_stats(args, reporter):
+    import numpy as np
+    from snapshot import DirectorySnapshot
+
+    snapshot = DirectorySnapshot.build(args.path)
+    reporter.count(len(snapshot), int(snapshot.sizes.sum()))
+
+    counts = np.bincount(snapshot.ext_codes, minlength=len(snapshot.exts))
+    totals = np.bincount(snapshot.ext_codes, weights=snapshot.sizes, minlength=len(snapshot.exts))
+    for code in np.argsort(-totals):
+        if counts[code]:
+            reporter.emit({"type": "file_type", "ext": snapshot.exts[code], "count": int(counts[code]), "bytes": int(totals[code])})
+
+    # Power-of-two size buckets: bucket n holds files of [2**(n-1), 2**n) bytes
+    buckets = np.bincount(np.ceil(np.log2(snapshot.sizes + 1)).astype(np.int64)) if len(snapshot) else []
+    for bucket, count in enumerate(buckets):
+        if count:
+            reporter.emit({"type": "size_bucket", "min_bytes": 0 if bucket == 0 else 2 ** (bucket - 1), "max_bytes": 2 ** bucket, "count": int(count)})
+
+    age_days = (datetime.datetime.now().timestamp() - snapshot.mtimes) // 86400
+    for label, low, high in (("Today", None, 1), ("This Week", 1, 7), ("This Month", 7, 30), ("Older", 30, None)):
+        mask = np.ones(len(snapshot), dtype=bool)
+        if low is not None:
+            mask &= age_days >= low
+        if high is not None:
+            mask &= age_days < high
+        reporter.emit({"type": "age", "bucket": label, "count": int(mask.sum()), "bytes": int(snapshot.sizes[mask].sum())})
+
+    for depth, count in enumerate(np.bincount(snapshot.depths)):
+        if count:
+            reporter.emit({"type": "depth", "depth": depth, "count": int(count)})
+    reporter.summary("stats", directories=len(snapshot.dirs))
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Run the directory manager's scans without the GUI. Results are written to stdout as JSON Lines."
+    )
+    parser.add_argument("--workers", type=int, default=None, help="worker count (default: all cores)")
+    parser.add_argument("--trace", metavar="FILE", help="record operation timings and write them to FILE as a JSON trace")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    tag = commands.add_parser("tag", help="generate tags for every file in a tree")
+    tag.add_argument("path")
+    tag.add_argument("--force", action="store_true", help="retag files whose stored tags are still current")
+    tag.add_argument("--no-store", action="store_true", help="don't save tags to the tag store the GUI reads")
+    tag.set_defaults(func=run_tag)
+
+    dedup = commands.add_parser("dedup", help="find groups of identical files in a tree")
+    dedup.add_argument("path")
+    dedup.set_defaults(func=run_dedup)
+
+    categorize = commands.add_parser("categorize", help="plan category folders without moving anything")
+    categorize.add_argument("path")
+    categorize.add_argument("--recursive", action="store_true", help="plan for every folder, not just the top one")
+    categorize.set_defaults(func=run_categorize)
+
+    stats = commands.add_parser("stats", help="file type, size, age and depth statistics")
+    stats.add_argument("path")
+    stats.set_defaults(func=run_stats)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if not os.path.isdir(args.path):
+        print(f"Not a directory: {args.path}", file=sys.stderr)
+        return 2
+    if args.trace:
+        from instrumentation import profiler
+        profiler.enabled = True
+    try:
+        args.func(args, Reporter())
+    except BrokenPipeError:
+        # Output piped into something like head that stopped reading
+        sys.stderr.close()
+        return 1
+    finally:
+        if args.trace:
+            profiler.export_trace(args.trace)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,65 @@
+import os
+
+# Everything the app persists between runs lives under this folder
+APP_DATA_DIR = os.path.join(os.path.expanduser("~"), ".ai_directory_manager")
+
+TAG_DB_PATH = os.path.join(APP_DATA_DIR, "tags.db")
+CONTENT_INDEX_PATH = os.path.join(APP_DATA_DIR, "content_index.db")
+
+# Time from launch until the browser window is idle and showing the first listing
+STARTUP_BUDGET_SECONDS = 1.5
+
+# Seconds between re-listings when the platform has no native change notifications
+WATCH_POLL_INTERVAL = 2.0
+
+# PDF text extraction works page by page. Pages past PDF_MAX_PAGES are never read,
+# and at most PDF_OCR_MAX_PAGES pages without a text layer are rendered for OCR,
+# one at a time at PDF_OCR_DPI, so memory stays flat however long the document is.
+PDF_MAX_PAGES = 200
+PDF_OCR_MAX_PAGES = 20
+PDF_OCR_DPI = 150
+
+# Characters of text that are plenty to pick a file's top tags; extraction for
+# tagging stops once it has this much. Plain text is streamed in chunks, so this
+# bounds the work rather than the memory. The content index reads up to the page caps.
+TAG_TEXT_CHARS = 4 * 1024 * 1024
+
+# Text extracted by OCR and PDF parsing, shared by every copy of the same content
+EXTRACTION_CACHE_PATH = os.path.join(APP_DATA_DIR, "extraction_cache.db")
+EXTRACTION_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+# Operation timings are only recorded while profiling is on; it can be switched on
+# from the Diagnostics window, or from launch with DIRMANAGER_PROFILE=1. Trace
+# export keeps the most recent PROFILE_MAX_EVENTS spans.
+PROFILING_ENABLED = os.environ.get("DIRMANAGER_PROFILE") == "1"
+PROFILE_MAX_EVENTS = 100000
+
+# Categorize writes its whole move plan here before touching any file, so an
+# interrupted run can be resumed or undone after a restart
+MOVE_JOURNAL_PATH = os.path.join(APP_DATA_DIR, "move_journal.db")
+# Threads copying files that have to cross to another device
+MOVE_COPY_WORKERS = 4
+
+# Deleted items go here, indexed in RECYCLE_INDEX_PATH. Items older than the age
+# limit are purged automatically, and the oldest deletions are dropped whenever
+# the bin grows past its quota.
+RECYCLE_BIN_DIR = os.path.join(os.path.expanduser("~"), ".recycle_bin")
+RECYCLE_INDEX_PATH = os.path.join(APP_DATA_DIR, "recycle_bin.db")
+RECYCLE_BIN_MAX_AGE_DAYS = 30
+RECYCLE_BIN_QUOTA_BYTES = 10 * 1024 * 1024 * 1024
+
+# Image previews: THUMBNAIL_SIZE pixels on the long side, kept as PNGs under
+# THUMBNAIL_CACHE_DIR and decoded in memory up to THUMBNAIL_MEMORY_BYTES
+THUMBNAIL_CACHE_DIR = os.path.join(APP_DATA_DIR, "thumbnails")
+THUMBNAIL_SIZE = 100
+THUMBNAIL_MEMORY_BYTES = 64 * 1024 * 1024
+THUMBNAIL_DISK_MAX_BYTES = 256 * 1024 * 1024
+
+# Threads sharing the walk of a folder tree for the charts, one top-level
+# subfolder at a time
+TREE_WALK_WORKERS = 8
+
+# Worker threads for the app's background tasks (duplicate search, indexing,
+# chart data, recycle bin cleanup and the drivers of tagging and categorize).
+# One of them only takes high-priority work: chart data and categorize.
+TASK_WORKERS = 4
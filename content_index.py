@@ -0,0 +1,157 @@
+import os
+import re
+import sqlite3
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from config import CONTENT_INDEX_PATH
+
+logger = logging.getLogger(__name__)
+
+TOKEN_RE = re.compile(r"\w+")
+
+
+def tokenize(text):
+    return set(TOKEN_RE.findall(text.lower()))
+
+
+# Persistent inverted index over extracted file text: every distinct token maps to
+# the documents containing it. Documents carry the size, mtime and inode they were
+# indexed at, so refreshing a directory only re-extracts files that changed.
+class ContentIndex:
+    def __init__(self, db_path=CONTENT_INDEX_PATH):
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self.lock = threading.RLock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(
+            "CREATE TABLE IF NOT EXISTS documents ("
+            "id INTEGER PRIMARY KEY, path TEXT UNIQUE NOT NULL, directory TEXT NOT NULL, "
+            "size INTEGER, mtime_ns INTEGER, inode INTEGER);"
+            "CREATE INDEX IF NOT EXISTS idx_documents_directory ON documents(directory);"
+            "CREATE TABLE IF NOT EXISTS terms (id INTEGER PRIMARY KEY, term TEXT UNIQUE NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS postings ("
+            "term_id INTEGER NOT NULL, doc_id INTEGER NOT NULL, PRIMARY KEY (term_id, doc_id)) WITHOUT ROWID;"
+            "CREATE INDEX IF NOT EXISTS idx_postings_doc ON postings(doc_id);"
+        )
+        self.conn.commit()
+
+    @staticmethod
+    def _signature(st):
+        return (st.st_size, st.st_mtime_ns, st.st_ino)
+
+    def _indexed_signatures(self, directory):
+        rows = self.conn.execute(
+            "SELECT path, size, mtime_ns, inode FROM documents WHERE directory = ?", (directory,)
+        ).fetchall()
+        return {path: (size, mtime_ns, inode) for path, size, mtime_ns, inode in rows}
+
+    def _remove(self, path):
+        row = self.conn.execute("SELECT id FROM documents WHERE path = ?", (path,)).fetchone()
+        if row:
+            self.conn.execute("DELETE FROM postings WHERE doc_id = ?", (row[0],))
+            self.conn.execute("DELETE FROM documents WHERE id = ?", (row[0],))
+
+    def remove(self, path):
+        with self.lock:
+            self._remove(os.path.abspath(path))
+            self.conn.commit()
+
+    def index_file(self, path, text, st, commit=True):
+        path = os.path.abspath(path)
+        tokens = tokenize(text) if text else set()
+        with self.lock:
+            self._remove(path)
+            cursor = self.conn.execute(
+                "INSERT INTO documents (path, directory, size, mtime_ns, inode) VALUES (?, ?, ?, ?, ?)",
+                (path, os.path.dirname(path), *self._signature(st)),
+            )
+            doc_id = cursor.lastrowid
+            if tokens:
+                self.conn.executemany("INSERT OR IGNORE INTO terms (term) VALUES (?)", ((t,) for t in tokens))
+                self.conn.executemany(
+                    "INSERT OR IGNORE INTO postings (term_id, doc_id) SELECT id, ? FROM terms WHERE term = ?",
+                    ((doc_id, t) for t in tokens),
+                )
+            if commit:
+                self.conn.commit()
+
+    # Brings one directory's entries up to date, extracting text only for files that
+    # are new or changed, and drops entries for files that are gone.
+    def update_directory(self, directory, extract_text, cancel_event=None, progress=None, max_workers=None):
+        directory = os.path.abspath(directory)
+        with self.lock:
+            indexed = self._indexed_signatures(directory)
+        stale = []
+        present = set()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        if not entry.is_file():
+                            continue
+                        st = os.stat(entry.path)
+                    except OSError:
+                        continue
+                    present.add(entry.path)
+                    if indexed.get(entry.path) != self._signature(st):
+                        stale.append((entry.path, st))
+        except OSError as e:
+            logger.error(f"Error scanning {directory} for indexing: {e}")
+            return 0
+
+        with self.lock:
+            for path in set(indexed) - present:
+                self._remove(path)
+            self.conn.commit()
+
+        def extract(item):
+            if cancel_event and cancel_event.is_set():
+                return item, None
+            try:
+                return item, extract_text(item[0])
+            except Exception as e:
+                logger.error(f"Error extracting text from {item[0]}: {e}")
+                return item, ""
+
+        done = 0
+        with ThreadPoolExecutor(max_workers=max_workers or os.cpu_count() or 1) as executor:
+            for (path, st), text in executor.map(extract, stale):
+                if text is None:
+                    continue
+                self.index_file(path, text, st, commit=False)
+                done += 1
+                if progress:
+                    progress(done, len(stale))
+                if done % 50 == 0:
+                    with self.lock:
+                        self.conn.commit()
+        with self.lock:
+            self.conn.commit()
+        return done
+
+    # Paths in directory whose text contains every word of the query, each word
+    # matched as a substring of an indexed token
+    def search(self, directory, query):
+        words = TOKEN_RE.findall(query.lower())
+        if not words:
+            return set()
+        directory = os.path.abspath(directory)
+        sql = (
+            "SELECT DISTINCT d.path FROM documents d JOIN postings p ON p.doc_id = d.id "
+            "JOIN terms t ON t.id = p.term_id WHERE d.directory = ? AND t.term LIKE ? ESCAPE '\\'"
+        )
+        result = None
+        with self.lock:
+            for word in words:
+                pattern = "%" + word.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+                paths = {row[0] for row in self.conn.execute(sql, (directory, pattern))}
+                result = paths if result is None else result & paths
+                if not result:
+                    break
+        return result
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
@@ -0,0 +1,168 @@
+import os
+import mmap
+import hashlib
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from instrumentation import span
+
+logger = logging.getLogger(__name__)
+
+# Bytes read from each end of a file for the cheap second-stage hash
+EDGE_BLOCK_SIZE = 64 * 1024
+READ_SIZE = 1024 * 1024
+
+
+def hash_file(file_path):
+    h = hashlib.blake2b(digest_size=20)
+    with open(file_path, "rb") as f:
+        try:
+            # One update over the whole mapping lets hashlib drop the GIL for the full file
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                h.update(mm)
+        except (ValueError, OSError):
+            # Empty files and some special filesystems can't be mapped
+            f.seek(0)
+            for chunk in iter(lambda: f.read(READ_SIZE), b""):
+                h.update(chunk)
+    return h.hexdigest()
+
+
+def hash_edges(file_path, size):
+    h = hashlib.blake2b(digest_size=16)
+    with open(file_path, "rb") as f:
+        h.update(f.read(EDGE_BLOCK_SIZE))
+        if size > 2 * EDGE_BLOCK_SIZE:
+            f.seek(-EDGE_BLOCK_SIZE, os.SEEK_END)
+            h.update(f.read(EDGE_BLOCK_SIZE))
+        elif size > EDGE_BLOCK_SIZE:
+            h.update(f.read())
+    return h.hexdigest()
+
+
+class DuplicateFinder:
+    # hash_cache, an ExtractionCache, supplies full-file hashes already computed for
+    # files that haven't changed and records the new ones. Setting cancel stops the
+    # search, which then finds nothing; progress(message) is told each stage.
+    def __init__(self, max_workers=None, follow_symlinks=False, hash_cache=None, cancel=None, progress=None):
+        self.max_workers = max_workers or min(32, (os.cpu_count() or 1) * 4)
+        self.follow_symlinks = follow_symlinks
+        self.hash_cache = hash_cache
+        self.cancel = cancel or threading.Event()
+        self.progress = progress
+        self.lock = threading.Lock()
+        self.files_scanned = 0
+        self.bytes_total = 0
+        self.bytes_read = 0
+
+    # Returns a list of duplicate groups, each a sorted list of paths with identical
+    # content. Files are narrowed by size, then by a hash of their first and last
+    # blocks, and only the survivors are hashed in full.
+    def find(self, directory):
+        self.files_scanned = self.bytes_total = self.bytes_read = 0
+        self._report("Comparing file sizes")
+        with span("dedup.stat_walk") as s:
+            by_size = self._group_by_size(directory)
+            s.add(self.files_scanned)
+        if self.cancel.is_set():
+            return []
+        groups = []
+        if len(by_size.get(0, [])) > 1:
+            groups.append(sorted(by_size.pop(0)))
+        candidates = [(size, path) for size, paths in by_size.items() if size and len(paths) > 1 for path in paths]
+        if candidates:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                self._report(f"Checking {len(candidates)} files of equal size")
+                with span("dedup.edge_hash") as s:
+                    survivors = self._regroup(executor, candidates, self._edge_hash)
+                    s.add(len(candidates), self.bytes_read)
+                full = []
+                for key, paths in survivors.items():
+                    if key[0] <= 2 * EDGE_BLOCK_SIZE:
+                        # The edge hash already covered every byte
+                        groups.append(sorted(paths))
+                    else:
+                        full.extend((key[0], path) for path in paths)
+                self._report(f"Hashing {len(full)} files in full")
+                with span("dedup.full_hash") as s:
+                    edge_bytes = self.bytes_read
+                    groups.extend(sorted(paths) for paths in self._regroup(executor, full, self._full_hash).values())
+                    s.add(len(full), self.bytes_read - edge_bytes)
+        if self.cancel.is_set():
+            return []
+        groups.sort(key=lambda group: group[0])
+        return groups
+
+    def _report(self, message):
+        if self.progress:
+            self.progress(message)
+
+    # Hashes (size, path) pairs across the pool and keeps only groups of two or more
+    def _regroup(self, executor, items, hash_func):
+        by_key = {}
+        for (size, path), digest in zip(items, executor.map(lambda item: hash_func(item[1], item[0]), items)):
+            if digest is not None:
+                by_key.setdefault((size, digest), []).append(path)
+        return {key: paths for key, paths in by_key.items() if len(paths) > 1}
+
+    def _group_by_size(self, directory):
+        by_size = {}
+        seen_inodes = set()
+        stack = [directory]
+        while stack and not self.cancel.is_set():
+            current = stack.pop()
+            try:
+                with os.scandir(current) as entries:
+                    for entry in entries:
+                        try:
+                            if entry.is_dir(follow_symlinks=self.follow_symlinks):
+                                stack.append(entry.path)
+                                continue
+                            if not entry.is_file(follow_symlinks=self.follow_symlinks):
+                                continue
+                            st = entry.stat(follow_symlinks=self.follow_symlinks)
+                        except OSError as e:
+                            logger.error(f"Error reading {entry.path}: {e}")
+                            continue
+                        # Hard links share storage, so they aren't duplicates of each other
+                        inode = (st.st_dev, st.st_ino)
+                        if st.st_ino and inode in seen_inodes:
+                            continue
+                        seen_inodes.add(inode)
+                        by_size.setdefault(st.st_size, []).append(entry.path)
+                        self.files_scanned += 1
+                        self.bytes_total += st.st_size
+            except OSError as e:
+                logger.error(f"Error scanning {current}: {e}")
+        return by_size
+
+    def _edge_hash(self, path, size):
+        if self.cancel.is_set():
+            return None
+        try:
+            digest = hash_edges(path, size)
+        except OSError as e:
+            logger.error(f"Error hashing {path}: {e}")
+            return None
+        with self.lock:
+            self.bytes_read += min(size, 2 * EDGE_BLOCK_SIZE)
+        return digest
+
+    def _full_hash(self, path, size):
+        if self.cancel.is_set():
+            return None
+        try:
+            st = os.stat(path)
+            if self.hash_cache:
+                digest = self.hash_cache.cached_digest(path, st)
+                if digest is not None:
+                    return digest
+            digest = hash_file(path)
+            if self.hash_cache:
+                self.hash_cache.store_digest(path, digest, st)
+        except OSError as e:
+            logger.error(f"Error hashing {path}: {e}")
+            return None
+        with self.lock:
+            self.bytes_read += size
+        return digest
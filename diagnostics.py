@@ -0,0 +1,139 @@
+import tkinter as tk
+from tkinter import ttk, filedialog, messagebox
+from instrumentation import profiler, HISTOGRAM_BUCKETS
+from visualization import format_size
+
+REFRESH_MS = 1000
+HISTOGRAM_WIDTH = 40
+COLUMNS = ("Operation", "Count", "Total", "Mean", "p50", "p95", "Max", "Files", "Read")
+
+
+def format_seconds(seconds):
+    if seconds >= 1:
+        return f"{seconds:.2f} s"
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:.1f} ms"
+    return f"{seconds * 1e6:.0f} µs"
+
+
+# Live view of the profiler: one row per operation, the latency histogram of the
+# selected one, and buttons to switch recording on, clear it or export a trace.
+# Only one window is open at a time; it refreshes itself while anything changes.
+class DiagnosticsWindow:
+    def __init__(self, master):
+        self.window = tk.Toplevel(master)
+        self.window.title("Diagnostics")
+        self.window.geometry("980x560")
+        self.seen_version = None
+        self.after_id = None
+        self.records = {}
+
+        controls = ttk.Frame(self.window)
+        controls.pack(fill=tk.X, padx=10, pady=5)
+        self.enabled_var = tk.BooleanVar(value=profiler.enabled)
+        ttk.Checkbutton(controls, text="Record timings", variable=self.enabled_var, command=self.toggle).pack(side=tk.LEFT)
+        ttk.Button(controls, text="Export Trace...", command=self.export, style="primary.TButton").pack(side=tk.RIGHT, padx=5)
+        ttk.Button(controls, text="Reset", command=self.reset, style="secondary.TButton").pack(side=tk.RIGHT, padx=5)
+        self.summary_label = ttk.Label(controls, text="")
+        self.summary_label.pack(side=tk.LEFT, padx=20)
+
+        table = ttk.Frame(self.window)
+        table.pack(fill=tk.BOTH, expand=True, padx=10)
+        self.tree = ttk.Treeview(table, columns=COLUMNS, show="headings", selectmode="browse", height=14)
+        for column in COLUMNS:
+            self.tree.heading(column, text=column)
+            self.tree.column(column, width=260 if column == "Operation" else 85, anchor=tk.W if column == "Operation" else tk.E)
+        scrollbar = ttk.Scrollbar(table, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.bind("<<TreeviewSelect>>", lambda e: self.show_histogram())
+
+        self.histogram = tk.Text(self.window, height=10, font=("Courier", 10), state=tk.DISABLED)
+        self.histogram.pack(fill=tk.X, padx=10, pady=(5, 10))
+
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+        self.refresh()
+
+    def is_open(self):
+        return self.window is not None
+
+    def lift(self):
+        self.window.deiconify()
+        self.window.lift()
+
+    def close(self):
+        if self.after_id:
+            self.window.after_cancel(self.after_id)
+        self.window.destroy()
+        self.window = None
+
+    def toggle(self):
+        profiler.enabled = self.enabled_var.get()
+        self.update_view()
+
+    def reset(self):
+        profiler.reset()
+        self.update_view()
+
+    def export(self):
+        path = filedialog.asksaveasfilename(
+            parent=self.window, title="Export Trace", defaultextension=".json",
+            initialfile="trace.json", filetypes=[("Trace files", "*.json")]
+        )
+        if not path:
+            return
+        try:
+            count = profiler.export_trace(path)
+        except OSError as e:
+            messagebox.showerror("Error", f"Could not write trace.\n{e}", parent=self.window)
+            return
+        messagebox.showinfo("Export Trace", f"Wrote {count} spans to {path}.\nOpen it in chrome://tracing or ui.perfetto.dev.", parent=self.window)
+
+    def refresh(self):
+        self.after_id = self.window.after(REFRESH_MS, self.refresh)
+        if profiler.version != self.seen_version:
+            self.update_view()
+
+    def update_view(self):
+        self.seen_version = profiler.version
+        selected = self.tree.selection()
+        self.records = {record["name"]: record for record in profiler.stats()}
+        self.tree.delete(*self.tree.get_children())
+        for name, record in self.records.items():
+            self.tree.insert("", "end", iid=name, values=(
+                name,
+                record["count"],
+                format_seconds(record["total_seconds"]),
+                format_seconds(record["mean_seconds"]),
+                format_seconds(record["p50_seconds"]),
+                format_seconds(record["p95_seconds"]),
+                format_seconds(record["max_seconds"]),
+                record["files"] or "",
+                format_size(record["bytes"]) if record["bytes"] else "",
+            ))
+        if selected and self.tree.exists(selected[0]):
+            self.tree.selection_set(selected[0])
+        spans = sum(record["count"] for record in self.records.values())
+        state = "recording" if profiler.enabled else "paused"
+        self.summary_label.config(text=f"{len(self.records)} operations, {spans} spans ({state})")
+        self.show_histogram()
+
+    def show_histogram(self):
+        selected = self.tree.selection()
+        record = self.records.get(selected[0]) if selected else None
+        lines = []
+        if record:
+            counts = [record["histogram_us"].get(str(1 << bucket), 0) for bucket in range(HISTOGRAM_BUCKETS)]
+            used = [bucket for bucket, count in enumerate(counts) if count]
+            peak = max(counts)
+            lines.append(f"{record['name']}: {record['count']} spans, {record['errors']} failed")
+            for bucket in range(used[0], used[-1] + 1):
+                bar = "█" * max(1 if counts[bucket] else 0, round(HISTOGRAM_WIDTH * counts[bucket] / peak))
+                lines.append(f"< {format_seconds((1 << bucket) / 1e6):>9} {bar} {counts[bucket]}")
+        else:
+            lines.append("Select an operation to see its latency histogram.")
+        self.histogram.config(state=tk.NORMAL)
+        self.histogram.delete("1.0", tk.END)
+        self.histogram.insert("1.0", "\n".join(lines))
+        self.histogram.config(state=tk.DISABLED)
@@ -0,0 +1,128 @@
+import os
+import time
+import sqlite3
+import threading
+import logging
+from dedup import hash_file
+from config import EXTRACTION_CACHE_PATH, EXTRACTION_CACHE_MAX_BYTES
+
+logger = logging.getLogger(__name__)
+
+# A cache hit only writes its new last-used time back when the stored one is older
+# than this, so reads rarely cost a write
+LRU_TOUCH_SECONDS = 300
+
+
+# Extracted text keyed by a hash of the file's bytes, so copies of the same scan or
+# attachment are OCRed once no matter where they sit. Paths map to their content
+# hash by size, mtime and inode, which means each file is read for hashing once and
+# the same digest serves tagging, the content index and duplicate detection.
+# Stored text is evicted least recently used first once it passes max_bytes.
+class ExtractionCache:
+    def __init__(self, db_path=EXTRACTION_CACHE_PATH, max_bytes=EXTRACTION_CACHE_MAX_BYTES):
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self.max_bytes = max_bytes
+        self.lock = threading.RLock()
+        # Tagging workers in other processes share the file, so wait out their writes
+        self.conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(
+            "CREATE TABLE IF NOT EXISTS hashes ("
+            "path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, inode INTEGER, digest TEXT NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS texts ("
+            "digest TEXT PRIMARY KEY, text TEXT NOT NULL, complete INTEGER NOT NULL, "
+            "length INTEGER NOT NULL, last_used REAL NOT NULL);"
+            # Covers eviction, which then never reads the text rows themselves
+            "DROP INDEX IF EXISTS idx_texts_last_used;"
+            "CREATE INDEX IF NOT EXISTS idx_texts_lru ON texts(last_used, length, digest);"
+            "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL);"
+            # Running total of stored text, kept up to date by put_text and _evict
+            "INSERT OR IGNORE INTO meta VALUES ('text_bytes', (SELECT COALESCE(SUM(length), 0) FROM texts));"
+        )
+        self.conn.commit()
+
+    # The content hash recorded for path, or None if the file changed since
+    def cached_digest(self, path, st=None):
+        path = os.path.abspath(path)
+        if st is None:
+            st = os.stat(path)
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT size, mtime_ns, inode, digest FROM hashes WHERE path = ?", (path,)
+            ).fetchone()
+        if row and tuple(row[:3]) == (st.st_size, st.st_mtime_ns, st.st_ino):
+            return row[3]
+        return None
+
+    def store_digest(self, path, digest, st=None):
+        path = os.path.abspath(path)
+        if st is None:
+            st = os.stat(path)
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO hashes VALUES (?, ?, ?, ?, ?)",
+                (path, st.st_size, st.st_mtime_ns, st.st_ino, digest),
+            )
+            self.conn.commit()
+
+    def digest(self, path, st=None):
+        if st is None:
+            st = os.stat(path)
+        digest = self.cached_digest(path, st)
+        if digest is None:
+            digest = hash_file(path)
+            self.store_digest(path, digest, st)
+        return digest
+
+    # Cached text for digest. An entry cut short (by max_chars, or by an error part
+    # way through) only counts as a hit for callers that need no more than it has.
+    def get_text(self, digest, max_chars=None):
+        with self.lock:
+            row = self.conn.execute("SELECT text, complete, last_used FROM texts WHERE digest = ?", (digest,)).fetchone()
+            if row is None:
+                return None
+            text, complete, last_used = row
+            if not complete and (not max_chars or len(text) < max_chars):
+                return None
+            now = time.time()
+            if now - last_used > LRU_TOUCH_SECONDS:
+                self.conn.execute("UPDATE texts SET last_used = ? WHERE digest = ?", (now, digest))
+                self.conn.commit()
+        return text
+
+    def put_text(self, digest, text, complete):
+        length = len(text.encode("utf-8"))
+        with self.lock:
+            # The first write takes the database's write lock, so the total stays
+            # right with tagging workers writing from other processes
+            self.conn.execute(
+                "UPDATE meta SET value = value - COALESCE((SELECT length FROM texts WHERE digest = ?), 0) "
+                "WHERE key = 'text_bytes'", (digest,)
+            )
+            self.conn.execute(
+                "INSERT OR REPLACE INTO texts VALUES (?, ?, ?, ?, ?)",
+                (digest, text, int(complete), length, time.time()),
+            )
+            self.conn.execute("UPDATE meta SET value = value + ? WHERE key = 'text_bytes'", (length,))
+            self._evict()
+            self.conn.commit()
+
+    def _evict(self):
+        total = self.conn.execute("SELECT value FROM meta WHERE key = 'text_bytes'").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        freed = 0
+        stale = []
+        for digest, length in self.conn.execute("SELECT digest, length FROM texts ORDER BY last_used"):
+            stale.append((digest,))
+            freed += length
+            if total - freed <= self.max_bytes:
+                break
+        self.conn.executemany("DELETE FROM texts WHERE digest = ?", stale)
+        self.conn.execute("UPDATE meta SET value = value - ? WHERE key = 'text_bytes'", (freed,))
+        logger.info(f"Evicted {len(stale)} cached extractions ({freed} bytes)")
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
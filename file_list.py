@@ -0,0 +1,165 @@
+import tkinter as tk
+from tkinter import ttk
+from operator import attrgetter
+
+# Typed sort keys per column, so sizes and dates compare as numbers rather than
+# as the text shown in the cells. Keys are applied least significant first as
+# separate stable passes, which is much cheaper than building a tuple per row.
+# Folders sort ahead of files by name and size.
+SORT_KEYS = {
+    "Name": (lambda row: row.name.casefold(), attrgetter("is_file")),
+    "Size": (lambda row: row.size if row.is_file else -1,),
+    "Modified": (attrgetter("mtime"),),
+    "Tags": (lambda row: ", ".join(row.tags).casefold(),),
+}
+
+
+def sort_rows(rows, column, reverse=False):
+    for key in SORT_KEYS[column]:
+        rows.sort(key=key, reverse=reverse)
+
+
+# A Treeview that only ever holds one screenful of items. The rows live in a plain
+# list owned by the caller; scrolling rewrites the values of the same few items, so
+# the widget costs the same whether the list has fifty rows or half a million.
+class VirtualFileList:
+    def __init__(self, master, columns, format_row, **options):
+        self.tree = ttk.Treeview(master, columns=columns, show="headings", selectmode="browse", **options)
+        self.scrollbar = ttk.Scrollbar(master, orient="vertical", command=self.yview)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.scrollbar.pack(side="right", fill="y")
+        self.format_row = format_row
+        self.rows = []
+        self.top = 0
+        self.page = 1
+        self.slots = []
+        self.shown = 0
+        self.selected = None
+        self.selected_index = 0
+
+        self.tree.bind("<Configure>", self.on_resize)
+        self.tree.bind("<ButtonPress-1>", self.on_press)
+        self.tree.bind("<MouseWheel>", self.on_wheel)
+        self.tree.bind("<Button-4>", lambda e: self.scroll(-3))
+        self.tree.bind("<Button-5>", lambda e: self.scroll(3))
+        self.tree.bind("<Up>", lambda e: self.move_selection(-1))
+        self.tree.bind("<Down>", lambda e: self.move_selection(1))
+        self.tree.bind("<Prior>", lambda e: self.move_selection(-self.page))
+        self.tree.bind("<Next>", lambda e: self.move_selection(self.page))
+        self.tree.bind("<Home>", lambda e: self.move_selection(-len(self.rows)))
+        self.tree.bind("<End>", lambda e: self.move_selection(len(self.rows)))
+
+    # rows is kept by reference; call set_rows or refresh again after changing it
+    def set_rows(self, rows, keep_position=False):
+        self.rows = rows
+        if not keep_position:
+            self.top = 0
+        self.render()
+
+    def refresh(self):
+        self.render()
+
+    def render(self):
+        count = len(self.rows)
+        self.top = max(0, min(self.top, count - self.page))
+        window = self.rows[self.top:self.top + self.page]
+        needed = len(window)
+        for index in range(self.shown, min(needed, len(self.slots))):
+            self.tree.move(self.slots[index], "", index)
+        while len(self.slots) < needed:
+            self.slots.append(self.tree.insert("", "end", iid=f"slot{len(self.slots)}"))
+        if self.shown > needed:
+            self.tree.detach(*self.slots[needed:self.shown])
+        self.shown = needed
+        for slot, row in zip(self.slots, window):
+            self.tree.item(slot, values=self.format_row(row))
+
+        index = self._selected_position()
+        if index is not None and self.top <= index < self.top + len(window):
+            self.tree.selection_set(self.slots[index - self.top])
+        elif self.tree.selection():
+            self.tree.selection_set(())
+        if count > self.page:
+            self.scrollbar.set(self.top / count, (self.top + len(window)) / count)
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def _selected_position(self):
+        if self.selected is None:
+            return None
+        if self.selected_index < len(self.rows) and self.rows[self.selected_index] is self.selected:
+            return self.selected_index
+        # The list was filtered or re-sorted since the selection was made
+        for index, row in enumerate(self.rows):
+            if row is self.selected:
+                self.selected_index = index
+                return index
+        self.selected = None
+        return None
+
+    def selected_row(self):
+        return self.selected if self._selected_position() is not None else None
+
+    def select(self, row, index=None):
+        self.selected = row
+        if row is not None:
+            self.selected_index = index if index is not None else self.top
+            self._selected_position()
+        self.render()
+
+    def select_at(self, y):
+        slot = self.tree.identify_row(y)
+        if slot:
+            index = self.top + self.slots.index(slot)
+            self.select(self.rows[index], index)
+
+    def on_press(self, event):
+        # Heading clicks and column resizing keep their normal behaviour
+        if self.tree.identify_region(event.x, event.y) not in ("cell", "tree", "nothing"):
+            return None
+        self.tree.focus_set()
+        self.select_at(event.y)
+        return "break"
+
+    def on_resize(self, event):
+        row_height = int(ttk.Style().lookup("Treeview", "rowheight") or 20)
+        header = 0
+        if self.shown:
+            bbox = self.tree.bbox(self.slots[0])
+            if bbox:
+                header, row_height = bbox[1], bbox[3]
+        page = max(1, (event.height - header) // max(1, row_height))
+        if page != self.page:
+            self.page = page
+            self.render()
+
+    def on_wheel(self, event):
+        # Windows reports multiples of 120 per notch, macOS small deltas
+        step = event.delta // 120 if abs(event.delta) >= 120 else event.delta
+        return self.scroll(-3 * step)
+
+    def scroll(self, lines):
+        self.top += lines
+        self.render()
+        return "break"
+
+    # Scrollbar protocol: ("moveto", fraction) or ("scroll", n, "units" | "pages")
+    def yview(self, *args):
+        if args[0] == "moveto":
+            self.top = int(float(args[1]) * len(self.rows))
+        elif args[0] == "scroll":
+            amount = int(args[1])
+            self.top += amount * self.page if args[2] == "pages" else amount
+        self.render()
+
+    def move_selection(self, delta):
+        if not self.rows:
+            return "break"
+        index = self._selected_position()
+        index = self.top if index is None else max(0, min(len(self.rows) - 1, index + delta))
+        if index < self.top:
+            self.top = index
+        elif index >= self.top + self.page:
+            self.top = index - self.page + 1
+        self.select(self.rows[index], index)
+        return "break"
@@ -0,0 +1,217 @@
+import os
+import json
+import time
+import threading
+import functools
+import logging
+from collections import deque
+from config import PROFILING_ENABLED, PROFILE_MAX_EVENTS
+
+logger = logging.getLogger(__name__)
+
+# Latency histogram: bucket 0 holds spans under 1 µs, bucket n those of
+# [2**(n-1), 2**n) µs; the last bucket takes everything from about 18 minutes up.
+# Exported histograms are keyed by each bucket's upper edge in µs.
+HISTOGRAM_BUCKETS = 32
+
+
+class OperationStats:
+    __slots__ = ("name", "count", "errors", "total", "min", "max", "files", "bytes", "buckets")
+
+    def __init__(self, name):
+        self.name = name
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.min = None
+        self.max = 0.0
+        self.files = 0
+        self.bytes = 0
+        self.buckets = [0] * HISTOGRAM_BUCKETS
+
+    def record(self, seconds, files, num_bytes, failed):
+        self.count += 1
+        self.errors += failed
+        self.total += seconds
+        self.min = seconds if self.min is None else min(self.min, seconds)
+        self.max = max(self.max, seconds)
+        self.files += files
+        self.bytes += num_bytes
+        self.buckets[min(HISTOGRAM_BUCKETS - 1, int(seconds * 1e6).bit_length())] += 1
+
+    # Upper edge of the bucket holding the given fraction of spans, in seconds
+    def percentile(self, fraction):
+        target = fraction * self.count
+        seen = 0
+        for bucket, count in enumerate(self.buckets):
+            seen += count
+            if count and seen >= target:
+                return min(self.max, (1 << bucket) / 1e6)
+        return self.max
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "count": self.count,
+            "errors": self.errors,
+            "total_seconds": self.total,
+            "mean_seconds": self.total / self.count if self.count else 0.0,
+            "min_seconds": self.min or 0.0,
+            "max_seconds": self.max,
+            "p50_seconds": self.percentile(0.5),
+            "p95_seconds": self.percentile(0.95),
+            "p99_seconds": self.percentile(0.99),
+            "files": self.files,
+            "bytes": self.bytes,
+            "histogram_us": {str(1 << bucket): count for bucket, count in enumerate(self.buckets) if count},
+        }
+
+
+class Span:
+    __slots__ = ("profiler", "name", "started", "files", "bytes", "args", "finished")
+
+    def __init__(self, profiler, name, args):
+        self.profiler = profiler
+        self.name = name
+        self.args = args
+        self.files = 0
+        self.bytes = 0
+        self.finished = False
+        self.started = time.perf_counter()
+
+    def add(self, files=0, num_bytes=0):
+        self.files += files
+        self.bytes += num_bytes
+
+    # Ends a span that outlives the call that started it, such as a scan or tagging
+    # job finished from a later poll
+    def finish(self, files=0, num_bytes=0, failed=False):
+        if self.finished:
+            return
+        self.finished = True
+        self.add(files, num_bytes)
+        self.profiler._record(self, time.perf_counter(), failed)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.finish(failed=exc_type is not None)
+        return False
+
+    def __bool__(self):
+        return True
+
+
+# Handed out while recording is off, so an instrumented call costs one attribute
+# check. It is falsy, letting callers skip work that only feeds the span.
+class NullSpan:
+    __slots__ = ()
+
+    def add(self, files=0, num_bytes=0):
+        pass
+
+    def finish(self, files=0, num_bytes=0, failed=False):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def __bool__(self):
+        return False
+
+
+NULL_SPAN = NullSpan()
+
+
+# Collects timing spans from any thread: per-operation totals and latency
+# histograms for the Diagnostics window, and the raw spans as a bounded list of
+# trace events that can be exported for chrome://tracing or Perfetto.
+class Profiler:
+    def __init__(self, enabled=False, max_events=PROFILE_MAX_EVENTS):
+        self.enabled = enabled
+        self.lock = threading.Lock()
+        self.operations = {}
+        self.events = deque(maxlen=max_events)
+        self.epoch = time.perf_counter()
+        self.version = 0
+
+    def span(self, name, **args):
+        if not self.enabled:
+            return NULL_SPAN
+        return Span(self, name, args)
+
+    # Decorator form of span for functions timed as a whole
+    def timed(self, name):
+        def decorate(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                with Span(self, name, {}):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def _record(self, span, ended, failed):
+        seconds = ended - span.started
+        event = {
+            "name": span.name,
+            "ph": "X",
+            "ts": round((span.started - self.epoch) * 1e6, 1),
+            "dur": round(seconds * 1e6, 1),
+            "pid": os.getpid(),
+            "tid": threading.get_ident(),
+        }
+        args = dict(span.args)
+        if span.files:
+            args["files"] = span.files
+        if span.bytes:
+            args["bytes"] = span.bytes
+        if failed:
+            args["error"] = True
+        if args:
+            event["args"] = args
+        with self.lock:
+            stats = self.operations.get(span.name)
+            if stats is None:
+                stats = self.operations[span.name] = OperationStats(span.name)
+            stats.record(seconds, span.files, span.bytes, failed)
+            self.events.append(event)
+            self.version += 1
+
+    # Per-operation summaries, slowest in total first
+    def stats(self):
+        with self.lock:
+            records = [stats.to_dict() for stats in self.operations.values()]
+        records.sort(key=lambda record: record["total_seconds"], reverse=True)
+        return records
+
+    def reset(self):
+        with self.lock:
+            self.operations.clear()
+            self.events.clear()
+            self.epoch = time.perf_counter()
+            self.version += 1
+
+    # Chrome trace event format, with the summaries alongside
+    def export_trace(self, path):
+        with self.lock:
+            events = list(self.events)
+        trace = {
+            "traceEvents": events,
+            "displayTimeUnit": "ms",
+            "otherData": {"operations": self.stats()},
+        }
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(trace, f)
+        logger.info(f"Wrote {len(events)} trace events to {path}")
+        return len(events)
+
+
+profiler = Profiler(PROFILING_ENABLED)
+span = profiler.span
+timed = profiler.timed
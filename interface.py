@@ -1,67 +1,96 @@
+import time
+STARTUP_STARTED = time.perf_counter()
+
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, simpledialog
 import os
-import shutil
 import datetime
 import subprocess
 import sys
 import json
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 import ttkbootstrap as ttkb
 from ttkbootstrap.constants import *
 from ai import AIDirectoryManager
 from visualization import VisualizationManager
-import nltk
+from tag_store import TagStore
+from tagging import TaggingEngine, TaggingJob, describe_tag_error
+from scanner import DirectoryScanner, ScanRow
+from content_index import ContentIndex
+from extraction_cache import ExtractionCache
+from watcher import create_watcher
+from file_list import VirtualFileList, sort_rows
+from instrumentation import span, timed
+from diagnostics import DiagnosticsWindow
+from tasks import TaskScheduler, LOW, HIGH
+from task_panel import TaskPanel
+from move_journal import MoveJournal, BatchMover, plan_moves
+from recycle_bin import RecycleBin
+from thumbnails import ThumbnailCache
+from tree_walker import TreeWalker, WalkCancelled
+from config import STARTUP_BUDGET_SECONDS, RECYCLE_BIN_DIR, RECYCLE_BIN_MAX_AGE_DAYS
 import logging
 
 # Configure logging
 logging.basicConfig(level=logging.WARNING)
 
-RECYCLE_BIN = os.path.join(os.path.expanduser("~"), ".recycle_bin")
-if not os.path.exists(RECYCLE_BIN):
-    os.makedirs(RECYCLE_BIN)
-
-def purge_old_files():
-    now = datetime.datetime.now()
-    for item in os.listdir(RECYCLE_BIN):
-        full_path = os.path.join(RECYCLE_BIN, item)
-        modified_time = datetime.datetime.fromtimestamp(os.path.getmtime(full_path))
-        if (now - modified_time).days > 30:
-            if os.path.isdir(full_path):
-                shutil.rmtree(full_path)
-            else:
-                os.remove(full_path)
+SEARCH_DEBOUNCE_MS = 120
+WATCH_POLL_MS = 250
+# More changes than this in one poll are picked up with a fresh listing instead
+WATCH_RESCAN_THRESHOLD = 1000
 
-purge_old_files()
+RECYCLE_BIN = RECYCLE_BIN_DIR
 
 class FileManagerApp:
-    def __init__(self, root):
+    # start_path is the folder listed first (default: the home folder)
+    def __init__(self, root, start_path=None):
         self.style = ttkb.Style()
         self.style.theme_use("flatly")
         self.root = ttkb.Window(themename="flatly")
         self.root.title("\U0001F4C1 AI-Powered Directory Management System")
         self.root.state('zoomed')
 
-        self.current_path = os.path.expanduser("~")
-        self.file_paths = []
-        self.ai_manager = AIDirectoryManager()
-        self.vis_manager = VisualizationManager()
-        self.tags_cache = {}
+        self.current_path = start_path or os.path.expanduser("~")
+        self.listing = []
+        self.visible_rows = []
+        self.row_lookup = {}
+        # Folders whose new files belong in the list: the current folder, or every
+        # folder a chart's file list draws from
+        self.listed_dirs = set()
+        self.sort_state = None
+        self.search_state = {"query": "", "mode": "name", "content": False, "hits": None}
+        self.search_after_id = None
+        self.tasks = TaskScheduler(self.root)
+        self.task_panel = None
+        self.snapshot = None
+        self.snapshot_task = None
+        self.extraction_cache = ExtractionCache()
+        self.ai_manager = AIDirectoryManager(self.extraction_cache)
+        self.thumbnails = ThumbnailCache()
+        self.thumbnail_task = None
+        self.vis_manager = VisualizationManager(self.thumbnails)
+        self.tags_cache = TagStore()
+        self.tagging_engine = TaggingEngine()
+        self.tagging_job = None
+        self.tagging_state = None
+        self.scanner = DirectoryScanner()
+        self.scan_job = None
+        self.scan_span = None
+        self.tagging_span = None
+        self.move_journal = MoveJournal()
+        self.mover = BatchMover(self.move_journal, on_move=self.tags_cache.move)
+        self.recycle_bin = RecycleBin()
+        self.move_job = None
+        self.move_task = None
+        self.move_touched = []
+        self.diagnostics = None
+        self.content_index = ContentIndex()
+        self.index_task = None
+        self.watcher = create_watcher()
         self.undo_stack = []
         self.vis_mode = "pie"
         self.theme_var = tk.StringVar(value="flatly")
         self.content_search_var = tk.BooleanVar(value=False)
 
-        # Try to download NLTK punkt_tab if not available
-        try:
-            nltk.data.find('tokenizers/punkt_tab')
-        except LookupError:
-            try:
-                nltk.download('punkt_tab', quiet=True)
-            except Exception as e:
-                logging.warning(f"Failed to download NLTK punkt_tab: {e}")
-
         self.main_frame = ttk.Frame(self.root)
         self.main_frame.pack(fill=tk.BOTH, expand=True)
 
@@ -88,6 +117,9 @@ class FileManagerApp:
         self.menu_button.pack(side=tk.RIGHT, padx=(0, 10))
         self.context_menu = tk.Menu(self.root, tearoff=0)
         self.context_menu.add_command(label="Open Recycle Bin", command=self.open_recycle_bin)
+        self.context_menu.add_command(label="Undo Last Categorize", command=self.undo_last_categorize)
+        self.context_menu.add_command(label="Tasks", command=self.open_task_panel)
+        self.context_menu.add_command(label="Diagnostics", command=self.open_diagnostics)
 
         self.toggle_frame = ttk.Frame(self.main_frame)
         self.toggle_frame.pack(fill=tk.X, pady=5)
@@ -110,7 +142,8 @@ class FileManagerApp:
         self.content_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
 
         self.tree_frame = ttk.Frame(self.content_frame)
-        self.tree = ttk.Treeview(self.tree_frame, columns=('Name', 'Size', 'Modified', 'Tags'), show='headings', style="Treeview")
+        self.file_list = VirtualFileList(self.tree_frame, ('Name', 'Size', 'Modified', 'Tags'), self.row_values, style="Treeview")
+        self.tree = self.file_list.tree
         self.tree.heading('Name', text='File / Folder', command=lambda: self.sort_by_column('Name', False))
         self.tree.heading('Size', text='Size (KB)', command=lambda: self.sort_by_column('Size', False))
         self.tree.heading('Modified', text='Last Modified', command=lambda: self.sort_by_column('Modified', False))
@@ -119,16 +152,20 @@ class FileManagerApp:
         self.tree.column('Size', width=120, minwidth=80)
         self.tree.column('Modified', width=220, minwidth=150)
         self.tree.column('Tags', width=200, minwidth=100)
-        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         self.tree.bind("<Double-1>", self.on_double_click)
-        scrollbar = ttk.Scrollbar(self.tree_frame, orient="vertical", command=self.tree.yview)
-        self.tree.configure(yscrollcommand=scrollbar.set)
-        scrollbar.pack(side='right', fill='y')
 
         self.vis_frame = ttk.Frame(self.content_frame)
+        self.vis_figure = None
         self.vis_canvas = None
+        self.vis_target = None
         self.vis_buttons_frame = ttk.Frame(self.vis_frame)
-        self.vis_buttons = []
+        for text, mode in [("Pie Chart", "pie"), ("Tree Map", "tree"), ("Timeline", "timeline"),
+                           ("Depth Pie", "depth"), ("Tag Cloud", "cloud"), ("File Age", "age")]:
+            ttk.Button(self.vis_buttons_frame, text=text, command=lambda mode=mode: self.set_vis_mode(mode)).pack(side=tk.LEFT, padx=5)
+        # Timeline, Depth Pie and File Age can total bytes instead of counting files
+        self.vis_by_bytes = tk.BooleanVar(value=False)
+        ttk.Checkbutton(self.vis_buttons_frame, text="By size", variable=self.vis_by_bytes,
+                        command=lambda: self.set_vis_mode(self.vis_mode)).pack(side=tk.LEFT, padx=15)
 
         self.btn_frame = ttk.Frame(self.main_frame)
         buttons = [
@@ -152,14 +189,77 @@ class FileManagerApp:
         self.purge_old_button = None
         self.status_label = ttk.Label(self.main_frame, text="", bootstyle="inverse", anchor=tk.W)
         self.status_label.pack(fill=tk.X, side=tk.BOTTOM)
+        self.progress_bar = ttk.Progressbar(self.main_frame, mode="determinate", bootstyle="success-striped")
 
         self.style.configure("Treeview", rowheight=25)
         self.style.map("Treeview", background=[('selected', '#007bff')])
 
         self.create_context_menu()
         self.bind_shortcuts()
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
         self.show_normal_ui()
         self.list_directory()
+        self.root.after(WATCH_POLL_MS, self.poll_watcher)
+        self.root.after_idle(self.report_startup_time)
+        self.root.after(1000, self.check_interrupted_moves)
+        self.root.after(1500, lambda: self.tasks.submit(
+            "Index Recycle Bin", lambda task: self.recycle_bin.adopt_unindexed(task.cancel_event),
+            key="recycle_bin.adopt", priority=LOW
+        ))
+        # The automatic purge only consults the bin's index, but removing what it
+        # finds can still take a while, so it runs as a background task
+        self.root.after(2000, self.start_expired_purge)
+        self.root.after(5000, lambda: self.tasks.submit(
+            "Prune thumbnail cache", lambda task: self.thumbnails.prune(), key="thumbnails.prune", priority=LOW
+        ))
+
+    def start_expired_purge(self):
+        task = self.tasks.submit("Purge old Recycle Bin items", self.purge_expired, key="recycle_bin.purge", priority=LOW,
+                                 on_done=self.refresh_paths, on_cancel=lambda: self.refresh_paths(task.result or []))
+
+    def purge_expired(self, task):
+        removed = self.recycle_bin.purge_older_than(RECYCLE_BIN_MAX_AGE_DAYS, task.cancel_event)
+        for path in removed:
+            self.tags_cache.discard_tree(path)
+        return removed
+
+    def report_startup_time(self):
+        elapsed = time.perf_counter() - STARTUP_STARTED
+        if elapsed > STARTUP_BUDGET_SECONDS:
+            logging.warning(f"Startup took {elapsed:.2f}s, over the {STARTUP_BUDGET_SECONDS:.1f}s budget")
+        else:
+            logging.info(f"Startup took {elapsed:.2f}s")
+
+    def on_close(self):
+        self.watcher.close()
+        if self.scan_job:
+            self.scan_job.cancel()
+        # Cancels everything queued or running, tagging and moves included. Moves
+        # not made yet stay in the journal and are offered again next start.
+        if self.move_job:
+            self.move_job.resumable = True
+        self.tasks.shutdown()
+        if self.task_panel and self.task_panel.is_open():
+            self.task_panel.close()
+        self.content_index.close()
+        self.tagging_engine.shutdown()
+        self.move_journal.close()
+        self.recycle_bin.close()
+        self.tags_cache.close()
+        self.extraction_cache.close()
+        self.root.destroy()
+
+    def open_task_panel(self):
+        if self.task_panel and self.task_panel.is_open():
+            self.task_panel.lift()
+        else:
+            self.task_panel = TaskPanel(self.root, self.tasks)
+
+    def open_diagnostics(self):
+        if self.diagnostics and self.diagnostics.is_open():
+            self.diagnostics.lift()
+        else:
+            self.diagnostics = DiagnosticsWindow(self.root)
 
     def show_menu(self):
         try:
@@ -204,13 +304,14 @@ class FileManagerApp:
         self.normal_menu.add_command(label="↩️ Undo", command=self.undo_action)
 
         self.recycle_menu = tk.Menu(self.root, tearoff=0)
+        self.recycle_menu.add_command(label="♻️ Restore", command=self.restore_item)
         self.recycle_menu.add_command(label="↩️ Undo", command=self.undo_action)
 
         self.tree.bind("<Button-3>", self.show_context_menu)
 
     def show_context_menu(self, event):
         try:
-            self.tree.selection_set(self.tree.identify_row(event.y))
+            self.file_list.select_at(event.y)
             menu = self.recycle_menu if self.current_path == RECYCLE_BIN else self.normal_menu
             menu.post(event.x_root, event.y_root)
         finally:
@@ -229,9 +330,12 @@ class FileManagerApp:
         action()
 
     def show_normal_ui(self):
+        self.cancel_snapshot()
+        # The figure is kept for next time, but not the chart or the data it holds
         if self.vis_canvas:
-            self.vis_canvas.get_tk_widget().pack_forget()
-            self.vis_canvas = None
+            self.vis_manager.disconnect_all()
+            self.vis_figure.clear()
+        self.vis_target = None
         self.vis_buttons_frame.pack_forget()
         self.vis_frame.pack_forget()
         self.tree_frame.pack(fill=tk.BOTH, expand=True)
@@ -243,6 +347,7 @@ class FileManagerApp:
         self.normal_button.config(state=tk.DISABLED)
         self.visualize_button.config(state=tk.NORMAL)
 
+    @timed("app.show_visualization")
     def show_visualization(self):
         self.tree_frame.pack_forget()
         self.btn_frame.pack_forget()
@@ -253,127 +358,171 @@ class FileManagerApp:
         if not path:
             path = self.current_path
 
-        fig, ax = plt.subplots(figsize=(12, 8))
         if os.path.isdir(path):
-            file_types = self.vis_manager.get_file_type_distribution(path)
-            if not file_types and self.vis_mode not in ["timeline", "depth", "cloud", "age"]:
-                messagebox.showinfo("Visualize", "No files to visualize.")
-                self.show_normal_ui()
-                return
-
-            def set_vis_mode(mode):
-                self.vis_mode = mode
-                ax.clear()
-                if mode == "pie":
-                    counts = [data["count"] for data in file_types.values()]
-                    labels = file_types.keys()
-                    ax.pie(counts, labels=labels, autopct='%1.1f%%', startangle=90, colors=self.vis_manager.colors, textprops={'fontsize': 12})
-                    ax.axis('equal')
-                    ax.set_title("File Type Distribution", fontsize=16)
-                    self.status_label.config(text=f"Pie Chart visualization for: {self.current_path}")
-                elif mode == "tree":
-                    self.vis_manager.plot_tree_map(ax, file_types)
-                    ax.set_aspect('equal')
-                    ax.set_title("File Size Tree Map", fontsize=16)
-                    ax.axis('off')
-                    self.status_label.config(text=f"Tree Map visualization for: {self.current_path}")
-                elif mode == "timeline":
-                    self.vis_manager.plot_timeline(ax, path)
-                    self.status_label.config(text=f"Timeline visualization for: {self.current_path}")
-                elif mode == "depth":
-                    self.vis_manager.plot_depth_pie(ax, path)
-                    self.status_label.config(text=f"Depth Pie visualization for: {self.current_path}")
-                elif mode == "cloud":
-                    self.vis_manager.plot_tag_cloud(ax, path, self.tags_cache)
-                    self.status_label.config(text=f"Tag Cloud visualization for: {self.current_path}")
-                elif mode == "age":
-                    self.vis_manager.plot_file_age_bar(ax, path)
-                    self.status_label.config(text=f"File Age visualization for: {self.current_path}")
-                plt.tight_layout()
-                self.vis_canvas.draw()
-
-            def on_click(tag, files):
-                self.show_normal_ui()
-                self.tree.delete(*self.tree.get_children())
-                self.file_paths = []
-                for file_path in files:
-                    item = os.path.basename(file_path)
-                    size_kb = os.path.getsize(file_path) // 1024
-                    modified = datetime.datetime.fromtimestamp(os.path.getmtime(file_path)).strftime('%Y-%m-%d %H:%M')
-                    icon = self.vis_manager.get_file_icon(file_path)
-                    tags = ", ".join(self.tags_cache.get(file_path, []))
-                    item_id = self.tree.insert("", "end", values=(f"{icon} {item}", size_kb, modified, tags))
-                    self.file_paths.append((item_id, file_path))
-                self.status_label.config(text=f"{len(self.file_paths)} files with tag '{tag}' in: {self.current_path}")
-
-            self.vis_manager.set_click_callback(on_click)
-
-            if self.vis_mode == "pie":
-                counts = [data["count"] for data in file_types.values()]
-                labels = file_types.keys()
-                ax.pie(counts, labels=labels, autopct='%1.1f%%', startangle=90, colors=self.vis_manager.colors, textprops={'fontsize': 12})
-                ax.axis('equal')
-                ax.set_title("File Type Distribution", fontsize=16)
-                self.status_label.config(text=f"Pie Chart visualization for: {self.current_path}")
-            elif self.vis_mode == "tree":
-                self.vis_manager.plot_tree_map(ax, file_types)
-                ax.set_aspect('equal')
-                ax.set_title("File Size Tree Map", fontsize=16)
-                ax.axis('off')
-                self.status_label.config(text=f"Tree Map visualization for: {self.current_path}")
-            elif self.vis_mode == "timeline":
-                self.vis_manager.plot_timeline(ax, path)
-                self.status_label.config(text=f"Timeline visualization for: {self.current_path}")
-            elif self.vis_mode == "depth":
-                self.vis_manager.plot_depth_pie(ax, path)
-                self.status_label.config(text=f"Depth Pie visualization for: {self.current_path}")
-            elif self.vis_mode == "cloud":
-                self.vis_manager.plot_tag_cloud(ax, path, self.tags_cache)
-                self.status_label.config(text=f"Tag Cloud visualization for: {self.current_path}")
-            elif self.vis_mode == "age":
-                self.vis_manager.plot_file_age_bar(ax, path)
-                self.status_label.config(text=f"File Age visualization for: {self.current_path}")
-
-            plt.tight_layout()
-            self.vis_buttons_frame.pack(side=tk.TOP, fill=tk.X)
-            for btn in self.vis_buttons:
-                btn.pack_forget()
-            self.vis_buttons = [
-                ttk.Button(self.vis_buttons_frame, text="Pie Chart", command=lambda: set_vis_mode("pie")),
-                ttk.Button(self.vis_buttons_frame, text="Tree Map", command=lambda: set_vis_mode("tree")),
-                ttk.Button(self.vis_buttons_frame, text="Timeline", command=lambda: set_vis_mode("timeline")),
-                ttk.Button(self.vis_buttons_frame, text="Depth Pie", command=lambda: set_vis_mode("depth")),
-                ttk.Button(self.vis_buttons_frame, text="Tag Cloud", command=lambda: set_vis_mode("cloud")),
-                ttk.Button(self.vis_buttons_frame, text="File Age", command=lambda: set_vis_mode("age")),
-            ]
-            for btn in self.vis_buttons:
-                btn.pack(side=tk.LEFT, padx=5)
-
+            # Every chart reads the same snapshot, so switching views never touches the disk
+            path = os.path.abspath(path)
+            if self.snapshot is None or self.snapshot.root != path:
+                self.start_snapshot(path)
+            else:
+                self.show_tree_charts(self.snapshot)
         else:
             file_info = self.vis_manager.get_file_info(path)
             if not file_info:
                 messagebox.showinfo("Visualize", "No visualization available.")
                 self.show_normal_ui()
                 return
+            self.vis_target = None
+            self.vis_buttons_frame.pack_forget()
+            ax = self.new_vis_axes()
             ax.bar(['Size (KB)'], [file_info['size_kb']], color='skyblue')
             ax.set_title(f"File: {os.path.basename(path)}", fontsize=16)
             ax.tick_params(axis='both', labelsize=12)
             if file_info["thumbnail"]:
                 img = file_info["thumbnail"]
-                ax_image = fig.add_axes([0.1, 0.6, 0.2, 0.2])
+                ax_image = self.vis_figure.add_axes([0.1, 0.6, 0.2, 0.2])
                 ax_image.imshow(img)
                 ax_image.axis('off')
             ax.text(0, file_info['size_kb'], f"Type: {file_info['type']}\nModified: {file_info['modified']}\nIcon: {file_info['icon']}",
                     ha='center', va='bottom', fontsize=12)
             self.status_label.config(text=f"File visualization for: {os.path.basename(path)}")
-            plt.tight_layout()
+            self.draw_vis()
 
-        self.vis_canvas = FigureCanvasTkAgg(fig, master=self.vis_frame)
-        self.vis_canvas.draw()
-        self.vis_canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
         self.normal_button.config(state=tk.NORMAL)
         self.visualize_button.config(state=tk.DISABLED)
 
+    # The pane has one figure and canvas for the whole session. They are made the
+    # first time a chart is shown and then redrawn in place, so switching charts
+    # adds no figures or Tk widgets.
+    def get_vis_canvas(self):
+        if self.vis_canvas is None:
+            from matplotlib.figure import Figure
+            from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+            self.vis_figure = Figure(figsize=(12, 8))
+            self.vis_canvas = FigureCanvasTkAgg(self.vis_figure, master=self.vis_frame)
+            self.vis_canvas.get_tk_widget().pack(side=tk.TOP, fill=tk.BOTH, expand=True)
+        return self.vis_canvas
+
+    # Empties the figure, and the handlers the last chart connected, for a new chart
+    def new_vis_axes(self):
+        self.get_vis_canvas()
+        self.vis_manager.disconnect_all()
+        self.vis_figure.clear()
+        return self.vis_figure.add_subplot()
+
+    def draw_vis(self):
+        self.vis_figure.tight_layout()
+        with span("visualize.render", mode=self.vis_mode):
+            self.vis_canvas.draw()
+
+    def set_vis_mode(self, mode):
+        if self.vis_target is None:
+            return
+        snapshot, file_types = self.vis_target
+        self.vis_mode = mode
+        ax = self.new_vis_axes()
+        if mode == "pie":
+            counts = [data["count"] for data in file_types.values()]
+            labels = file_types.keys()
+            ax.pie(counts, labels=labels, autopct='%1.1f%%', startangle=90, colors=self.vis_manager.colors, textprops={'fontsize': 12})
+            ax.axis('equal')
+            ax.set_title("File Type Distribution", fontsize=16)
+            self.status_label.config(text=f"Pie Chart visualization for: {self.current_path}")
+        elif mode == "tree":
+            self.vis_manager.plot_tree_map(ax, snapshot)
+            self.status_label.config(text=f"Tree Map visualization for: {self.current_path}")
+        elif mode == "timeline":
+            self.vis_manager.plot_timeline(ax, snapshot, self.vis_by_bytes.get())
+            self.status_label.config(text=f"Timeline visualization for: {self.current_path}")
+        elif mode == "depth":
+            self.vis_manager.plot_depth_pie(ax, snapshot, self.vis_by_bytes.get())
+            self.status_label.config(text=f"Depth Pie visualization for: {self.current_path}")
+        elif mode == "cloud":
+            self.vis_manager.plot_tag_cloud(ax, snapshot, self.tags_cache)
+            self.status_label.config(text=f"Tag Cloud visualization for: {self.current_path}")
+        elif mode == "age":
+            self.vis_manager.plot_file_age_bar(ax, snapshot, self.vis_by_bytes.get())
+            self.status_label.config(text=f"File Age visualization for: {self.current_path}")
+        self.draw_vis()
+
+    # Clicking a tag in the cloud or an extension in the tree map lists its files
+    def show_files_for(self, tag, files):
+        self.show_normal_ui()
+        if self.scan_job:
+            self.scan_job.cancel()
+            self.scan_job = None
+        self.clear_rows()
+        self.search_state = self.current_search()
+        rows = []
+        for file_path in files:
+            # The snapshot may be older than the folder; files gone since are left out
+            try:
+                st = os.stat(file_path)
+            except OSError:
+                continue
+            self.listed_dirs.add(os.path.dirname(os.path.abspath(file_path)))
+            row = ScanRow(os.path.basename(file_path), file_path, True, st.st_size, st.st_mtime, st)
+            row.tags = self.tags_cache.get(file_path, [], st=st)
+            self.index_row(row)
+            rows.append(row)
+        self.add_rows(rows)
+        self.status_label.config(text=f"{len(self.visible_rows)} files with tag '{tag}' in: {self.current_path}")
+
+    def show_tree_charts(self, snapshot):
+        file_types = self.vis_manager.get_file_type_distribution(snapshot)
+        if not file_types and self.vis_mode not in ["tree", "timeline", "depth", "cloud", "age"]:
+            messagebox.showinfo("Visualize", "No files to visualize.")
+            self.show_normal_ui()
+            return
+        self.vis_target = (snapshot, file_types)
+        self.vis_manager.set_click_callback(self.show_files_for)
+        self.vis_buttons_frame.pack(side=tk.TOP, fill=tk.X, before=self.get_vis_canvas().get_tk_widget())
+        self.set_vis_mode(self.vis_mode)
+
+    # The tree is read by a background task while the pane shows how far along it
+    # is; going back to the list or to another folder cancels the walk
+    def start_snapshot(self, path):
+        self.cancel_snapshot()
+        self.vis_target = None
+        self.vis_buttons_frame.pack_forget()
+        ax = self.new_vis_axes()
+        ax.axis('off')
+        label = ax.text(0.5, 0.5, f"Reading {path}...", ha="center", va="center", fontsize=14)
+        self.vis_canvas.draw()
+
+        def run(task):
+            walker = TreeWalker(cancel=task.cancel_event, progress=lambda dirs, files: task.report(files, message=f"{dirs} folders"))
+            try:
+                return self.vis_manager.build_snapshot(path, walker)
+            except WalkCancelled:
+                return None
+
+        def progress(task):
+            if task is self.snapshot_task:
+                label.set_text(f"Reading {path}...\n{task.message}, {task.done} files")
+                self.vis_canvas.draw_idle()
+
+        def done(snapshot):
+            if task is not self.snapshot_task or snapshot is None:
+                return
+            self.snapshot_task = None
+            self.snapshot = snapshot
+            self.show_tree_charts(snapshot)
+
+        def failed(error):
+            if task is self.snapshot_task:
+                self.snapshot_task = None
+                messagebox.showerror("Error", f"Could not read the folder tree.\n{error}")
+                self.show_normal_ui()
+
+        task = self.tasks.submit(f"Read folder tree of {path}", run, key=("snapshot", path), priority=HIGH,
+                                 on_done=done, on_error=failed, on_progress=progress)
+        self.snapshot_task = task
+
+    def cancel_snapshot(self):
+        if self.snapshot_task:
+            self.snapshot_task.cancel()
+            self.snapshot_task = None
+
     def browse_directory(self):
         folder_selected = filedialog.askdirectory(initialdir=self.current_path)
         if folder_selected:
@@ -396,15 +545,21 @@ class FileManagerApp:
             self.show_normal_ui()
             self.list_directory()
 
-    def list_directory(self, filter_text="", search_mode="name"):
+    def list_directory(self):
         path = self.path_entry.get()
         if not os.path.exists(path):
             messagebox.showerror("Error", "Invalid directory path.")
             return
 
+        # Navigating or refreshing makes any scan still in flight obsolete
+        if self.scan_job:
+            self.scan_job.cancel()
+
         self.current_path = path
-        self.tree.delete(*self.tree.get_children())
-        self.file_paths = []
+        self.cancel_snapshot()
+        self.snapshot = None
+        self.clear_rows()
+        self.watcher.watch(path)
 
         if self.empty_bin_button:
             self.empty_bin_button.destroy()
@@ -413,66 +568,252 @@ class FileManagerApp:
             self.purge_old_button.destroy()
             self.purge_old_button = None
 
-        filter_text = filter_text.lower()
-        content_search = self.content_search_var.get()
-        matched_files = 0
-        for item in os.listdir(path):
-            full_path = os.path.join(path, item)
-            matches = False
-            if search_mode == "name":
-                name_words = os.path.splitext(item)[0].lower().split()
-                if not filter_text or any(filter_text in word for word in name_words):
-                    matches = True
-            elif search_mode == "tags":
-                if os.path.isfile(full_path):
-                    tags = self.tags_cache.get(full_path, [])
-                    if not filter_text or any(filter_text in tag.lower() for tag in tags):
-                        matches = True
-            if content_search and os.path.isfile(full_path) and filter_text:
-                try:
-                    text = self.ai_manager.extract_text(full_path)
-                    print(f"DEBUG: Content of {item}: {text[:100]}")  # Debug
-                    if text and filter_text in text.lower():
-                        matches = True
-                except Exception as e:
-                    print(f"ERROR: Failed to read {item}: {e}")
-                    continue
-            if matches:
-                size_kb = os.path.getsize(full_path) // 1024 if os.path.isfile(full_path) else "-"
-                modified = datetime.datetime.fromtimestamp(os.path.getmtime(full_path)).strftime('%Y-%m-%d %H:%M')
-                icon = self.vis_manager.get_file_icon(full_path)
-                tags = ", ".join(self.tags_cache.get(full_path, [])) if os.path.isfile(full_path) else ""
-                item_id = self.tree.insert("", "end", values=(f"{icon} {item}", size_kb, modified, tags))
-                self.file_paths.append((item_id, full_path))
-                matched_files += 1
-                if content_search and matched_files >= 100:
-                    break
+        if self.content_search_var.get():
+            self.ensure_content_index(path)
+        self.search_state = self.current_search()
+
+        # Tags and lower-cased search keys are worked out on the scanner thread
+        def annotate(row):
+            row.tags = self.tags_cache.get(row.path, [], st=row.stat) if row.is_file else []
+            self.index_row(row)
+            return True
+
+        self.status_label.config(text=f"Scanning {self.current_path}...")
+        # From the click to the whole folder on screen, as the user waits for it
+        self.scan_span = span("app.list_directory")
+        self.scan_job = self.scanner.start(path, row_filter=annotate)
+        self.root.after(0, self.poll_scan, self.scan_job)
+
+    # Refreshes the content index for directory in the background; only files that
+    # changed since they were last indexed get their text extracted again
+    def ensure_content_index(self, directory):
+        directory = os.path.abspath(directory)
+        key = ("content_index", directory)
+        if self.index_task and not self.index_task.finished:
+            if self.index_task.key == key:
+                return
+            self.index_task.cancel()
+
+        def run(task):
+            with span("app.update_content_index") as s:
+                updated = self.content_index.update_directory(
+                    directory, self.ai_manager.extract_text, task.cancel_event, lambda done, total: task.report(done, total)
+                )
+                s.add(task.total)
+            return updated
+
+        def progress(task):
+            if task.total and not self.scan_job and not task.cancelled:
+                self.status_label.config(text=f"Indexing file contents... {task.done}/{task.total}")
+
+        def done(updated):
+            # Newly indexed files may match the query that is already on screen
+            if updated and self.content_search_var.get() and os.path.abspath(self.current_path) == directory:
+                self.apply_search(refresh=True)
+
+        self.index_task = self.tasks.submit(f"Index contents of {directory}", run, key=key, priority=LOW,
+                                            on_done=done, on_progress=progress)
+
+    def poll_scan(self, job):
+        if job is not self.scan_job or job.cancelled:
+            return
+        rows = job.drain()
+        if rows:
+            self.add_rows(rows)
+        if not job.finished:
+            self.status_label.config(text=f"Scanning {self.current_path}... {len(self.listing)} items")
+            self.root.after(30, self.poll_scan, job)
+            return
 
+        self.scan_job = None
+        # A column sort stays in effect across listings; it is applied once the
+        # whole folder is in rather than to every batch
+        self.apply_sort()
+        self.scan_span.finish(len(self.listing), failed=job.error is not None)
+        if job.error:
+            messagebox.showerror("Error", f"Could not list directory.\n{job.error}")
         if self.current_path == RECYCLE_BIN:
             self.empty_bin_button = ttk.Button(self.main_frame, text="Empty Recycle Bin", command=self.empty_recycle_bin, style="danger.TButton")
             self.empty_bin_button.pack(side=tk.TOP, pady=(0, 5), fill=tk.X, padx=10)
             self.purge_old_button = ttk.Button(self.main_frame, text="Purge Old Files", command=self.purge_old_files_manual, style="warning.TButton")
             self.purge_old_button.pack(side=tk.TOP, pady=(0, 5), fill=tk.X, padx=10)
-            self.status_label.config(text=f"{len(self.file_paths)} items in Recycle Bin. Restore files to edit.")
         else:
-            self.status_label.config(text=f"{len(self.file_paths)} items found in: {self.current_path}")
+            self.prefetch_thumbnails()
+        self.update_list_status()
+
+    # Image previews for the folder just listed are made in the background, so
+    # visualizing one of its images finds the thumbnail ready on disk
+    def prefetch_thumbnails(self):
+        if self.thumbnail_task:
+            self.thumbnail_task.cancel()
+            self.thumbnail_task = None
+        entries = [(row.path, row.stat) for row in self.listing if row.is_file]
+        if not entries:
+            return
+        self.thumbnail_task = self.tasks.submit(
+            f"Thumbnails for {self.current_path}", lambda task: self.thumbnails.prefetch(entries, task.cancel_event), priority=LOW
+        )
 
+    def update_list_status(self):
+        if self.current_path == RECYCLE_BIN:
+            self.status_label.config(text=f"{len(self.visible_rows)} items in Recycle Bin. Restore files to edit.")
+        elif self.search_state["query"]:
+            self.status_label.config(text=f"{len(self.visible_rows)} of {len(self.listing)} items match in: {self.current_path}")
+        else:
+            self.status_label.config(text=f"{len(self.visible_rows)} items found in: {self.current_path}")
+
+    @staticmethod
+    def index_row(row):
+        row.name_words = os.path.splitext(row.name)[0].lower().split()
+        row.tag_words = [tag.lower() for tag in row.tags]
+
+    def clear_rows(self):
+        self.listing = []
+        self.visible_rows = []
+        self.row_lookup = {}
+        self.listed_dirs = {os.path.abspath(self.current_path)}
+        self.file_list.set_rows(self.visible_rows)
+
+    # Adds freshly listed rows to the model; only the ones the current search lets
+    # through are visible
+    def add_rows(self, rows):
+        state = self.search_state
+        for row in rows:
+            self.row_lookup[os.path.abspath(row.path)] = row
+        self.listing.extend(rows)
+        self.visible_rows.extend(row for row in rows if self.row_matches(row, state))
+        self.file_list.set_rows(self.visible_rows, keep_position=True)
+
+    def row_values(self, row):
+        size_kb = row.size // 1024 if row.is_file else "-"
+        modified = datetime.datetime.fromtimestamp(row.mtime).strftime('%Y-%m-%d %H:%M')
+        icon = self.vis_manager.get_file_icon(row.path, is_dir=not row.is_file)
+        name = row.name
+        # Items in the bin are stored under "<id>_<name>"; show the name they had
+        if self.current_path == RECYCLE_BIN:
+            entry = self.recycle_bin.entry_for(row.path)
+            if entry:
+                name = entry.name
+        return (f"{icon} {name}", size_kb, modified, ", ".join(row.tags))
+
+    def poll_watcher(self):
+        # Changes that arrive while a listing is still streaming in wait for it to
+        # finish; replaying them afterwards is harmless since every update re-stats
+        if not self.scan_job:
+            events = self.watcher.drain(WATCH_RESCAN_THRESHOLD + 1)
+            if len(events) > WATCH_RESCAN_THRESHOLD:
+                self.watcher.drain()
+                self.rescan_current()
+            elif events:
+                self.apply_fs_events(events)
+        self.root.after(WATCH_POLL_MS, self.poll_watcher)
+
+    # Keeps the tag store, content index and listing in step with changes on disk,
+    # whether they were made here or by another program
+    @timed("app.apply_fs_events")
+    def apply_fs_events(self, events):
+        changed = []
+        for event in events:
+            if event.kind == "rescan":
+                self.rescan_current()
+                return
+            if event.kind == "moved":
+                self.tags_cache.move(event.src_path, event.path)
+                self.content_index.remove(event.src_path)
+                changed.append(event.src_path)
+            elif event.kind == "deleted":
+                self.tags_cache.discard_tree(event.path)
+                self.content_index.remove(event.path)
+            changed.append(event.path)
+        self.refresh_paths(changed)
+        if self.content_search_var.get() and any(event.kind != "deleted" for event in events):
+            self.ensure_content_index(self.current_path)
+
+    # The watcher lost track of the folder (it was removed, or too much changed at
+    # once), so list it again, or its nearest surviving parent
+    def rescan_current(self):
+        path = self.current_path
+        while not os.path.isdir(path) and os.path.dirname(path) != path:
+            path = os.path.dirname(path)
+        if path != self.current_path:
+            self.current_path = path
+            self.path_entry.delete(0, tk.END)
+            self.path_entry.insert(0, self.current_path)
+            self.undo_stack.clear()
+            self.update_undo_button()
+        self.list_directory()
+
+    # Re-reads only the given entries of the current folder: their rows are updated
+    # in place, added or removed, and the rest of the listing is left untouched
+    @timed("app.refresh_paths")
+    def refresh_paths(self, paths):
+        if not paths:
+            return
+        # Rows still streaming in could duplicate or undo the update, so start over
+        if self.scan_job:
+            self.list_directory()
+            return
+        state = self.search_state
+        visible = set(self.visible_rows)
+        removed = set()
+        touched = False
+        for path in {os.path.abspath(p) for p in paths}:
+            row = self.row_lookup.get(path)
+            if row is None and os.path.dirname(path) not in self.listed_dirs:
+                continue
+            fresh = DirectoryScanner.row_for_path(path)
+            if fresh is None:
+                if row:
+                    removed.add(row)
+                    visible.discard(row)
+                    del self.row_lookup[path]
+                    touched = True
+                continue
+            fresh.tags = self.tags_cache.get(path, [], st=fresh.stat) if fresh.is_file else []
+            self.index_row(fresh)
+            touched = True
+            if row is None:
+                self.row_lookup[path] = fresh
+                self.listing.append(fresh)
+                row = fresh
+            else:
+                for attr in ("is_file", "size", "mtime", "stat", "tags", "name_words", "tag_words"):
+                    setattr(row, attr, getattr(fresh, attr))
+            if self.row_matches(row, state):
+                visible.add(row)
+            else:
+                visible.discard(row)
+        if not touched:
+            return
+        if removed:
+            self.listing = [row for row in self.listing if row not in removed]
+        self.visible_rows = [row for row in self.listing if row in visible]
+        self.file_list.set_rows(self.visible_rows, keep_position=True)
+        self.snapshot = None
+        if not self.scan_job:
+            self.update_list_status()
+
+    # Sorts the model with a typed key per column; the list widget only redraws the
+    # rows on screen
     def sort_by_column(self, col, reverse):
-        data = [(self.tree.set(k, col), k) for k in self.tree.get_children("")]
-        data.sort(reverse=reverse)
-        for index, (val, k) in enumerate(data):
-            self.tree.move(k, "", index)
+        self.sort_state = (col, reverse)
+        self.apply_sort()
         self.tree.heading(col, command=lambda: self.sort_by_column(col, not reverse))
 
+    @timed("app.sort")
+    def apply_sort(self):
+        if not self.sort_state:
+            return
+        col, reverse = self.sort_state
+        sort_rows(self.listing, col, reverse)
+        sort_rows(self.visible_rows, col, reverse)
+        self.file_list.set_rows(self.visible_rows)
+
     def get_selected_path(self):
-        selected = self.tree.selection()
-        if not selected:
+        row = self.file_list.selected_row()
+        if row is None:
             return None, None
-        item_id = selected[0]
-        for tree_id, path in self.file_paths:
-            if tree_id == item_id:
-                return tree_id, path
-        return None, None
+        return row, row.path
 
     def update_undo_button(self):
         if self.undo_stack:
@@ -485,43 +826,42 @@ class FileManagerApp:
             return
 
         action = self.undo_stack.pop()
+        touched = []
         try:
             if action["type"] == "delete":
                 src = action["recycle_path"]
-                dst = action["original_path"]
-                shutil.move(src, dst)
-                if "tags" in action and action["tags"]:
-                    self.tags_cache[dst] = action["tags"]
+                dst = self.recycle_bin.restore(src, action["original_path"])
+                self.tags_cache.move(src, dst)
+                touched.append(dst)
                 messagebox.showinfo("Undo", f"Restored '{os.path.basename(dst)}'")
             elif action["type"] == "rename":
                 src = action["new_path"]
                 dst = action["old_path"]
                 os.rename(src, dst)
-                if src in self.tags_cache:
-                    self.tags_cache[dst] = self.tags_cache.pop(src)
+                self.tags_cache.move(src, dst)
+                touched += [src, dst]
                 messagebox.showinfo("Undo", f"Reverted to '{os.path.basename(dst)}'")
             elif action["type"] == "categorize":
-                for move in action["moves"]:
-                    src = move["dst"]
-                    dst = move["src"]
-                    shutil.move(src, dst)
-                    if src in self.tags_cache:
-                        self.tags_cache[dst] = self.tags_cache.pop(src)
-                messagebox.showinfo("Undo", f"Reverted categorization of {len(action['moves'])} files")
+                # Runs in the background; the result is reported when it finishes
+                if not self.start_move_job(action["batch"], undo=True):
+                    self.undo_stack.append(action)
             elif action["type"] == "tag":
+                restored = {}
                 for file_info in action["files"]:
                     path = file_info["path"]
                     old_tags = file_info["old_tags"]
+                    touched.append(path)
                     if old_tags:
-                        self.tags_cache[path] = old_tags
+                        restored[path] = old_tags
                     else:
                         self.tags_cache.pop(path, None)
+                self.tags_cache.update(restored)
                 messagebox.showinfo("Undo", f"Reverted tags for {len(action['files'])} files")
         except Exception as e:
             messagebox.showerror("Error", f"Could not undo: {e}")
             self.undo_stack.append(action)
         self.update_undo_button()
-        self.list_directory()
+        self.refresh_paths(touched)
 
     def rename_item(self):
         _, path = self.get_selected_path()
@@ -536,17 +876,17 @@ class FileManagerApp:
             new_name = new_base_name + ext if ext and os.path.isfile(path) else new_base_name
             new_path = os.path.join(os.path.dirname(path), new_name)
             try:
-                os.rename(path, new_path)
+                with span("app.rename"):
+                    os.rename(path, new_path)
                 self.undo_stack.append({
                     "type": "rename",
                     "old_path": path,
                     "new_path": new_path
                 })
-                if path in self.tags_cache:
-                    self.tags_cache[new_path] = self.tags_cache.pop(path)
+                self.tags_cache.move(path, new_path)
                 messagebox.showinfo("Success", f"Renamed to {new_name}")
                 self.update_undo_button()
-                self.list_directory()
+                self.refresh_paths([path, new_path])
             except Exception as e:
                 messagebox.showerror("Error", str(e))
 
@@ -557,22 +897,42 @@ class FileManagerApp:
             return
 
         confirm = messagebox.askyesno("Confirm Delete", f"Move '{os.path.basename(path)}' to Recycle Bin?")
-        if confirm:
-            try:
-                recycle_path = os.path.join(RECYCLE_BIN, os.path.basename(path))
-                shutil.move(path, recycle_path)
-                tags = self.tags_cache.pop(path, None)
-                self.undo_stack.append({
-                    "type": "delete",
-                    "original_path": path,
-                    "recycle_path": recycle_path,
-                    "tags": tags
-                })
-                messagebox.showinfo("Deleted", "Item moved to Recycle Bin.")
-                self.update_undo_button()
-                self.list_directory()
-            except Exception as e:
-                messagebox.showerror("Error", str(e))
+        if not confirm:
+            return
+
+        # Sizing the item for the bin's quota walks a whole folder, and the quota
+        # may evict older items, so the delete runs as a task
+        def run(task):
+            with span("app.delete"):
+                return self.recycle_bin.delete(path)
+
+        def done(result):
+            recycle_path, evicted = result
+            self.tags_cache.move(path, recycle_path)
+            for evicted_path in evicted:
+                self.tags_cache.discard_tree(evicted_path)
+            self.undo_stack.append({
+                "type": "delete",
+                "original_path": path,
+                "recycle_path": recycle_path
+            })
+            self.update_undo_button()
+            # The bin's own listing picks up the new item and loses the evicted ones
+            self.refresh_paths([path, recycle_path, *evicted])
+            messagebox.showinfo("Deleted", "Item moved to Recycle Bin.")
+
+        def failed(error):
+            messagebox.showerror("Error", str(error))
+            self.update_list_status()
+
+        def cancelled():
+            # The delete runs to the end even if cancelled; account for it all the same
+            if task.result:
+                done(task.result)
+
+        self.status_label.config(text=f"Moving {os.path.basename(path)} to Recycle Bin...")
+        task = self.tasks.submit(f"Delete {path}", run, key=("delete", path), priority=HIGH,
+                                 on_done=done, on_error=failed, on_cancel=cancelled)
 
     def on_double_click(self, event):
         _, path = self.get_selected_path()
@@ -606,7 +966,7 @@ class FileManagerApp:
             try:
                 with open(path, 'w') as f:
                     f.write("")
-                self.list_directory()
+                self.refresh_paths([path])
             except Exception as e:
                 messagebox.showerror("Error", str(e))
 
@@ -616,19 +976,59 @@ class FileManagerApp:
             path = os.path.join(self.current_path, name)
             try:
                 os.makedirs(path)
-                self.list_directory()
+                self.refresh_paths([path])
             except Exception as e:
                 messagebox.showerror("Error", str(e))
 
+    # Bound to every key release, so the actual filtering waits for a short pause in typing
     def search_items(self, event=None):
-        query = self.search_entry.get().strip()
-        mode = self.search_mode_var.get()
-        self.list_directory(filter_text=query, search_mode=mode)
+        if self.search_after_id:
+            self.root.after_cancel(self.search_after_id)
+        self.search_after_id = self.root.after(SEARCH_DEBOUNCE_MS, self.apply_search)
+
+    def current_search(self):
+        query = self.search_entry.get().strip().lower()
+        content = self.content_search_var.get()
+        hits = None
+        if content and query:
+            hits = self.content_index.search(self.current_path, query)
+        return {"query": query, "mode": self.search_mode_var.get(), "content": content, "hits": hits}
+
+    @staticmethod
+    def row_matches(row, state):
+        query = state["query"]
+        if state["mode"] == "name":
+            if not query or any(query in word for word in row.name_words):
+                return True
+        elif state["mode"] == "tags":
+            if row.is_file and (not query or any(query in tag for tag in row.tag_words)):
+                return True
+        return bool(state["hits"]) and os.path.abspath(row.path) in state["hits"]
+
+    @timed("app.apply_search")
+    def apply_search(self, refresh=False):
+        self.search_after_id = None
+        if self.content_search_var.get():
+            self.ensure_content_index(self.current_path)
+        previous = self.search_state
+        state = self.current_search()
+        # A longer query in the same mode can only match a subset of what the
+        # shorter one did, so only the rows already on screen need checking
+        narrowing = (
+            not refresh and previous["query"] and state["query"].startswith(previous["query"])
+            and state["mode"] == previous["mode"] and state["content"] == previous["content"]
+        )
+        rows = self.visible_rows if narrowing else self.listing
+        self.search_state = state
+        self.visible_rows = [row for row in rows if self.row_matches(row, state)]
+        self.file_list.set_rows(self.visible_rows)
+        if not self.scan_job:
+            self.update_list_status()
 
     def clear_search(self):
         self.search_entry.delete(0, tk.END)
         self.content_search_var.set(False)
-        self.list_directory()
+        self.apply_search()
 
     def open_recycle_bin(self):
         self.path_entry.delete(0, tk.END)
@@ -639,120 +1039,300 @@ class FileManagerApp:
         self.show_normal_ui()
         self.list_directory()
 
+    def restore_item(self):
+        _, path = self.get_selected_path()
+        if not path:
+            messagebox.showwarning("Warning", "Select an item to restore.")
+            return
+        try:
+            restored = self.recycle_bin.restore(path)
+        except Exception as e:
+            messagebox.showerror("Error", str(e))
+            self.refresh_paths([path])
+            return
+        self.tags_cache.move(path, restored)
+        messagebox.showinfo("Restore", f"Restored to '{restored}'")
+        self.refresh_paths([path])
+
     def empty_recycle_bin(self):
         confirm = messagebox.askyesno("Empty Recycle Bin", "Are you sure you want to permanently delete all items in the Recycle Bin?")
-        if confirm:
-            for item in os.listdir(RECYCLE_BIN):
-                full_path = os.path.join(RECYCLE_BIN, item)
-                try:
-                    if os.path.isdir(full_path):
-                        shutil.rmtree(full_path)
-                    else:
-                        os.remove(full_path)
-                except Exception as e:
-                    messagebox.showerror("Error", f"Could not delete: {item}\n{e}")
-            self.list_directory()
+        if not confirm:
+            return
+        remaining = len(self.recycle_bin.entries)
+
+        def run(task):
+            removed = self.recycle_bin.empty(task.cancel_event)
+            for path in removed:
+                self.tags_cache.discard_tree(path)
+            return removed
+
+        def done(removed):
+            if len(removed) < remaining:
+                messagebox.showerror("Error", f"Could not delete {remaining - len(removed)} items; see the log for details.")
+            self.refresh_paths(removed)
+
+        self.status_label.config(text="Emptying Recycle Bin...")
+        # Items removed before a cancel are gone all the same
+        task = self.tasks.submit("Empty Recycle Bin", run, key="recycle_bin.empty", on_done=done,
+                                 on_cancel=lambda: self.refresh_paths(task.result or []))
 
     def purge_old_files_manual(self):
-        confirm = messagebox.askyesno("Purge Old Files", "Delete files older than 30 days from Recycle Bin?")
-        if confirm:
-            now = datetime.datetime.now()
-            deleted = 0
-            for item in os.listdir(RECYCLE_BIN):
-                full_path = os.path.join(RECYCLE_BIN, item)
-                modified_time = datetime.datetime.fromtimestamp(os.path.getmtime(full_path))
-                if (now - modified_time).days > 30:
-                    try:
-                        if os.path.isdir(full_path):
-                            shutil.rmtree(full_path)
-                        else:
-                            os.remove(full_path)
-                        deleted += 1
-                    except Exception as e:
-                        messagebox.showerror("Error", f"Could not delete: {item}\n{e}")
-            messagebox.showinfo("Purge Complete", f"Deleted {deleted} old items from Recycle Bin.")
-            self.list_directory()
+        confirm = messagebox.askyesno("Purge Old Files", f"Delete files older than {RECYCLE_BIN_MAX_AGE_DAYS} days from Recycle Bin?")
+        if not confirm:
+            return
+
+        def done(removed):
+            messagebox.showinfo("Purge Complete", f"Deleted {len(removed)} old items from Recycle Bin.")
+            self.refresh_paths(removed)
+
+        task = self.tasks.submit("Purge old Recycle Bin items", self.purge_expired, key="recycle_bin.purge", on_done=done,
+                                 on_cancel=lambda: self.refresh_paths(task.result or []))
 
+    # The full plan goes into the move journal before anything is moved, so the
+    # batch can be finished or undone even if the app dies part way through
     def categorize_files(self):
-        structure = self.ai_manager.suggest_folder_structure(self.current_path)
-        if not structure:
+        if self.move_job or self.tagging_job:
+            messagebox.showinfo("Categorize", "Wait for the running task to finish.")
+            return
+        with span("app.categorize") as s:
+            structure = self.ai_manager.suggest_folder_structure(self.current_path)
+            moves, new_dirs = plan_moves(self.current_path, structure)
+            s.add(len(moves))
+            if moves:
+                batch_id = self.move_journal.create_batch("categorize", self.current_path, moves, new_dirs)
+        if not moves:
             messagebox.showinfo("Categorize", "No files to categorize.")
             return
-        moves = []
-        for category, files in structure.items():
-            cat_dir = os.path.join(self.current_path, category)
-            if not os.path.exists(cat_dir):
-                os.makedirs(cat_dir)
-            for file in files:
-                src = os.path.join(self.current_path, file)
-                dst = os.path.join(cat_dir, file)
-                try:
-                    shutil.move(src, dst)
-                    moves.append({"src": src, "dst": dst})
-                    if src in self.tags_cache:
-                        self.tags_cache[dst] = self.tags_cache.pop(src)
-                except Exception as e:
-                    print(f"Error moving {file}: {e}")
-        if moves:
-            self.undo_stack.append({
-                "type": "categorize",
-                "moves": moves
-            })
+        self.start_move_job(batch_id)
+
+    def start_move_job(self, batch_id, undo=False):
+        if self.move_job or self.tagging_job:
+            messagebox.showinfo("Categorize", "Wait for the running task to finish.")
+            return False
+        job, moves = self.mover.prepare(batch_id, undo)
+        self.move_job = job
+        task = self.tasks.submit(
+            f"{'Undo categorize' if undo else 'Categorize'} in {self.current_path}", lambda task: self.mover.run(job, moves),
+            priority=HIGH, cancel_event=job.cancel_event, on_cancel=lambda: self.end_unstarted(task, job)
+        )
+        self.move_task = task
+        self.move_touched = []
+        self.progress_bar.config(maximum=max(1, self.move_job.total), value=0)
+        self.progress_bar.pack(fill=tk.X, side=tk.BOTTOM, padx=10, after=self.status_label)
+        self.root.after(100, self.poll_moves)
+        return True
+
+    def poll_moves(self):
+        job = self.move_job
+        for src, dst, error in job.drain():
+            self.move_touched += [src, dst, os.path.dirname(dst)]
+        self.move_task.report(job.done, job.total)
+        self.progress_bar.config(value=job.done)
+        verb = "Restoring" if job.undo else "Moving"
+        self.status_label.config(text=f"{verb} {job.done}/{job.total} files...")
+        if not job.finished:
+            self.root.after(100, self.poll_moves)
+            return
+        self.move_job = self.move_task = None
+        self.progress_bar.pack_forget()
+        self.refresh_paths(self.move_touched)
+        self.move_touched = []
+        self.finish_moves(job)
+
+    def finish_moves(self, job):
+        batch = self.move_journal.batch(job.batch_id)
+        counts = batch["counts"] if batch else {}
+        if job.cancel_event.is_set():
+            # Stopped from the task panel. The journal records the batch as cancelled:
+            # it is not offered for resume next start, but what was moved can be undone
+            if counts.get("done"):
+                self.undo_stack.append({"type": "categorize", "batch": job.batch_id})
+                self.update_undo_button()
+            return
+        if job.undo:
+            left = counts.get("done", 0)
+            if left:
+                # Still undoable from the journal; put it back on the stack
+                self.undo_stack.append({"type": "categorize", "batch": job.batch_id})
+                messagebox.showwarning("Undo", f"Restored {counts.get('undone', 0)} files; {left} could not be moved back.")
+            else:
+                messagebox.showinfo("Undo", f"Reverted categorization of {counts.get('undone', 0)} files")
+        else:
+            if counts.get("done"):
+                self.undo_stack.append({"type": "categorize", "batch": job.batch_id})
+            message = f"Moved {counts.get('done', 0)} files into category folders."
+            if counts.get("failed"):
+                message += f"\n{counts['failed']} files could not be moved; see the log for details."
+            messagebox.showinfo("Categorize", message)
+        self.update_undo_button()
+
+    # Undo for the newest categorize batch in the journal, which outlives the
+    # in-memory undo stack (navigating away, restarting the app)
+    def undo_last_categorize(self):
+        batch = self.move_journal.latest_undoable()
+        if not batch:
+            messagebox.showinfo("Undo Categorize", "There is no categorization to undo.")
+            return
+        when = datetime.datetime.fromtimestamp(batch["created"]).strftime('%Y-%m-%d %H:%M')
+        if messagebox.askyesno(
+            "Undo Categorize",
+            f"Move {batch['counts'].get('done', 0)} files back out of the category folders in\n{batch['directory']}\n(categorized {when})?"
+        ):
+            self.undo_stack = [a for a in self.undo_stack if a.get("batch") != batch["id"]]
             self.update_undo_button()
-        messagebox.showinfo("Categorize", "Files organized into category folders.")
-        self.list_directory()
+            self.start_move_job(batch["id"], undo=True)
 
+    # Offers to finish, or roll back, a batch the last session didn't get through
+    def check_interrupted_moves(self):
+        batches = self.move_journal.interrupted()
+        if not batches or self.move_job:
+            return
+        batch = batches[0]
+        counts = batch["counts"]
+        if batch["state"] == "undoing":
+            if messagebox.askyesno(
+                "Interrupted Undo",
+                f"Undoing a categorization of {batch['directory']} was interrupted with "
+                f"{counts.get('done', 0)} files still to move back.\n\nFinish the undo now?"
+            ):
+                self.start_move_job(batch["id"], undo=True)
+            return
+        answer = messagebox.askyesnocancel(
+            "Interrupted Categorize",
+            f"Categorizing {batch['directory']} was interrupted after {counts.get('done', 0)} of "
+            f"{batch['total']} moves.\n\nYes: finish moving the rest\nNo: move the finished ones back\n"
+            "Cancel: ask again next time"
+        )
+        if answer is True:
+            self.start_move_job(batch["id"])
+        elif answer is False:
+            # Leftover planned moves are dropped from the batch by undoing it
+            self.start_move_job(batch["id"], undo=True)
+
+    # Runs as a background task; asking again for the same folder while it runs
+    # waits for the same search
     def find_duplicates(self):
-        duplicates = self.ai_manager.find_duplicates(self.current_path)
-        if not duplicates:
-            messagebox.showinfo("Duplicates", "No duplicates found.")
+        directory = self.current_path
+
+        def done(duplicates):
+            if not duplicates:
+                messagebox.showinfo("Duplicates", "No duplicates found.")
+                return
+            dup_text = "\n".join(" <-> ".join(os.path.relpath(path, directory) for path in group) for group in duplicates)
+            extra_copies = sum(len(group) - 1 for group in duplicates)
+            messagebox.showinfo("Duplicates Found", f"Found {len(duplicates)} duplicate groups ({extra_copies} extra copies):\n{dup_text}")
+
+        def failed(error):
+            messagebox.showerror("Error", f"Could not search for duplicates.\n{error}")
+
+        if self.tasks.find(("duplicates", os.path.abspath(directory))):
+            self.open_task_panel()
             return
-        dup_text = "\n".join([f"{os.path.basename(dup[0])} <-> {os.path.basename(dup[1])}" for dup in duplicates])
-        messagebox.showinfo("Duplicates Found", f"Found {len(duplicates)} duplicate pairs:\n{dup_text}")
+        self.tasks.submit(
+            f"Find duplicates in {directory}",
+            lambda task: self.ai_manager.find_duplicates(directory, task.cancel_event, lambda message: task.report(message=message)),
+            key=("duplicates", os.path.abspath(directory)), on_done=done, on_error=failed
+        )
+        self.status_label.config(text=f"Looking for duplicates in {directory}...")
 
     def tag_files(self):
-        tagged_files = []
-        tag_changes = []
-        failed_files = []
-        for _, path in self.file_paths:
-            if os.path.isfile(path):
-                old_tags = self.tags_cache.get(path, [])
-                try:
-                    tags = self.ai_manager.generate_tags(path)
-                    if tags:
-                        self.tags_cache[path] = tags
-                        tagged_files.append(os.path.basename(path))
-                        tag_changes.append({
-                            "path": path,
-                            "old_tags": old_tags,
-                            "new_tags": tags
-                        })
-                    else:
-                        failed_files.append((os.path.basename(path), "No tags generated"))
-                except Exception as e:
-                    error_msg = str(e).lower()
-                    if "tesseract is not installed" in error_msg:
-                        error_reason = "Tesseract not installed for OCR"
-                    elif "codec can't encode" in error_msg:
-                        error_reason = "PDF encoding error"
-                    else:
-                        error_reason = str(e)
-                    logging.warning(f"Failed to tag {os.path.basename(path)}: {error_reason}")
-                    failed_files.append((os.path.basename(path), error_reason))
-        if tag_changes:
+        if self.tagging_job:
+            messagebox.showinfo("Tagging", "Tagging is already running.")
+            return
+        up_to_date = 0
+        pending = []
+        for row in self.visible_rows:
+            if row.is_file:
+                # Entries that still match the file on disk don't need recomputing
+                if self.tags_cache.get(row.path, st=row.stat) is not None:
+                    up_to_date += 1
+                else:
+                    pending.append(row.path)
+        self.tagging_state = {
+            "rows": {row.path: row for row in self.visible_rows},
+            "tagged": [],
+            "changes": [],
+            "failed": [],
+            "up_to_date": up_to_date
+        }
+        if not pending:
+            self.finish_tagging()
+            return
+        self.progress_bar.config(maximum=len(pending), value=0)
+        self.progress_bar.pack(fill=tk.X, side=tk.BOTTOM, padx=10, after=self.status_label)
+        self.tagging_span = span("app.tag_files")
+        job = TaggingJob(len(pending))
+        self.tagging_job = job
+        # The task only drives the engine's process pool and waits on it
+        task = self.tasks.submit(
+            f"Tag {len(pending)} files", lambda task: self.tagging_engine.run(job, pending, lambda done: task.report(done, job.total)),
+            cancel_event=job.cancel_event, on_cancel=lambda: self.end_unstarted(task, job)
+        )
+        self.root.after(100, self.poll_tagging)
+
+    # A job cancelled from the task panel before its task started never gets the
+    # None that ends its results; this supplies it so the poll loop winds down
+    @staticmethod
+    def end_unstarted(task, job):
+        if task.started is None:
+            job.results.put(None)
+
+    def poll_tagging(self):
+        job = self.tagging_job
+        state = self.tagging_state
+        new_tags = {}
+        for path, tags, error in job.drain():
+            name = os.path.basename(path)
+            if tags:
+                new_tags[path] = tags
+                state["tagged"].append(name)
+                state["changes"].append({
+                    "path": path,
+                    "old_tags": [],
+                    "new_tags": tags
+                })
+                row = state["rows"].get(path)
+                # The row may belong to a listing that has since been replaced
+                if row and self.row_lookup.get(os.path.abspath(path)) is row:
+                    row.tags = tags
+                    self.index_row(row)
+            else:
+                logging.warning(f"Failed to tag {name}: {error}")
+                state["failed"].append((name, error))
+        self.tags_cache.update(new_tags)
+        if new_tags:
+            self.file_list.refresh()
+        self.progress_bar.config(value=job.done)
+        self.status_label.config(text=f"Tagging {job.done}/{job.total} files ({len(state['failed'])} failed)...")
+        if job.finished:
+            self.tagging_job = None
+            self.tagging_span.finish(job.total)
+            self.progress_bar.pack_forget()
+            self.finish_tagging()
+        else:
+            self.root.after(100, self.poll_tagging)
+
+    def finish_tagging(self):
+        state = self.tagging_state
+        tagged_files, failed_files = state["tagged"], state["failed"]
+        # The whole batch is undone as one step
+        if state["changes"]:
             self.undo_stack.append({
                 "type": "tag",
-                "files": tag_changes
+                "files": state["changes"]
             })
             self.update_undo_button()
-        self.list_directory()
+        # Tags in view were filled in as results arrived; this re-applies the search
+        self.refresh_paths([change["path"] for change in state["changes"]])
         message = ""
         if tagged_files:
             message += f"Tagged {len(tagged_files)} files: {', '.join(tagged_files)}"
         if failed_files:
             failed_details = "\n".join([f"{name}: {reason}" for name, reason in failed_files])
             message += f"\nFailed to tag {len(failed_files)} files:\n{failed_details}"
-        if not tagged_files and not failed_files:
+        if state["up_to_date"]:
+            message += f"\n{state['up_to_date']} files already had up-to-date tags."
+        if not tagged_files and not failed_files and not state["up_to_date"]:
             message = "No tags generated for files."
         messagebox.showinfo("Tagging", message)
 
@@ -762,8 +1342,14 @@ class FileManagerApp:
             messagebox.showwarning("Warning", "Select a file to tag.")
             return
         old_tags = self.tags_cache.get(path, [])
-        try:
-            tags = self.ai_manager.generate_tags(path)
+        name = os.path.basename(path)
+
+        # Extracting text and loading the language model can take seconds, so the
+        # tags are generated on a worker and applied back on the Tk thread
+        def run(task):
+            return self.ai_manager.generate_tags(path)
+
+        def done(tags):
             self.tags_cache[path] = tags
             self.undo_stack.append({
                 "type": "tag",
@@ -774,18 +1360,23 @@ class FileManagerApp:
                 }]
             })
             self.update_undo_button()
-            messagebox.showinfo("Tags", f"Tags for {os.path.basename(path)}: {', '.join(tags)}")
-        except Exception as e:
-            error_msg = str(e).lower()
-            if "tesseract is not installed" in error_msg:
-                error_reason = "Tesseract not installed for OCR. Please install Tesseract (e.g., 'brew install tesseract')."
-            elif "codec can't encode" in error_msg:
-                error_reason = "PDF encoding error. The PDF contains invalid characters."
-            else:
-                error_reason = str(e)
-            logging.warning(f"Failed to tag {os.path.basename(path)}: {error_reason}")
-            messagebox.showerror("Error", f"Failed to tag {os.path.basename(path)}: {error_reason}")
-        self.list_directory()
+            self.refresh_paths([path])
+            messagebox.showinfo("Tags", f"Tags for {name}: {', '.join(tags)}")
+
+        def failed(error):
+            error_reason = describe_tag_error(error, verbose=True)
+            logging.warning(f"Failed to tag {name}: {error_reason}")
+            self.refresh_paths([path])
+            messagebox.showerror("Error", f"Failed to tag {name}: {error_reason}")
+
+        def cancelled():
+            # Tags that were generated before the cancel are still worth keeping
+            if task.result is not None:
+                done(task.result)
+
+        self.status_label.config(text=f"Generating tags for {name}...")
+        task = self.tasks.submit(f"Tag {path}", run, key=("tag", path), priority=HIGH,
+                                 on_done=done, on_error=failed, on_cancel=cancelled)
 
 if __name__ == "__main__":
     root = tk.Tk()
@@ -0,0 +1,359 @@
+import os
+import time
+import queue
+import shutil
+import filecmp
+import sqlite3
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from config import MOVE_JOURNAL_PATH, MOVE_COPY_WORKERS
+from instrumentation import span
+
+logger = logging.getLogger(__name__)
+
+# Finished moves are written to the journal in groups of this many; after a crash
+# the moves in an unwritten group are recognised from the files themselves
+JOURNAL_FLUSH_MOVES = 256
+# Batches kept for undo; older finished ones are dropped when a new one starts
+JOURNAL_KEEP_BATCHES = 50
+PARTIAL_SUFFIX = ".partial"
+
+
+# Turns {category: [file names]} into (src, dst) pairs under directory. A name that
+# is already taken in its category folder, on disk or earlier in the plan, gets a
+# " (n)" suffix so nothing is ever overwritten. Returns the moves and the category
+# folders that have to be created for them.
+def plan_moves(directory, structure):
+    moves = []
+    new_dirs = []
+    for category, files in structure.items():
+        cat_dir = os.path.join(directory, category)
+        if os.path.lexists(cat_dir) and not os.path.isdir(cat_dir):
+            logger.warning(f"Not categorizing into {cat_dir}: a file has that name")
+            continue
+        if not os.path.isdir(cat_dir):
+            new_dirs.append(cat_dir)
+        taken = set()
+        for name in files:
+            base, ext = os.path.splitext(name)
+            candidate = name
+            n = 1
+            while candidate in taken or os.path.lexists(os.path.join(cat_dir, candidate)):
+                n += 1
+                candidate = f"{base} ({n}){ext}"
+            taken.add(candidate)
+            moves.append((os.path.join(directory, name), os.path.join(cat_dir, candidate)))
+    return moves, new_dirs
+
+
+# Every batch of moves is written down in full before the first file is touched,
+# and each move's progress is recorded as it goes, so a batch cut short by a
+# crash can be finished or rolled back on the next start.
+#   batches.state: moving -> moved, or undoing -> undone (moved again if an undo
+#                  could not put everything back); either can end as cancelled
+#                  when the user stops it, which leaves it to undo, not resume
+#   moves.state:   planned -> done | failed, and done -> undone on undo. A move
+#                  across devices passes through copied (copied_back on undo)
+#                  just before its copy takes the target's name.
+class MoveJournal:
+    def __init__(self, db_path=MOVE_JOURNAL_PATH):
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self.lock = threading.RLock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(
+            "CREATE TABLE IF NOT EXISTS batches ("
+            "id INTEGER PRIMARY KEY, kind TEXT NOT NULL, directory TEXT NOT NULL, "
+            "created REAL NOT NULL, state TEXT NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS moves ("
+            "batch INTEGER NOT NULL, seq INTEGER NOT NULL, src TEXT NOT NULL, dst TEXT NOT NULL, "
+            "state TEXT NOT NULL, error TEXT, PRIMARY KEY (batch, seq)) WITHOUT ROWID;"
+            "CREATE TABLE IF NOT EXISTS created_dirs (batch INTEGER NOT NULL, path TEXT NOT NULL);"
+        )
+        self.conn.commit()
+
+    def create_batch(self, kind, directory, moves, new_dirs=()):
+        with self.lock:
+            self._prune()
+            cursor = self.conn.execute(
+                "INSERT INTO batches (kind, directory, created, state) VALUES (?, ?, ?, 'moving')",
+                (kind, os.path.abspath(directory), time.time()),
+            )
+            batch_id = cursor.lastrowid
+            self.conn.executemany(
+                "INSERT INTO moves VALUES (?, ?, ?, ?, 'planned', NULL)",
+                ((batch_id, seq, src, dst) for seq, (src, dst) in enumerate(moves)),
+            )
+            self.conn.executemany("INSERT INTO created_dirs VALUES (?, ?)", ((batch_id, path) for path in new_dirs))
+            self.conn.commit()
+        return batch_id
+
+    def _prune(self):
+        stale = self.conn.execute(
+            "SELECT id FROM batches WHERE state IN ('moved', 'undone', 'cancelled') ORDER BY id DESC LIMIT -1 OFFSET ?",
+            (JOURNAL_KEEP_BATCHES,),
+        ).fetchall()
+        for table, column in (("moves", "batch"), ("created_dirs", "batch"), ("batches", "id")):
+            self.conn.executemany(f"DELETE FROM {table} WHERE {column} = ?", stale)
+
+    def batch(self, batch_id):
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT id, kind, directory, created, state FROM batches WHERE id = ?", (batch_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            counts = dict(self.conn.execute(
+                "SELECT state, COUNT(*) FROM moves WHERE batch = ? GROUP BY state", (batch_id,)
+            ).fetchall())
+        return {"id": row[0], "kind": row[1], "directory": row[2], "created": row[3], "state": row[4],
+                "counts": counts, "total": sum(counts.values())}
+
+    # Batches a crash or forced quit left part way through
+    def interrupted(self):
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT id FROM batches WHERE state IN ('moving', 'undoing') ORDER BY id"
+            ).fetchall()
+        return [self.batch(batch_id) for (batch_id,) in rows]
+
+    # The newest batch with moves that could still be undone
+    def latest_undoable(self):
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT id FROM batches WHERE state IN ('moved', 'cancelled') AND EXISTS "
+                "(SELECT 1 FROM moves WHERE batch = batches.id AND state = 'done') ORDER BY id DESC LIMIT 1"
+            ).fetchone()
+        return self.batch(row[0]) if row else None
+
+    # (seq, src, dst, state) for the batch's moves in any of states
+    def moves(self, batch_id, *states):
+        with self.lock:
+            return self.conn.execute(
+                f"SELECT seq, src, dst, state FROM moves WHERE batch = ? AND state IN ({', '.join('?' * len(states))}) "
+                "ORDER BY seq", (batch_id, *states)
+            ).fetchall()
+
+    def created_dirs(self, batch_id):
+        with self.lock:
+            return [path for (path,) in self.conn.execute(
+                "SELECT path FROM created_dirs WHERE batch = ?", (batch_id,)
+            )]
+
+    # updates are (state, error, batch, seq) tuples
+    def record(self, updates):
+        if not updates:
+            return
+        with self.lock:
+            self.conn.executemany("UPDATE moves SET state = ?, error = ? WHERE batch = ? AND seq = ?", updates)
+            self.conn.commit()
+
+    def set_state(self, batch_id, state):
+        with self.lock:
+            self.conn.execute("UPDATE batches SET state = ? WHERE id = ?", (state, batch_id))
+            self.conn.commit()
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+class MoveJob:
+    def __init__(self, batch_id, undo, total):
+        self.batch_id = batch_id
+        self.undo = undo
+        self.total = total
+        self.done = 0
+        self.results = queue.Queue()
+        self.cancel_event = threading.Event()
+        # Set when the app is closing: the batch is left to be offered for resume
+        # next start instead of being recorded as cancelled
+        self.resumable = False
+        self.finished = False
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    # Returns the (src, dst, error) results that arrived since the last call
+    def drain(self):
+        results = []
+        while True:
+            try:
+                result = self.results.get_nowait()
+            except queue.Empty:
+                break
+            if result is None:
+                self.finished = True
+                break
+            results.append(result)
+        self.done += len(results)
+        return results
+
+
+# Carries out a journaled batch from a background task. Moves within one device
+# are a single rename; anything that crosses devices is copied to a temporary name
+# next to the target by a small thread pool, renamed into place and only then
+# removed from the source, so a file is never missing from both ends.
+class BatchMover:
+    def __init__(self, journal, max_workers=MOVE_COPY_WORKERS, on_move=None):
+        self.journal = journal
+        self.max_workers = max_workers
+        # Called as on_move(src, dst) from the worker thread after each move
+        self.on_move = on_move
+
+    # Marks the batch as under way and returns the job and the moves for run
+    def prepare(self, batch_id, undo=False):
+        if undo:
+            self.reconcile(batch_id)
+        if undo:
+            moves = self.journal.moves(batch_id, "done", "copied_back")
+        else:
+            moves = self.journal.moves(batch_id, "planned", "copied")
+        job = MoveJob(batch_id, undo, len(moves))
+        self.journal.set_state(batch_id, "undoing" if undo else "moving")
+        return job, moves
+
+    # Before rolling back a batch that was cut short: moves made after the last
+    # journal write are recognised from the files (source gone, target present),
+    # half-copied targets are removed, and so are copies that reached their target
+    # before their source was removed
+    def reconcile(self, batch_id):
+        updates = []
+        for seq, src, dst, state in self.journal.moves(batch_id, "planned", "copied"):
+            partial = dst + PARTIAL_SUFFIX
+            if os.path.lexists(partial):
+                try:
+                    os.unlink(partial)
+                except OSError as e:
+                    logger.error(f"Could not remove {partial}: {e}")
+            if os.path.lexists(dst) and not os.path.lexists(src):
+                updates.append(("done", None, batch_id, seq))
+            elif state == "copied":
+                try:
+                    if os.path.lexists(dst) and filecmp.cmp(src, dst, shallow=False):
+                        os.unlink(dst)
+                    updates.append(("planned", None, batch_id, seq))
+                except OSError as e:
+                    logger.error(f"Could not remove the copy at {dst}: {e}")
+        self.journal.record(updates)
+
+    # Blocks until the moves are made or job is cancelled; results go to job.results,
+    # ending with None
+    def run(self, job, moves):
+        updates = []
+        failed = 0
+        batch_span = span("move.undo" if job.undo else "move.batch")
+        try:
+            if job.undo:
+                # Last in, first out, so a file moved twice ends up where it started
+                moves = [(seq, dst, src, state) for seq, src, dst, state in reversed(moves)]
+            else:
+                for path in self.journal.created_dirs(job.batch_id):
+                    os.makedirs(path, exist_ok=True)
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                pending = {}
+                for seq, src, dst, state in moves:
+                    if job.cancel_event.is_set():
+                        break
+                    if self._same_device(src, dst):
+                        failed += self._finish(job, updates, seq, src, dst, self._move_local, None)
+                    else:
+                        copied = state in ("copied", "copied_back")
+                        pending[executor.submit(self._move_across, job, seq, src, dst, copied)] = (seq, src, dst)
+                        if len(pending) >= self.max_workers * 2:
+                            failed += self._collect(job, updates, pending, FIRST_COMPLETED)
+                    if len(updates) >= JOURNAL_FLUSH_MOVES:
+                        self.journal.record(updates)
+                        updates = []
+                while pending:
+                    failed += self._collect(job, updates, pending, FIRST_COMPLETED)
+            self.journal.record(updates)
+            if job.undo:
+                for path in reversed(self.journal.created_dirs(job.batch_id)):
+                    try:
+                        os.rmdir(path)
+                    except OSError:
+                        pass
+            if not job.cancel_event.is_set():
+                self.journal.set_state(job.batch_id, "moved" if not job.undo or failed else "undone")
+            elif not job.resumable:
+                self.journal.set_state(job.batch_id, "cancelled")
+        except Exception as e:
+            logger.error(f"Move batch {job.batch_id} stopped: {e}")
+            self.journal.record(updates)
+        finally:
+            batch_span.finish(job.total, failed=failed > 0)
+            job.results.put(None)
+
+    def _collect(self, job, updates, pending, return_when):
+        done, _ = wait(pending, return_when=return_when)
+        failed = 0
+        for future in done:
+            seq, src, dst = pending.pop(future)
+            failed += self._finish(job, updates, seq, src, dst, None, future)
+        return failed
+
+    # Runs (or collects) one move, queues its journal update and reports it
+    def _finish(self, job, updates, seq, src, dst, move, future):
+        try:
+            if future is not None:
+                future.result()
+            else:
+                move(src, dst)
+            error = None
+        except OSError as e:
+            error = str(e)
+            logger.error(f"Could not move {src} to {dst}: {e}")
+        if error is None:
+            updates.append(("undone" if job.undo else "done", None, job.batch_id, seq))
+            if self.on_move:
+                try:
+                    self.on_move(src, dst)
+                except Exception as e:
+                    logger.error(f"Could not record move of {src}: {e}")
+        elif not job.undo:
+            updates.append(("failed", error, job.batch_id, seq))
+        job.results.put((src, dst, error))
+        return 0 if error is None else 1
+
+    @staticmethod
+    def _same_device(src, dst):
+        try:
+            return os.lstat(src).st_dev == os.stat(os.path.dirname(dst)).st_dev
+        except OSError:
+            # Let the move itself report what is missing
+            return True
+
+    # Works out whether an earlier, interrupted run already got this move done.
+    # Returns True when there is nothing left to do. copied says the journal saw
+    # this move's copy about to take dst's name; only then is an identical file at
+    # dst known to be ours, and src removed. Anything else at dst, even a copy the
+    # user made themselves, is their file.
+    @staticmethod
+    def _already_moved(src, dst, copied=False):
+        if not os.path.lexists(dst):
+            return False
+        if not os.path.lexists(src):
+            return True
+        if copied and os.path.isfile(src) and os.path.isfile(dst) and filecmp.cmp(src, dst, shallow=False):
+            os.unlink(src)
+            return True
+        raise FileExistsError(f"{dst} already exists")
+
+    def _move_local(self, src, dst):
+        if self._already_moved(src, dst):
+            return
+        os.rename(src, dst)
+
+    def _move_across(self, job, seq, src, dst, copied):
+        if self._already_moved(src, dst, copied):
+            return
+        partial = dst + PARTIAL_SUFFIX
+        with span("move.copy") as s:
+            shutil.copy2(src, partial)
+            s.add(1, os.path.getsize(partial))
+        self.journal.record([("copied_back" if job.undo else "copied", None, job.batch_id, seq)])
+        os.replace(partial, dst)
+        os.unlink(src)
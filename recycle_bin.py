@@ -0,0 +1,307 @@
+import os
+import time
+import heapq
+import shutil
+import sqlite3
+import threading
+import logging
+from config import RECYCLE_BIN_DIR, RECYCLE_INDEX_PATH, RECYCLE_BIN_QUOTA_BYTES
+from instrumentation import span
+
+logger = logging.getLogger(__name__)
+
+
+class BinEntry:
+    __slots__ = ("id", "storage_name", "original_path", "deleted", "size", "is_dir")
+
+    def __init__(self, id, storage_name, original_path, deleted, size, is_dir):
+        self.id = id
+        self.storage_name = storage_name
+        self.original_path = original_path
+        self.deleted = deleted
+        self.size = size
+        self.is_dir = bool(is_dir)
+
+    # Items adopted from before the index keep the name they were stored under;
+    # only names the bin made itself carry the "<id>_" prefix
+    @property
+    def name(self):
+        if self.original_path:
+            return os.path.basename(self.original_path)
+        return self.storage_name
+
+
+def tree_size(path):
+    if not os.path.isdir(path) or os.path.islink(path):
+        return os.lstat(path).st_size
+    total = 0
+    for directory, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(directory, name)).st_size
+            except OSError:
+                pass
+    return total
+
+
+# A name next to path that doesn't exist yet: "report (2).pdf", "report (3).pdf", ...
+def free_path(path):
+    if not os.path.lexists(path):
+        return path
+    base, ext = os.path.splitext(path)
+    n = 2
+    while os.path.lexists(f"{base} ({n}){ext}"):
+        n += 1
+    return f"{base} ({n}){ext}"
+
+
+# The recycle bin folder plus an index of what is in it: where each item came
+# from, when it was deleted and how big it is. Items are stored as "<id>_<name>"
+# so two deletions of the same name never collide. Purging by age, restoring and
+# keeping the bin under its size quota are all answered from the index; the bin
+# itself is never listed or stat'ed to make those decisions.
+class RecycleBin:
+    def __init__(self, root=RECYCLE_BIN_DIR, db_path=RECYCLE_INDEX_PATH, quota_bytes=RECYCLE_BIN_QUOTA_BYTES):
+        os.makedirs(root, exist_ok=True)
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self.root = os.path.abspath(root)
+        self.quota_bytes = quota_bytes
+        self.lock = threading.RLock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(
+            "CREATE TABLE IF NOT EXISTS items ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, storage_name TEXT UNIQUE, original_path TEXT, "
+            "deleted REAL NOT NULL, size INTEGER NOT NULL, is_dir INTEGER NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);"
+        )
+        self.conn.commit()
+        self.entries = {}
+        self.by_name = {}
+        self.total_bytes = 0
+        for row in self.conn.execute("SELECT id, storage_name, original_path, deleted, size, is_dir FROM items"):
+            self._add(BinEntry(*row))
+        # Oldest deletion first; entries restored or purged since are skipped lazily
+        self.heap = [(entry.deleted, entry.id) for entry in self.entries.values()]
+        heapq.heapify(self.heap)
+
+    def _add(self, entry):
+        self.entries[entry.id] = entry
+        self.by_name[entry.storage_name] = entry
+        self.total_bytes += entry.size
+
+    def _forget(self, entry):
+        del self.entries[entry.id]
+        del self.by_name[entry.storage_name]
+        self.total_bytes -= entry.size
+        self.conn.execute("DELETE FROM items WHERE id = ?", (entry.id,))
+
+    # Items left by versions of the app that kept no index are taken in once, with
+    # their mtime standing in for the deletion time and no known original location.
+    # Sizing them walks every adopted folder, so this is meant for a background
+    # task; the lock is only held while an item is added. Returns how many were.
+    def adopt_unindexed(self, cancel=None):
+        with self.lock:
+            if self.conn.execute("SELECT 1 FROM meta WHERE key = 'adopted'").fetchone():
+                return 0
+        adopted = 0
+        with os.scandir(self.root) as entries:
+            for item in entries:
+                if cancel is not None and cancel.is_set():
+                    return adopted
+                with self.lock:
+                    if item.name in self.by_name:
+                        continue
+                try:
+                    st = item.stat(follow_symlinks=False)
+                    size = tree_size(item.path)
+                except OSError:
+                    continue
+                with self.lock:
+                    # Deleted or restored by the app while it was being sized
+                    if item.name in self.by_name or not os.path.lexists(item.path):
+                        continue
+                    self._insert(None, st.st_mtime, size, item.is_dir(follow_symlinks=False), storage_name=item.name)
+                    self.conn.commit()
+                adopted += 1
+        with self.lock:
+            self.conn.execute("INSERT OR REPLACE INTO meta VALUES ('adopted', '1')")
+            self.conn.commit()
+        if adopted:
+            logger.info(f"Indexed {adopted} items already in the recycle bin")
+        return adopted
+
+    # New items are stored as "<id>_<original name>", or "<id>_<n>_<original name>"
+    # if an adopted legacy item already has that name. Either both statements land
+    # or neither does, so no row is ever left without a name.
+    def _insert(self, original_path, deleted, size, is_dir, storage_name=None):
+        try:
+            cursor = self.conn.execute(
+                "INSERT INTO items (storage_name, original_path, deleted, size, is_dir) VALUES (?, ?, ?, ?, ?)",
+                (storage_name, original_path, deleted, size, int(is_dir)),
+            )
+            if storage_name is None:
+                base = os.path.basename(original_path)
+                storage_name = f"{cursor.lastrowid}_{base}"
+                n = 1
+                while storage_name in self.by_name or os.path.lexists(os.path.join(self.root, storage_name)):
+                    n += 1
+                    storage_name = f"{cursor.lastrowid}_{n}_{base}"
+                self.conn.execute("UPDATE items SET storage_name = ? WHERE id = ?", (storage_name, cursor.lastrowid))
+        except sqlite3.Error:
+            self.conn.rollback()
+            raise
+        entry = BinEntry(cursor.lastrowid, storage_name, original_path, deleted, size, is_dir)
+        self._add(entry)
+        heapq.heappush(self.heap, (entry.deleted, entry.id))
+        return entry
+
+    def storage_path(self, entry):
+        return os.path.join(self.root, entry.storage_name)
+
+    # The entry for a path inside the bin, or None
+    def entry_for(self, path):
+        path = os.path.abspath(path)
+        if os.path.dirname(path) != self.root:
+            return None
+        with self.lock:
+            return self.by_name.get(os.path.basename(path))
+
+    # Moves path into the bin and returns its new location and the bin paths the
+    # quota evicted to make room. Sizing a folder walks it and eviction may remove
+    # whole trees, so this is meant for a background task; the lock is only held to
+    # update the index. The index row is written first: a crash in between leaves a
+    # row whose item is missing, which purge and restore simply drop, rather than
+    # an item nobody knows the origin of.
+    def delete(self, path):
+        path = os.path.abspath(path)
+        is_dir = os.path.isdir(path) and not os.path.islink(path)
+        size = tree_size(path)
+        with self.lock:
+            entry = self._insert(path, time.time(), size, is_dir)
+            self.conn.commit()
+        try:
+            shutil.move(path, self.storage_path(entry))
+        except Exception:
+            with self.lock:
+                self._forget(entry)
+                self.conn.commit()
+            raise
+        evicted = self.enforce_quota(keep=entry.id)
+        return self.storage_path(entry), evicted
+
+    # Puts an item back where it was deleted from (or at destination), next to
+    # whatever has taken its name since. Returns the restored path.
+    def restore(self, path, destination=None):
+        with self.lock:
+            entry = self.entry_for(path)
+            if entry is None:
+                raise FileNotFoundError(f"{path} is not in the recycle bin")
+            if not os.path.lexists(self.storage_path(entry)):
+                self._forget(entry)
+                self.conn.commit()
+                raise FileNotFoundError(f"{entry.name} is no longer in the recycle bin")
+            target = destination or entry.original_path or os.path.join(os.path.expanduser("~"), entry.name)
+            target = free_path(target)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            shutil.move(self.storage_path(entry), target)
+            self._forget(entry)
+            self.conn.commit()
+        return target
+
+    # Permanently removes entries; returns the bin paths that were removed. Unless
+    # the caller holds the lock, it is only taken between items, so browsing the
+    # bin and deleting stay responsive while a large purge runs. Stops early once
+    # cancel is set.
+    def _purge(self, entries, cancel=None):
+        removed = []
+        for entry in entries:
+            if cancel is not None and cancel.is_set():
+                break
+            storage = self.storage_path(entry)
+            try:
+                if os.path.isdir(storage) and not os.path.islink(storage):
+                    shutil.rmtree(storage)
+                elif os.path.lexists(storage):
+                    os.remove(storage)
+            except OSError as e:
+                logger.warning(f"Could not purge {entry.name} from Recycle Bin: {e}")
+                continue
+            with self.lock:
+                if entry.id in self.entries:
+                    self._forget(entry)
+            removed.append(storage)
+        with self.lock:
+            self.conn.commit()
+        return removed
+
+    # Pops the heap down to the oldest live entry without removing it
+    def _oldest(self):
+        while self.heap:
+            deleted, entry_id = self.heap[0]
+            if entry_id in self.entries:
+                return self.entries[entry_id]
+            heapq.heappop(self.heap)
+        return None
+
+    def purge_older_than(self, days, cancel=None):
+        cutoff = time.time() - days * 86400
+        stale = []
+        with span("recycle_bin.purge") as s:
+            with self.lock:
+                # Popped entries that fail to purge are put back afterwards
+                while True:
+                    entry = self._oldest()
+                    if entry is None or entry.deleted >= cutoff:
+                        break
+                    heapq.heappop(self.heap)
+                    stale.append(entry)
+            removed = self._purge(stale, cancel)
+            with self.lock:
+                for entry in stale:
+                    if entry.id in self.entries:
+                        heapq.heappush(self.heap, (entry.deleted, entry.id))
+            s.add(len(removed))
+        return removed
+
+    # Evicts the oldest deletions until the bin fits its quota. The item just
+    # deleted (keep) is never evicted, even if it alone is over the quota.
+    def enforce_quota(self, keep=None):
+        if not self.quota_bytes:
+            return []
+        evicted = []
+        kept = []
+        with self.lock:
+            planned = self.total_bytes
+            while planned > self.quota_bytes:
+                entry = self._oldest()
+                if entry is None:
+                    break
+                heapq.heappop(self.heap)
+                if entry.id == keep:
+                    kept.append(entry)
+                    continue
+                evicted.append(entry)
+                planned -= entry.size
+        removed = self._purge(evicted)
+        with self.lock:
+            for entry in kept + evicted:
+                if entry.id in self.entries:
+                    heapq.heappush(self.heap, (entry.deleted, entry.id))
+        if removed:
+            logger.info(f"Recycle bin over its quota; permanently removed {len(removed)} oldest items")
+        return removed
+
+    def empty(self, cancel=None):
+        with self.lock:
+            entries = list(self.entries.values())
+        removed = self._purge(entries, cancel)
+        with self.lock:
+            if not self.entries:
+                self.heap = []
+        return removed
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
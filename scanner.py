@@ -0,0 +1,117 @@
+import os
+import stat
+import queue
+import threading
+import logging
+from instrumentation import span
+
+logger = logging.getLogger(__name__)
+
+
+class ScanRow:
+    __slots__ = ("name", "path", "is_file", "size", "mtime", "stat", "tags", "name_words", "tag_words")
+
+    def __init__(self, name, path, is_file, size, mtime, stat):
+        self.name = name
+        self.path = path
+        self.is_file = is_file
+        self.size = size
+        self.mtime = mtime
+        self.stat = stat
+        self.tags = []
+        self.name_words = []
+        self.tag_words = []
+
+
+class ScanJob:
+    def __init__(self, directory):
+        self.directory = directory
+        self.batches = queue.Queue()
+        self.cancel_event = threading.Event()
+        self.finished = False
+        self.error = None
+        self.count = 0
+
+    @property
+    def cancelled(self):
+        return self.cancel_event.is_set()
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    # Returns the rows that arrived since the last call, up to max_batches batches
+    def drain(self, max_batches=10):
+        rows = []
+        for _ in range(max_batches):
+            try:
+                batch = self.batches.get_nowait()
+            except queue.Empty:
+                break
+            if batch is None:
+                self.finished = True
+                break
+            rows.extend(batch)
+        return rows
+
+
+class DirectoryScanner:
+    def __init__(self, batch_size=500):
+        self.batch_size = batch_size
+
+    # Lists one directory on a worker thread. row_filter runs on the worker too,
+    # so expensive matching never touches the UI thread; limit stops the scan
+    # after that many matching rows.
+    def start(self, directory, row_filter=None, limit=None):
+        job = ScanJob(directory)
+        threading.Thread(target=self._run, args=(job, row_filter, limit), daemon=True).start()
+        return job
+
+    def _run(self, job, row_filter, limit):
+        batch = []
+        listing = span("scan.list_directory")
+        try:
+            with os.scandir(job.directory) as entries:
+                for entry in entries:
+                    if job.cancelled:
+                        return
+                    row = self._make_row(entry)
+                    if row is None or (row_filter and not row_filter(row)):
+                        continue
+                    batch.append(row)
+                    job.count += 1
+                    if len(batch) >= self.batch_size:
+                        job.batches.put(batch)
+                        batch = []
+                    if limit and job.count >= limit:
+                        break
+        except Exception as e:
+            logger.error(f"Error scanning {job.directory}: {e}")
+            job.error = e
+        finally:
+            listing.finish(job.count, failed=job.error is not None)
+            if batch and not job.cancelled:
+                job.batches.put(batch)
+            job.batches.put(None)
+
+    # Builds the row for a single path, or returns None if it no longer exists
+    @staticmethod
+    def row_for_path(path):
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        is_file = stat.S_ISREG(st.st_mode)
+        size = st.st_size if is_file else None
+        return ScanRow(os.path.basename(path), path, is_file, size, st.st_mtime, st)
+
+    @staticmethod
+    def _make_row(entry):
+        try:
+            # DirEntry caches both the type and the stat result, so each
+            # entry costs at most one stat call
+            is_file = entry.is_file()
+            st = entry.stat()
+        except OSError:
+            return None
+        size = st.st_size if is_file else None
+        return ScanRow(entry.name, entry.path, is_file, size, st.st_mtime, st)
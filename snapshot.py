@@ -0,0 +1,138 @@
+import os
+import time
+from array import array
+import numpy as np
+from instrumentation import timed
+from tree_walker import TreeWalker
+
+
+# What one TreeWalker thread collects for a snapshot, in compact typed arrays
+class SnapshotPart:
+    def __init__(self):
+        self.names = []
+        self.file_dirs = array("i")
+        self.ext_codes = array("i")
+        self.sizes = array("q")
+        self.mtimes = array("q")
+        self.depths = array("h")
+        self.exts = []
+        self.ext_lookup = {}
+        self.dirs = []
+        self.dir_parents = array("i")
+        self.dir_depths = array("h")
+
+    def add_dir(self, path, parent, depth):
+        self.dirs.append(path)
+        self.dir_parents.append(parent)
+        self.dir_depths.append(depth)
+        return len(self.dirs) - 1
+
+    def add_file(self, dir_index, name, st, depth):
+        ext = os.path.splitext(name)[1].lower() or "No Extension"
+        code = self.ext_lookup.get(ext)
+        if code is None:
+            code = self.ext_lookup[ext] = len(self.exts)
+            self.exts.append(ext)
+        self.names.append(name)
+        self.file_dirs.append(dir_index)
+        self.ext_codes.append(code)
+        self.sizes.append(st.st_size)
+        self.mtimes.append(int(st.st_mtime))
+        self.depths.append(depth)
+
+
+# Everything the visualizations need about a directory tree, collected in one
+# scandir pass. Per-file data lives in parallel NumPy arrays; a file's path is
+# rebuilt from its folder index and name only when it is actually needed.
+class DirectorySnapshot:
+    def __init__(self, root, names, file_dirs, ext_codes, exts, sizes, mtimes, depths, dirs, dir_parents, dir_depths):
+        self.root = root
+        self.names = names
+        self.file_dirs = file_dirs
+        self.ext_codes = ext_codes
+        self.exts = exts
+        self.sizes = sizes
+        self.mtimes = mtimes
+        self.depths = depths
+        self.dirs = dirs
+        self.dir_parents = dir_parents
+        self.dir_depths = dir_depths
+        self.created = time.time()
+        self._dir_totals = None
+        self._files_by_dir = None
+        self._dirs_by_parent = None
+
+    # walker, a TreeWalker, sets the depth limit, exclusions and cancellation;
+    # by default the whole tree is read
+    @classmethod
+    @timed("snapshot.build")
+    def build(cls, root, walker=None):
+        walker = walker or TreeWalker()
+        parts = walker.walk(root, SnapshotPart)
+
+        # Each part numbers its folders and extensions from zero; shift them into
+        # one numbering, with the root's part first so the root is folder 0
+        ext_lookup = {}
+        dirs = []
+        file_dirs, ext_codes, dir_parents = [], [], []
+        for part in parts:
+            offset = len(dirs)
+            dirs.extend(part.dirs)
+            parents = np.frombuffer(part.dir_parents, dtype=np.int32) + offset
+            parents[parents == offset - 1] = 0 if offset else -1
+            dir_parents.append(parents)
+            file_dirs.append(np.frombuffer(part.file_dirs, dtype=np.int32) + offset)
+            codes = np.array([ext_lookup.setdefault(ext, len(ext_lookup)) for ext in part.exts], dtype=np.int32)
+            ext_codes.append(codes[np.frombuffer(part.ext_codes, dtype=np.int32)])
+
+        return cls(
+            root,
+            [name for part in parts for name in part.names],
+            np.concatenate(file_dirs),
+            np.concatenate(ext_codes),
+            list(ext_lookup),
+            np.concatenate([np.frombuffer(part.sizes, dtype=np.int64) for part in parts]),
+            np.concatenate([np.frombuffer(part.mtimes, dtype=np.int64) for part in parts]),
+            np.concatenate([np.frombuffer(part.depths, dtype=np.int16) for part in parts]),
+            dirs,
+            np.concatenate(dir_parents),
+            np.concatenate([np.frombuffer(part.dir_depths, dtype=np.int16) for part in parts]),
+        )
+
+    def __len__(self):
+        return len(self.names)
+
+    def path(self, index):
+        return os.path.join(self.dirs[self.file_dirs[index]], self.names[index])
+
+    def paths(self, indices):
+        return [self.path(i) for i in indices]
+
+    # Bytes under each folder, including everything in its subfolders. Folders are
+    # rolled up into their parents one depth level at a time, deepest first.
+    def dir_totals(self):
+        if self._dir_totals is None:
+            totals = np.bincount(self.file_dirs, weights=self.sizes, minlength=len(self.dirs))
+            for depth in range(int(self.dir_depths.max(initial=0)), 0, -1):
+                level = np.flatnonzero(self.dir_depths == depth)
+                np.add.at(totals, self.dir_parents[level], totals[level])
+            self._dir_totals = totals
+        return self._dir_totals
+
+    @staticmethod
+    def _group(keys, count):
+        order = np.argsort(keys, kind="stable")
+        bounds = np.searchsorted(keys[order], np.arange(count + 1))
+        return order, bounds
+
+    def files_in(self, dir_index):
+        if self._files_by_dir is None:
+            self._files_by_dir = self._group(self.file_dirs, len(self.dirs))
+        order, bounds = self._files_by_dir
+        return order[bounds[dir_index]:bounds[dir_index + 1]]
+
+    def subdirs(self, dir_index):
+        if self._dirs_by_parent is None:
+            self._dirs_by_parent = self._group(self.dir_parents, len(self.dirs))
+        order, bounds = self._dirs_by_parent
+        return order[bounds[dir_index]:bounds[dir_index + 1]]
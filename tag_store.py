@@ -0,0 +1,191 @@
+import os
+import json
+import sqlite3
+import threading
+from config import TAG_DB_PATH
+
+
+# Persistent path -> tags map. Each row remembers the size, mtime and inode of the
+# file it was computed for, so a lookup on a file that changed since is a miss.
+# Rows are read one directory at a time, the first time that directory is needed,
+# and kept in memory grouped by directory.
+class TagStore:
+    def __init__(self, db_path=TAG_DB_PATH):
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self.lock = threading.RLock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS tags ("
+            "path TEXT PRIMARY KEY, directory TEXT NOT NULL, "
+            "size INTEGER, mtime_ns INTEGER, inode INTEGER, tags TEXT NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_tags_directory ON tags(directory)")
+        self.conn.commit()
+        # directory -> {path: (signature, tags)} for the directories read so far
+        self.entries = {}
+        # Rows found out of date by get, deleted together on the next write
+        self.stale = set()
+        # Bumped on every change so views can tell whether their tag data is current
+        self.version = 0
+
+    @staticmethod
+    def _key(path):
+        return os.path.abspath(path)
+
+    @staticmethod
+    def _signature(path):
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return (st.st_size, st.st_mtime_ns, st.st_ino)
+
+    # Where a path's entry lives, once its directory is loaded
+    def _bucket(self, path):
+        directory = os.path.dirname(path)
+        self.load_directory(directory)
+        return self.entries[directory]
+
+    def load_directory(self, directory):
+        directory = self._key(directory)
+        with self.lock:
+            if directory in self.entries:
+                return
+            rows = self.conn.execute(
+                "SELECT path, size, mtime_ns, inode, tags FROM tags WHERE directory = ?", (directory,)
+            ).fetchall()
+            self.entries[directory] = {
+                path: ((size, mtime_ns, inode), json.loads(tags)) for path, size, mtime_ns, inode, tags in rows
+            }
+
+    # st may be passed in when the caller already holds a stat result for path
+    def get(self, path, default=None, st=None):
+        path = self._key(path)
+        with self.lock:
+            entry = self._bucket(path).get(path)
+            if entry is None:
+                return default
+            # DirEntry.stat() leaves st_ino at 0 on Windows, so only trust a real inode
+            if st is not None and st.st_ino:
+                signature = (st.st_size, st.st_mtime_ns, st.st_ino)
+            else:
+                signature = self._signature(path)
+            if signature != entry[0]:
+                # Dropped from memory now; reading stays free of writes
+                del self.entries[os.path.dirname(path)][path]
+                self.stale.add(path)
+                return default
+            return list(entry[1])
+
+    def __contains__(self, path):
+        return self.get(path) is not None
+
+    def __getitem__(self, path):
+        tags = self.get(path)
+        if tags is None:
+            raise KeyError(path)
+        return tags
+
+    def __setitem__(self, path, tags):
+        self.update({path: tags})
+
+    # Called with the lock held, before any other write
+    def _flush_stale(self):
+        if self.stale:
+            self.conn.executemany("DELETE FROM tags WHERE path = ?", ((path,) for path in self.stale))
+            self.stale.clear()
+
+    def update(self, mapping):
+        rows = []
+        with self.lock:
+            self._flush_stale()
+            for path, tags in mapping.items():
+                path = self._key(path)
+                signature = self._signature(path)
+                if signature is None:
+                    continue
+                self._bucket(path)[path] = (signature, list(tags))
+                rows.append((path, os.path.dirname(path), *signature, json.dumps(list(tags))))
+            if not rows:
+                self.conn.commit()
+                return
+            self.conn.executemany("INSERT OR REPLACE INTO tags VALUES (?, ?, ?, ?, ?, ?)", rows)
+            self.conn.commit()
+            self.version += 1
+
+    def pop(self, path, default=None):
+        with self.lock:
+            tags = self.get(path)
+            self._delete(self._key(path))
+            return default if tags is None else tags
+
+    def _delete(self, path):
+        self.entries.get(os.path.dirname(path), {}).pop(path, None)
+        self._flush_stale()
+        self.conn.execute("DELETE FROM tags WHERE path = ?", (path,))
+        self.conn.commit()
+        self.version += 1
+
+    # SQL condition and arguments matching path and everything under it. Paths under
+    # path are exactly those from "path/" up to, not including, the string with the
+    # separator's successor in its place, so both halves are primary key lookups.
+    @staticmethod
+    def _under(path):
+        path = path.rstrip(os.sep)
+        return "path = ? OR (path >= ? AND path < ?)", (path, path + os.sep, path + chr(ord(os.sep) + 1))
+
+    # Drops the in-memory entries for path and everything under it; costs one pass
+    # over the loaded directories, not over every entry
+    def _forget_loaded(self, path):
+        prefix = path.rstrip(os.sep) + os.sep
+        self.entries.get(os.path.dirname(path), {}).pop(path, None)
+        for directory in [d for d in self.entries if d == path or d.startswith(prefix)]:
+            del self.entries[directory]
+
+    # Carries the tags of src (a file, or every file under a folder) over to dst
+    def move(self, src, dst):
+        src, dst = self._key(src), self._key(dst)
+        with self.lock:
+            self._flush_stale()
+            # One statement for the whole tree: every path and folder under src keeps
+            # its tail and trades the src head for dst
+            condition, args = self._under(src)
+            cursor = self.conn.execute(
+                "UPDATE OR REPLACE tags SET path = ? || substr(path, ?), "
+                "directory = CASE WHEN path = ? THEN ? ELSE ? || substr(directory, ?) END "
+                f"WHERE {condition}",
+                (dst, len(src) + 1, src, os.path.dirname(dst), dst, len(src) + 1, *args),
+            )
+            if not cursor.rowcount:
+                self.conn.commit()
+                return
+            # A single moved file may have crossed devices, so refresh its inode
+            if os.path.isfile(dst):
+                signature = self._signature(dst)
+                if signature:
+                    self.conn.execute(
+                        "UPDATE tags SET size = ?, mtime_ns = ?, inode = ? WHERE path = ?", (*signature, dst)
+                    )
+            self.conn.commit()
+            self._forget_loaded(src)
+            self._forget_loaded(dst)
+            self.entries.pop(os.path.dirname(dst), None)
+            self.version += 1
+
+    def discard_tree(self, path):
+        path = self._key(path)
+        with self.lock:
+            self._flush_stale()
+            condition, args = self._under(path)
+            self.conn.execute(f"DELETE FROM tags WHERE {condition}", args)
+            self.conn.commit()
+            self._forget_loaded(path)
+            self.version += 1
+
+    def close(self):
+        with self.lock:
+            self._flush_stale()
+            self.conn.commit()
+            self.conn.close()
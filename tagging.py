@@ -0,0 +1,137 @@
+import os
+import queue
+import threading
+import logging
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+
+logger = logging.getLogger(__name__)
+
+# One AIDirectoryManager per worker process, created by the pool initializer
+_worker_manager = None
+
+
+def _init_worker():
+    global _worker_manager
+    from ai import AIDirectoryManager
+    from extraction_cache import ExtractionCache
+    _worker_manager = AIDirectoryManager(ExtractionCache())
+
+
+def _tag_file(path):
+    try:
+        tags = _worker_manager.generate_tags(path)
+        return path, tags, None if tags else "No tags generated"
+    except Exception as e:
+        return path, [], describe_tag_error(e)
+
+
+def describe_tag_error(error, verbose=False):
+    error_msg = str(error).lower()
+    if "tesseract is not installed" in error_msg:
+        if verbose:
+            return "Tesseract not installed for OCR. Please install Tesseract (e.g., 'brew install tesseract')."
+        return "Tesseract not installed for OCR"
+    if "codec can't encode" in error_msg:
+        if verbose:
+            return "PDF encoding error. The PDF contains invalid characters."
+        return "PDF encoding error"
+    return str(error)
+
+
+class TaggingJob:
+    def __init__(self, total):
+        self.total = total
+        self.done = 0
+        self.results = queue.Queue()
+        self.cancel_event = threading.Event()
+        self.finished = False
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    # Returns whatever results arrived since the last call; never blocks
+    def drain(self):
+        results = []
+        while True:
+            try:
+                result = self.results.get_nowait()
+            except queue.Empty:
+                break
+            if result is None:
+                self.finished = True
+                break
+            results.append(result)
+        self.done += len(results)
+        return results
+
+
+class TaggingEngine:
+    def __init__(self, max_workers=None):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.executor = None
+
+    def _get_executor(self):
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(max_workers=self.max_workers, initializer=_init_worker)
+        return self.executor
+
+    # Yields (path, tags, error) tuples in completion order. Only a few tasks per
+    # worker are queued at a time so huge batches don't pile up in the pool.
+    def iter_tags(self, paths, cancel_event=None):
+        paths = iter(paths)
+        pending = {}
+        window = self.max_workers * 4
+        while True:
+            while len(pending) < window and not (cancel_event and cancel_event.is_set()):
+                path = next(paths, None)
+                if path is None:
+                    break
+                # Fetched per submit: a crash may have replaced the pool mid-batch
+                executor = self._get_executor()
+                pending[executor.submit(_tag_file, path)] = (path, executor)
+            if not pending:
+                return
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                path, executor = pending.pop(future)
+                if future.cancelled():
+                    continue
+                try:
+                    yield future.result()
+                except BrokenProcessPool as e:
+                    # Every file still queued on the crashed pool fails with it;
+                    # the rest of the batch goes to a fresh pool
+                    self._discard_executor(executor)
+                    yield path, [], describe_tag_error(e)
+                except Exception as e:
+                    logger.error(f"Tagging worker failed on {path}: {e}")
+                    yield path, [], describe_tag_error(e)
+            if cancel_event and cancel_event.is_set():
+                for future in list(pending):
+                    if future.cancel():
+                        del pending[future]
+
+    # Shuts executor down and, if it is still the current pool, forgets it; a
+    # late failure from a pool already replaced leaves the new one alone
+    def _discard_executor(self, executor):
+        executor.shutdown(wait=False, cancel_futures=True)
+        if self.executor is executor:
+            self.executor = None
+
+    # Tags paths into job.results, ending with None; meant for a background task,
+    # which it blocks until the batch is done or job is cancelled
+    def run(self, job, paths, progress=None):
+        try:
+            for done, result in enumerate(self.iter_tags(paths, job.cancel_event), 1):
+                job.results.put(result)
+                if progress:
+                    progress(done)
+        except Exception as e:
+            logger.error(f"Tagging batch failed: {e}")
+        finally:
+            job.results.put(None)
+
+    def shutdown(self):
+        if self.executor is not None:
+            self._discard_executor(self.executor)
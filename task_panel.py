@@ -0,0 +1,89 @@
+import tkinter as tk
+from tkinter import ttk
+from diagnostics import format_seconds
+
+REFRESH_MS = 500
+COLUMNS = ("Task", "State", "Progress", "Time")
+
+
+def describe_progress(task):
+    parts = []
+    if task.total:
+        parts.append(f"{task.done}/{task.total}")
+    elif task.done:
+        parts.append(str(task.done))
+    if task.message:
+        parts.append(task.message)
+    if task.state == "failed" and task.error is not None:
+        parts.append(str(task.error))
+    return "  ".join(parts)
+
+
+# Running, queued and recently finished background tasks, refreshed while open.
+# Cancel stops the selected tasks; ones already running stop at their next check.
+class TaskPanel:
+    def __init__(self, master, scheduler):
+        self.scheduler = scheduler
+        self.window = tk.Toplevel(master)
+        self.window.title("Tasks")
+        self.window.geometry("760x360")
+        self.after_id = None
+
+        controls = ttk.Frame(self.window)
+        controls.pack(fill=tk.X, padx=10, pady=5)
+        ttk.Button(controls, text="Cancel", command=self.cancel_selected, style="danger.TButton").pack(side=tk.RIGHT, padx=5)
+        self.summary_label = ttk.Label(controls, text="")
+        self.summary_label.pack(side=tk.LEFT)
+
+        table = ttk.Frame(self.window)
+        table.pack(fill=tk.BOTH, expand=True, padx=10, pady=(0, 10))
+        self.tree = ttk.Treeview(table, columns=COLUMNS, show="headings", selectmode="extended")
+        for column, width in zip(COLUMNS, (260, 90, 300, 80)):
+            self.tree.heading(column, text=column)
+            self.tree.column(column, width=width, anchor=tk.E if column == "Time" else tk.W)
+        scrollbar = ttk.Scrollbar(table, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+        self.refresh()
+
+    def is_open(self):
+        return self.window is not None
+
+    def lift(self):
+        self.window.deiconify()
+        self.window.lift()
+
+    def close(self):
+        if self.after_id:
+            self.window.after_cancel(self.after_id)
+        self.window.destroy()
+        self.window = None
+
+    def cancel_selected(self):
+        tasks = {str(task.id): task for task in self.scheduler.snapshot()}
+        for iid in self.tree.selection():
+            task = tasks.get(iid)
+            if task and not task.finished:
+                task.cancel()
+        self.update_view()
+
+    def refresh(self):
+        self.after_id = self.window.after(REFRESH_MS, self.refresh)
+        self.update_view()
+
+    def update_view(self):
+        tasks = self.scheduler.snapshot()
+        selected = set(self.tree.selection())
+        self.tree.delete(*self.tree.get_children())
+        for task in tasks:
+            state = "cancelling" if task.cancelled and not task.finished else task.state
+            self.tree.insert("", "end", iid=str(task.id), values=(
+                task.name, state, describe_progress(task), format_seconds(task.elapsed()) if task.started else ""
+            ))
+        self.tree.selection_set([iid for iid in selected if self.tree.exists(iid)])
+        running = sum(1 for task in tasks if task.state == "running")
+        queued = sum(1 for task in tasks if task.state == "queued")
+        self.summary_label.config(text=f"{running} running, {queued} queued")
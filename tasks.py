@@ -0,0 +1,255 @@
+import time
+import heapq
+import queue
+import itertools
+import threading
+import logging
+from collections import deque
+from config import TASK_WORKERS
+
+logger = logging.getLogger(__name__)
+
+LOW, NORMAL, HIGH = 0, 1, 2
+POLL_MS = 100
+# Finished tasks kept for the task panel
+HISTORY_SIZE = 50
+
+_task_ids = itertools.count(1)
+
+
+class Task:
+    def __init__(self, name, func, key, priority, cancel_event=None):
+        self.id = next(_task_ids)
+        self.name = name
+        self.func = func
+        self.key = key
+        self.priority = priority
+        self.state = "queued"
+        self.cancel_event = cancel_event or threading.Event()
+        self.done = 0
+        self.total = 0
+        self.message = ""
+        self.result = None
+        self.error = None
+        self.created = time.time()
+        self.started = None
+        self.ended = None
+        # Bumped by report; the scheduler passes changes on to on_progress
+        self.version = 0
+        self.seen_version = 0
+        self.on_done = []
+        self.on_error = []
+        self.on_progress = []
+        self.on_cancel = []
+
+    @property
+    def cancelled(self):
+        return self.cancel_event.is_set()
+
+    @property
+    def finished(self):
+        return self.state in ("done", "failed", "cancelled")
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    # Usually called by the task's function; safe from any thread
+    def report(self, done=None, total=None, message=None):
+        if done is not None:
+            self.done = done
+        if total is not None:
+            self.total = total
+        if message is not None:
+            self.message = message
+        self.version += 1
+
+    def elapsed(self):
+        if self.started is None:
+            return 0.0
+        return (self.ended or time.time()) - self.started
+
+
+# Runs the app's long operations on a small pool of worker threads, highest
+# priority first. A task's function gets the Task, which it uses to report
+# progress and to notice cancellation; work that needs processes (tagging)
+# drives its own process pool from there. Submitting with the key of a task
+# that is still queued or running joins that task instead of starting another,
+# so two requests for the same result share one run. Progress and results come
+# back on the Tk thread: the callbacks are called from a root.after poll that
+# only runs while there are tasks. One worker is kept for HIGH tasks: long LOW
+# and NORMAL work (indexing, duplicate search, the tagging driver) never holds
+# every thread, so a chart or a categorize the user is waiting on starts at once.
+#
+#   on_progress(task)  after the task reported something
+#   on_done(result)    when it returned
+#   on_error(error)    when it raised
+#   on_cancel()        when it was cancelled, whether or not it had started; a
+#                      function that returned anyway leaves what it did in
+#                      task.result, so the callback can account for it
+#
+# A job object that already has a cancel Event can pass it as cancel_event, so
+# cancelling either the job or the task stops both.
+class TaskScheduler:
+    def __init__(self, root, max_workers=TASK_WORKERS):
+        self.root = root
+        self.max_workers = max_workers
+        self.lock = threading.Condition()
+        self.heap = []
+        self.order = itertools.count()
+        self.active = {}
+        self.tasks = []
+        self.history = deque(maxlen=HISTORY_SIZE)
+        self.completed = queue.Queue()
+        self.workers = []
+        self.idle_workers = 0
+        # Running tasks below HIGH priority, and how many of those may run at once
+        self.running_background = 0
+        self.background_limit = max(1, max_workers - 1)
+        self.polling = False
+        self.closed = False
+
+    # Called from the Tk thread; returns the Task, which may be one already running
+    def submit(self, name, func, key=None, priority=NORMAL, on_done=None, on_error=None, on_progress=None, on_cancel=None,
+               cancel_event=None):
+        with self.lock:
+            task = self.active.get(key) if key is not None else None
+            if task is None or task.cancelled:
+                task = Task(name, func, key, priority, cancel_event)
+                if key is not None:
+                    self.active[key] = task
+                self.tasks.append(task)
+                self._enqueue(task)
+            elif priority > task.priority and task.state == "queued":
+                # The older heap entry is skipped once this one has run
+                task.priority = priority
+                self._enqueue(task)
+            for callbacks, callback in ((task.on_done, on_done), (task.on_error, on_error),
+                                        (task.on_progress, on_progress), (task.on_cancel, on_cancel)):
+                if callback:
+                    callbacks.append(callback)
+        if not self.polling:
+            self.polling = True
+            self.root.after(POLL_MS, self._poll)
+        return task
+
+    def _enqueue(self, task):
+        heapq.heappush(self.heap, (-task.priority, next(self.order), task))
+        if len(self.heap) > self.idle_workers and len(self.workers) < self.max_workers:
+            worker = threading.Thread(target=self._work, daemon=True)
+            self.workers.append(worker)
+            worker.start()
+        self.lock.notify_all()
+
+    # The next task this worker may start, popped from the heap, or None. Called
+    # with the lock held.
+    def _next_task(self):
+        while self.heap:
+            _, _, task = self.heap[0]
+            if task.state != "queued":
+                heapq.heappop(self.heap)
+            elif task.cancelled:
+                heapq.heappop(self.heap)
+                self._retire(task, "cancelled")
+            elif task.priority < HIGH and self.running_background >= self.background_limit:
+                return None
+            else:
+                return heapq.heappop(self.heap)[2]
+        return None
+
+    def _work(self):
+        while True:
+            with self.lock:
+                task = None
+                while not self.closed:
+                    task = self._next_task()
+                    if task is not None:
+                        break
+                    self.idle_workers += 1
+                    self.lock.wait()
+                    self.idle_workers -= 1
+                if self.closed:
+                    return
+                task.state = "running"
+                task.started = time.time()
+                background = task.priority < HIGH
+                if background:
+                    self.running_background += 1
+            try:
+                task.result = task.func(task)
+                state = "done"
+            except Exception as e:
+                logger.error(f"Task {task.name} failed: {e}")
+                task.error = e
+                state = "failed"
+            with self.lock:
+                if background:
+                    self.running_background -= 1
+                self._retire(task, "cancelled" if task.cancelled else state)
+                # A background slot may have opened for a task that was held back
+                self.lock.notify_all()
+
+    def _retire(self, task, state):
+        task.state = state
+        task.ended = time.time()
+        if task.key is not None and self.active.get(task.key) is task:
+            del self.active[task.key]
+        self.completed.put(task)
+
+    def _poll(self):
+        with self.lock:
+            # Cancelled before they started; their heap entries are skipped later
+            for task in self.tasks:
+                if task.state == "queued" and task.cancelled:
+                    self._retire(task, "cancelled")
+            running = list(self.tasks)
+        for task in running:
+            if task.version != task.seen_version:
+                task.seen_version = task.version
+                self._call(task, task.on_progress, task)
+        while True:
+            try:
+                task = self.completed.get_nowait()
+            except queue.Empty:
+                break
+            with self.lock:
+                self.tasks.remove(task)
+                self.history.append(task)
+            if task.state == "done":
+                self._call(task, task.on_done, task.result)
+            elif task.state == "failed":
+                self._call(task, task.on_error, task.error)
+            else:
+                self._call(task, task.on_cancel)
+        with self.lock:
+            self.polling = bool(self.tasks) and not self.closed
+        if self.polling:
+            self.root.after(POLL_MS, self._poll)
+
+    @staticmethod
+    def _call(task, callbacks, *args):
+        for callback in callbacks:
+            try:
+                callback(*args)
+            except Exception:
+                logger.exception(f"Callback for task {task.name} failed")
+
+    def find(self, key):
+        with self.lock:
+            return self.active.get(key)
+
+    # Queued and running tasks, then finished ones, newest first
+    def snapshot(self):
+        with self.lock:
+            return list(self.tasks) + list(reversed(self.history))
+
+    def cancel(self, key):
+        task = self.find(key)
+        if task:
+            task.cancel()
+
+    def shutdown(self):
+        with self.lock:
+            self.closed = True
+            for task in self.tasks:
+                task.cancel()
+            self.lock.notify_all()
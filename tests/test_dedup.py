@@ -0,0 +1,42 @@
+import os
+from dedup import DuplicateFinder, EDGE_BLOCK_SIZE
+
+
+def write(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+    return str(path)
+
+
+def test_groups_identical_files_only(tmp_path):
+    small = write(tmp_path / "small1.txt", b"same text")
+    small_copy = write(tmp_path / "sub" / "small2.txt", b"same text")
+    write(tmp_path / "other.txt", b"diff text")
+
+    # Same size and same first and last blocks; only the middle tells them apart
+    big = b"a" * EDGE_BLOCK_SIZE + b"b" * EDGE_BLOCK_SIZE + b"c" * EDGE_BLOCK_SIZE
+    big_changed = b"a" * EDGE_BLOCK_SIZE + b"x" * EDGE_BLOCK_SIZE + b"c" * EDGE_BLOCK_SIZE
+    large = write(tmp_path / "large1.bin", big)
+    large_copy = write(tmp_path / "deep" / "er" / "large2.bin", big)
+    write(tmp_path / "large3.bin", big_changed)
+
+    empty = write(tmp_path / "empty1", b"")
+    empty_copy = write(tmp_path / "empty2", b"")
+
+    groups = DuplicateFinder(max_workers=2).find(str(tmp_path))
+    assert sorted(groups) == sorted([sorted([small, small_copy]), sorted([large, large_copy]),
+                                     sorted([empty, empty_copy])])
+
+
+def test_hard_links_are_not_duplicates(tmp_path):
+    original = write(tmp_path / "a.txt", b"contents")
+    os.link(original, tmp_path / "b.txt")
+    assert DuplicateFinder().find(str(tmp_path)) == []
+
+
+def test_cancelled_search_finds_nothing(tmp_path):
+    write(tmp_path / "a.txt", b"contents")
+    write(tmp_path / "b.txt", b"contents")
+    finder = DuplicateFinder()
+    finder.cancel.set()
+    assert finder.find(str(tmp_path)) == []
@@ -0,0 +1,117 @@
+import os
+from move_journal import plan_moves, MoveJournal, BatchMover
+
+
+def make_folder(tmp_path, names):
+    folder = tmp_path / "folder"
+    folder.mkdir()
+    for name in names:
+        (folder / name).write_text(name)
+    return str(folder)
+
+
+def run_batch(mover, batch_id, undo=False):
+    job, moves = mover.prepare(batch_id, undo)
+    mover.run(job, moves)
+    results = job.drain()
+    assert job.finished
+    return results
+
+
+def test_plan_moves_never_reuses_a_name(tmp_path):
+    folder = make_folder(tmp_path, ["a.txt", "b.txt"])
+    os.makedirs(os.path.join(folder, "Docs"))
+    open(os.path.join(folder, "Docs", "a.txt"), "w").close()
+    moves, new_dirs = plan_moves(folder, {"Docs": ["a.txt", "a.txt", "b.txt"], "New": ["b.txt"]})
+    assert [os.path.relpath(dst, folder) for _, dst in moves] == [
+        os.path.join("Docs", "a (2).txt"), os.path.join("Docs", "a (3).txt"),
+        os.path.join("Docs", "b.txt"), os.path.join("New", "b.txt"),
+    ]
+    assert new_dirs == [os.path.join(folder, "New")]
+
+
+def test_plan_moves_skips_a_category_named_like_a_file(tmp_path):
+    folder = make_folder(tmp_path, ["a.txt", "Docs"])
+    assert plan_moves(folder, {"Docs": ["a.txt"]}) == ([], [])
+
+
+def test_batch_moves_and_undoes(tmp_path):
+    folder = make_folder(tmp_path, ["a.txt", "b.txt"])
+    journal = MoveJournal(str(tmp_path / "journal.db"))
+    moved = []
+    mover = BatchMover(journal, on_move=lambda src, dst: moved.append((src, dst)))
+    moves, new_dirs = plan_moves(folder, {"Text": ["a.txt", "b.txt"]})
+    batch_id = journal.create_batch("categorize", folder, moves, new_dirs)
+
+    results = run_batch(mover, batch_id)
+    assert all(error is None for _, _, error in results)
+    assert sorted(os.listdir(os.path.join(folder, "Text"))) == ["a.txt", "b.txt"]
+    assert moved == moves
+    assert journal.batch(batch_id)["state"] == "moved"
+    assert journal.latest_undoable()["id"] == batch_id
+
+    run_batch(mover, batch_id, undo=True)
+    assert sorted(os.listdir(folder)) == ["a.txt", "b.txt"]
+    assert journal.batch(batch_id)["state"] == "undone"
+    assert journal.latest_undoable() is None
+
+
+def test_interrupted_batch_resumes_where_it_stopped(tmp_path):
+    folder = make_folder(tmp_path, ["a.txt", "b.txt", "c.txt"])
+    journal = MoveJournal(str(tmp_path / "journal.db"))
+    moves, new_dirs = plan_moves(folder, {"Text": ["a.txt", "b.txt", "c.txt"]})
+    batch_id = journal.create_batch("categorize", folder, moves, new_dirs)
+    # A crash after the first rename, before the journal heard about it
+    os.makedirs(new_dirs[0])
+    os.rename(*moves[0])
+    journal.close()
+
+    journal = MoveJournal(str(tmp_path / "journal.db"))
+    assert [batch["id"] for batch in journal.interrupted()] == [batch_id]
+    results = run_batch(BatchMover(journal), batch_id)
+    assert all(error is None for _, _, error in results)
+    assert sorted(os.listdir(os.path.join(folder, "Text"))) == ["a.txt", "b.txt", "c.txt"]
+    assert journal.batch(batch_id)["counts"] == {"done": 3}
+    assert journal.interrupted() == []
+
+
+def test_interrupted_batch_can_be_undone(tmp_path):
+    folder = make_folder(tmp_path, ["a.txt", "b.txt"])
+    journal = MoveJournal(str(tmp_path / "journal.db"))
+    moves, new_dirs = plan_moves(folder, {"Text": ["a.txt", "b.txt"]})
+    batch_id = journal.create_batch("categorize", folder, moves, new_dirs)
+    os.makedirs(new_dirs[0])
+    os.rename(*moves[0])
+
+    run_batch(BatchMover(journal), batch_id, undo=True)
+    assert sorted(os.listdir(folder)) == ["a.txt", "b.txt"]
+    assert journal.batch(batch_id)["state"] == "undone"
+
+
+def test_existing_target_is_left_alone(tmp_path):
+    folder = make_folder(tmp_path, ["a.txt"])
+    journal = MoveJournal(str(tmp_path / "journal.db"))
+    moves, new_dirs = plan_moves(folder, {"Text": ["a.txt"]})
+    batch_id = journal.create_batch("categorize", folder, moves, new_dirs)
+    # The user puts their own copy at the target after the plan was made
+    os.makedirs(new_dirs[0])
+    with open(moves[0][1], "w") as f:
+        f.write("a.txt")
+
+    [(_, _, error)] = run_batch(BatchMover(journal), batch_id)
+    assert "already exists" in error
+    assert os.path.exists(moves[0][0])
+    assert journal.batch(batch_id)["counts"] == {"failed": 1}
+
+
+def test_cancelled_batch_is_not_offered_for_resume(tmp_path):
+    folder = make_folder(tmp_path, ["a.txt", "b.txt"])
+    journal = MoveJournal(str(tmp_path / "journal.db"))
+    moves, new_dirs = plan_moves(folder, {"Text": ["a.txt", "b.txt"]})
+    batch_id = journal.create_batch("categorize", folder, moves, new_dirs)
+    mover = BatchMover(journal)
+    job, planned = mover.prepare(batch_id)
+    job.cancel()
+    mover.run(job, planned)
+    assert journal.batch(batch_id)["state"] == "cancelled"
+    assert journal.interrupted() == []
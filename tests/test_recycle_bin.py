@@ -0,0 +1,67 @@
+import os
+import time
+from recycle_bin import RecycleBin
+
+
+def make_bin(tmp_path, quota_bytes=0):
+    return RecycleBin(str(tmp_path / "bin"), str(tmp_path / "db" / "bin.db"), quota_bytes)
+
+
+def write(path, size):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"x" * size)
+    return str(path)
+
+
+def test_quota_evicts_the_oldest_deletions(tmp_path):
+    recycle_bin = make_bin(tmp_path, quota_bytes=100)
+    first, _ = recycle_bin.delete(write(tmp_path / "files" / "a.txt", 40))
+    second, _ = recycle_bin.delete(write(tmp_path / "files" / "b.txt", 40))
+    third, evicted = recycle_bin.delete(write(tmp_path / "files" / "c.txt", 40))
+    assert evicted == [first]
+    assert not os.path.exists(first)
+    assert os.path.exists(second) and os.path.exists(third)
+    assert recycle_bin.total_bytes == 80
+
+    # The index survives a restart, evictions included
+    recycle_bin.close()
+    recycle_bin = make_bin(tmp_path, quota_bytes=100)
+    assert sorted(entry.name for entry in recycle_bin.entries.values()) == ["b.txt", "c.txt"]
+    assert recycle_bin.total_bytes == 80
+
+
+def test_quota_never_evicts_the_item_just_deleted(tmp_path):
+    recycle_bin = make_bin(tmp_path, quota_bytes=100)
+    small, _ = recycle_bin.delete(write(tmp_path / "files" / "a.txt", 10))
+    big, evicted = recycle_bin.delete(write(tmp_path / "files" / "big.bin", 500))
+    assert evicted == [small]
+    assert os.path.exists(big)
+
+
+def test_same_name_deleted_twice_restores_beside_each_other(tmp_path):
+    recycle_bin = make_bin(tmp_path)
+    path = write(tmp_path / "files" / "a.txt", 1)
+    first, _ = recycle_bin.delete(path)
+    write(tmp_path / "files" / "a.txt", 2)
+    second, _ = recycle_bin.delete(path)
+    assert first != second
+
+    assert recycle_bin.restore(second) == path
+    assert recycle_bin.restore(first) == str(tmp_path / "files" / "a (2).txt")
+    assert os.path.getsize(path) == 2
+    assert recycle_bin.entries == {}
+
+
+def test_adopted_items_purge_by_age(tmp_path):
+    old = write(tmp_path / "bin" / "old.txt", 5)
+    recent = write(tmp_path / "bin" / "recent.txt", 5)
+    long_ago = time.time() - 40 * 86400
+    os.utime(old, (long_ago, long_ago))
+    recycle_bin = make_bin(tmp_path)
+    assert recycle_bin.adopt_unindexed() == 2
+    # Adoption only ever happens once
+    assert recycle_bin.adopt_unindexed() == 0
+    assert recycle_bin.purge_older_than(30) == [old]
+    assert os.path.exists(recent)
+    assert recycle_bin.empty() == [recent]
+    assert recycle_bin.total_bytes == 0
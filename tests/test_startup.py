@@ -0,0 +1,18 @@
+import pytest
+from benchmarks.startup import measure_startup
+from config import STARTUP_BUDGET_SECONDS
+
+
+# Needs a display (or xvfb-run); without one the check is skipped, not passed
+def test_window_is_idle_within_startup_budget(tmp_path):
+    home = tmp_path / "home"
+    folder = tmp_path / "folder"
+    home.mkdir()
+    folder.mkdir()
+    for i in range(200):
+        (folder / f"file{i}.txt").write_text("x")
+    result = measure_startup(str(folder), str(home))
+    if "skipped" in result:
+        pytest.skip(f"No display: {result['skipped']}")
+    assert "error" not in result, result.get("error")
+    assert result["seconds"] <= STARTUP_BUDGET_SECONDS
@@ -0,0 +1,70 @@
+import os
+from tag_store import TagStore
+
+
+def make_store(tmp_path):
+    return TagStore(str(tmp_path / "db" / "tags.db"))
+
+
+def write(path, text="x"):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+    return str(path)
+
+
+def stored_paths(store):
+    return [path for (path,) in store.conn.execute("SELECT path FROM tags ORDER BY path")]
+
+
+def test_changed_file_is_a_miss_and_its_row_goes_on_the_next_write(tmp_path):
+    store = make_store(tmp_path)
+    path = write(tmp_path / "files" / "a.txt")
+    other = write(tmp_path / "files" / "b.txt")
+    store[path] = ["alpha"]
+    assert store.get(path) == ["alpha"]
+
+    write(tmp_path / "files" / "a.txt", "longer contents")
+    assert store.get(path) is None
+    # Reading leaves the database alone
+    assert path in stored_paths(store)
+
+    store[other] = ["beta"]
+    assert stored_paths(store) == [other]
+
+
+def test_signature_survives_reopening(tmp_path):
+    store = make_store(tmp_path)
+    path = write(tmp_path / "files" / "a.txt")
+    store[path] = ["alpha"]
+    store.close()
+    assert make_store(tmp_path).get(path) == ["alpha"]
+
+
+def test_move_and_discard_stay_inside_the_folder(tmp_path):
+    store = make_store(tmp_path)
+    root = tmp_path / "files"
+    names = ["a/x.txt", "a/sub/y.txt", "a0/z.txt", "a.txt"]
+    store.update({write(root / name): [name] for name in names})
+
+    os.rename(root / "a", root / "b")
+    store.move(str(root / "a"), str(root / "b"))
+    assert store.get(str(root / "b" / "sub" / "y.txt")) == ["a/sub/y.txt"]
+    assert store.get(str(root / "a0" / "z.txt")) == ["a0/z.txt"]
+    assert store.get(str(root / "a.txt")) == ["a.txt"]
+    directories = dict(store.conn.execute("SELECT path, directory FROM tags"))
+    assert directories[str(root / "b" / "sub" / "y.txt")] == str(root / "b" / "sub")
+    assert directories[str(root / "b" / "x.txt")] == str(root / "b")
+
+    store.discard_tree(str(root / "b"))
+    assert stored_paths(store) == [str(root / "a.txt"), str(root / "a0" / "z.txt")]
+
+
+def test_moving_a_single_file(tmp_path):
+    store = make_store(tmp_path)
+    src = write(tmp_path / "files" / "a.txt")
+    store[src] = ["alpha"]
+    dst = str(tmp_path / "elsewhere.txt")
+    os.rename(src, dst)
+    store.move(src, dst)
+    assert store.get(src) is None
+    assert store.get(dst) == ["alpha"]
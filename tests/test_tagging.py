@@ -0,0 +1,37 @@
+from collections import Counter
+import pytest
+from ai import count_words, ENGLISH_STOP_WORDS
+
+pytest.importorskip("nltk")
+
+TEXTS = [
+    "The quick brown fox jumps over the lazy dog. The dog sleeps!",
+    "John's e-mail doesn't work; try foo_bar@example.com or call 555-1234.",
+    "Pi is 3.14, roughly... I cannot say more (it's complicated) -- honestly.",
+    "\"Quoted\" words, 'single quotes' and [brackets] {braces} <angles>.",
+    "We'll see: they're here, you've won, I'm done and she'd agree. Gimme that, gonna go.",
+    "Naïve café résumé über straße 2024 report_v2 and/or 10:30 a.m.",
+    "Ends with an abbrev. Mr. Smith went to Washington D.C. and stayed.",
+]
+
+
+# The tokens word_tokenize gives that generate_tags used to keep
+def reference_counts(text):
+    from benchmarks.bench_tags import legacy_tokenizer
+    return Counter(token for token in legacy_tokenizer()(text.lower()) if token.isalnum())
+
+
+@pytest.mark.parametrize("text", TEXTS)
+def test_counts_match_word_tokenize(text):
+    assert count_words([text]) == reference_counts(text)
+
+
+def test_chunk_boundaries_do_not_split_words():
+    text = " ".join(TEXTS)
+    chunks = [text[i:i + 7] for i in range(0, len(text), 7)]
+    assert count_words(chunks) == count_words([text])
+
+
+def test_stop_words_are_dropped():
+    counts = count_words(["The cat and the hat"], ENGLISH_STOP_WORDS)
+    assert counts == Counter({"cat": 1, "hat": 1})
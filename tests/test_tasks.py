@@ -0,0 +1,106 @@
+import time
+import threading
+from tasks import TaskScheduler, LOW, NORMAL, HIGH
+
+
+# Stands in for the Tk root: after() only queues the call, pump() makes it
+class FakeRoot:
+    def __init__(self):
+        self.calls = []
+
+    def after(self, ms, func, *args):
+        self.calls.append((func, args))
+
+    def pump(self, until, timeout=5):
+        deadline = time.monotonic() + timeout
+        while not until():
+            assert time.monotonic() < deadline, "timed out waiting for tasks"
+            calls, self.calls = self.calls, []
+            for func, args in calls:
+                func(*args)
+            time.sleep(0.01)
+
+
+def blocker(release):
+    def run(task):
+        release.wait(5)
+        return "blocker"
+    return run
+
+
+def test_same_key_joins_the_running_task():
+    root = FakeRoot()
+    scheduler = TaskScheduler(root, max_workers=2)
+    release = threading.Event()
+    calls = []
+    results = []
+
+    def run(task):
+        calls.append(task.id)
+        release.wait(5)
+        return 42
+
+    first = scheduler.submit("Count", run, key="count", on_done=results.append)
+    second = scheduler.submit("Count", run, key="count", on_done=results.append)
+    assert second is first
+    release.set()
+    root.pump(lambda: len(results) == 2)
+    assert results == [42, 42]
+    assert calls == [first.id]
+
+    # Once finished, the key starts a fresh run
+    third = scheduler.submit("Count", run, key="count", on_done=results.append)
+    assert third is not first
+    root.pump(lambda: len(results) == 3)
+    scheduler.shutdown()
+
+
+def test_queued_tasks_start_highest_priority_first():
+    root = FakeRoot()
+    scheduler = TaskScheduler(root, max_workers=1)
+    release = threading.Event()
+    order = []
+    scheduler.submit("Block", blocker(release), priority=HIGH)
+    for name, priority in (("low", LOW), ("normal", NORMAL), ("high", HIGH)):
+        scheduler.submit(name, lambda task, name=name: order.append(name), priority=priority)
+    release.set()
+    root.pump(lambda: len(order) == 3)
+    assert order == ["high", "normal", "low"]
+    scheduler.shutdown()
+
+
+def test_a_worker_is_kept_for_high_priority_work():
+    root = FakeRoot()
+    scheduler = TaskScheduler(root, max_workers=2)
+    release = threading.Event()
+    done = []
+    background = scheduler.submit("Index", blocker(release), priority=LOW)
+    waiting = scheduler.submit("More indexing", lambda task: done.append("low"), priority=LOW)
+    scheduler.submit("Chart", lambda task: done.append("high"), priority=HIGH)
+    root.pump(lambda: done == ["high"])
+    assert background.state == "running"
+    assert waiting.state == "queued"
+    release.set()
+    root.pump(lambda: done == ["high", "low"])
+    scheduler.shutdown()
+
+
+def test_raising_and_cancelling():
+    root = FakeRoot()
+    scheduler = TaskScheduler(root, max_workers=1)
+    release = threading.Event()
+    errors = []
+    cancelled = []
+
+    def fail(task):
+        raise OSError("disk gone")
+
+    scheduler.submit("Block", blocker(release), priority=HIGH)
+    scheduler.submit("Fail", fail, on_error=errors.append)
+    queued = scheduler.submit("Never runs", lambda task: cancelled.append("ran"), on_cancel=lambda: cancelled.append("cancelled"))
+    queued.cancel()
+    release.set()
+    root.pump(lambda: errors and cancelled)
+    assert str(errors[0]) == "disk gone"
+    assert cancelled == ["cancelled"]
+    scheduler.shutdown()
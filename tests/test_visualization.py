@@ -0,0 +1,35 @@
+import pytest
+from visualization import squarify
+
+np = pytest.importorskip("numpy")
+
+
+def test_rectangles_fill_the_area_in_proportion():
+    sizes = [500, 250, 120, 80, 30, 15, 5]
+    rects = squarify(sizes, 10, 20, 300, 200)
+    x, y, w, h = rects.T
+    assert rects.shape == (len(sizes), 4)
+    assert np.allclose(w * h, np.array(sizes) / sum(sizes) * 300 * 200)
+    assert (x >= 10 - 1e-9).all() and (y >= 20 - 1e-9).all()
+    assert (x + w <= 310 + 1e-9).all() and (y + h <= 220 + 1e-9).all()
+
+
+def test_rectangles_do_not_overlap():
+    rects = squarify([40, 30, 10, 10, 5, 3, 2], 0, 0, 100, 60)
+    for i, (x1, y1, w1, h1) in enumerate(rects):
+        for x2, y2, w2, h2 in rects[i + 1:]:
+            overlap_w = min(x1 + w1, x2 + w2) - max(x1, x2)
+            overlap_h = min(y1 + h1, y2 + h2) - max(y1, y2)
+            assert overlap_w <= 1e-9 or overlap_h <= 1e-9
+
+
+def test_rows_keep_rectangles_close_to_square():
+    rects = squarify([1] * 16, 0, 0, 100, 100)
+    ratios = np.maximum(rects[:, 2] / rects[:, 3], rects[:, 3] / rects[:, 2])
+    assert ratios.max() < 2
+
+
+def test_nothing_to_lay_out():
+    assert not squarify([], 0, 0, 100, 100).any()
+    assert not squarify([0, 0], 0, 0, 100, 100).any()
+    assert not squarify([5, 3], 0, 0, 0, 100).any()
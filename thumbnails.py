@@ -0,0 +1,173 @@
+import os
+import hashlib
+import mimetypes
+import threading
+import logging
+from collections import OrderedDict
+from instrumentation import span
+from config import THUMBNAIL_CACHE_DIR, THUMBNAIL_SIZE, THUMBNAIL_MEMORY_BYTES, THUMBNAIL_DISK_MAX_BYTES
+
+logger = logging.getLogger(__name__)
+
+
+def is_image(path):
+    mime_type, _ = mimetypes.guess_type(path)
+    return bool(mime_type and mime_type.startswith("image"))
+
+
+# Previews of image files, made once and kept twice: as small PNGs under cache_dir,
+# named by a hash of the file's path, size and mtime so an edited image simply
+# misses, and as decoded images in memory, dropped least recently used first once
+# they pass memory_bytes. JPEGs are decoded straight at a reduced scale (draft
+# mode), so even a huge photo is never expanded to full size to make its preview.
+class ThumbnailCache:
+    def __init__(self, cache_dir=THUMBNAIL_CACHE_DIR, size=THUMBNAIL_SIZE,
+                 memory_bytes=THUMBNAIL_MEMORY_BYTES, disk_max_bytes=THUMBNAIL_DISK_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.size = size
+        self.memory_bytes = memory_bytes
+        self.disk_max_bytes = disk_max_bytes
+        self.lock = threading.Lock()
+        self.memory = OrderedDict()
+        self.memory_used = 0
+
+    def _key(self, path, st):
+        path = os.path.abspath(path)
+        return hashlib.sha1(f"{path}\0{st.st_size}\0{st.st_mtime_ns}\0{self.size}".encode("utf-8", "surrogateescape")).hexdigest()
+
+    def _disk_path(self, key):
+        return os.path.join(self.cache_dir, key[:2], f"{key}.png")
+
+    @staticmethod
+    def _image_bytes(img):
+        return img.width * img.height * len(img.getbands())
+
+    def _remember(self, key, img):
+        with self.lock:
+            if key in self.memory:
+                self.memory.move_to_end(key)
+                return
+            self.memory[key] = img
+            self.memory_used += self._image_bytes(img)
+            while self.memory_used > self.memory_bytes and len(self.memory) > 1:
+                _, old = self.memory.popitem(last=False)
+                self.memory_used -= self._image_bytes(old)
+
+    # The preview of path as a PIL image no larger than size x size, or None if it
+    # is not an image that can be read. st saves a stat when the caller has one.
+    def get(self, path, st=None):
+        try:
+            if st is None:
+                st = os.stat(path)
+            key = self._key(path, st)
+        except OSError:
+            return None
+        with self.lock:
+            img = self.memory.get(key)
+            if img is not None:
+                self.memory.move_to_end(key)
+                return img
+        img = self._load(key)
+        if img is None:
+            img = self._generate(path, key)
+        if img is not None:
+            self._remember(key, img)
+        return img
+
+    def _load(self, key):
+        from PIL import Image
+        disk_path = self._disk_path(key)
+        try:
+            with Image.open(disk_path) as img:
+                img.load()
+            # The file's mtime doubles as its last use for pruning
+            os.utime(disk_path)
+            return img
+        except (OSError, ValueError):
+            return None
+
+    def _generate(self, path, key):
+        from PIL import Image
+        with span("thumbnails.generate") as s:
+            try:
+                with Image.open(path) as img:
+                    if s:
+                        s.add(1, os.path.getsize(path))
+                    # A no-op for anything but JPEG
+                    img.draft(img.mode, (self.size, self.size))
+                    img.thumbnail((self.size, self.size))
+                    if img.mode not in ("RGB", "RGBA", "L", "LA"):
+                        img = img.convert("RGBA" if "transparency" in img.info or img.mode.endswith("A") else "RGB")
+                    else:
+                        img = img.copy()
+            except Exception as e:
+                logger.debug(f"No thumbnail for {path}: {e}")
+                return None
+        disk_path = self._disk_path(key)
+        partial = f"{disk_path}.{threading.get_ident()}.partial"
+        try:
+            os.makedirs(os.path.dirname(disk_path), exist_ok=True)
+            img.save(partial, "PNG")
+            os.replace(partial, disk_path)
+        except OSError as e:
+            logger.warning(f"Could not cache thumbnail for {path}: {e}")
+            try:
+                os.remove(partial)
+            except OSError:
+                pass
+        return img
+
+    # Makes sure every image among entries, (path, stat or None) pairs, has a
+    # thumbnail on disk; stops early once cancel is set. Returns how many were made.
+    def prefetch(self, entries, cancel=None):
+        made = 0
+        with span("thumbnails.prefetch") as s:
+            for path, st in entries:
+                if cancel is not None and cancel.is_set():
+                    break
+                if not is_image(path):
+                    continue
+                try:
+                    if st is None:
+                        st = os.stat(path)
+                    key = self._key(path, st)
+                except OSError:
+                    continue
+                if os.path.exists(self._disk_path(key)):
+                    continue
+                if self._generate(path, key) is not None:
+                    made += 1
+            s.add(made)
+        return made
+
+    # Thumbnails of files since changed or deleted are never looked up again; this
+    # drops the least recently used ones once the cache is over disk_max_bytes
+    def prune(self):
+        files = []
+        total = 0
+        try:
+            with os.scandir(self.cache_dir) as shards:
+                for shard in shards:
+                    if not shard.is_dir():
+                        continue
+                    with os.scandir(shard.path) as entries:
+                        for entry in entries:
+                            st = entry.stat()
+                            files.append((st.st_mtime, st.st_size, entry.path))
+                            total += st.st_size
+        except FileNotFoundError:
+            return 0
+        removed = 0
+        if total > self.disk_max_bytes:
+            files.sort()
+            for _, size, path in files:
+                if total <= self.disk_max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                total -= size
+                removed += 1
+            logger.info(f"Removed {removed} least recently used thumbnails")
+        return removed
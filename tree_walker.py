@@ -0,0 +1,112 @@
+import os
+import re
+import fnmatch
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from config import TREE_WALK_WORKERS
+
+logger = logging.getLogger(__name__)
+
+
+class WalkCancelled(Exception):
+    pass
+
+
+# Walks a directory tree with scandir, using the entry types scandir already has
+# so a file costs one stat and a directory none. The root is listed on the calling
+# thread and each of its subdirectories is then walked, depth first, by one of a
+# pool of threads. What the walk finds goes to collectors made by collector_factory,
+# one for the root and one per top-level subdirectory, which never see another
+# thread and are returned in listing order for the caller to merge:
+#
+#   collector.add_dir(path, parent, depth) -> index of the folder in this collector;
+#       parent is the collector's own index of the parent folder, or -1 for the
+#       walk's root when the folder is a top-level subdirectory
+#   collector.add_file(dir_index, name, st, depth)
+#
+# Folders deeper than max_depth are not entered, and names matching any of the
+# exclude glob patterns are skipped, files and folders alike. Links to files count
+# as the file; links to folders are only entered with follow_symlinks, and then
+# each folder is entered at most once, so a symlink loop ends the descent. Setting
+# cancel stops the walk at the next folder and makes walk raise WalkCancelled.
+class TreeWalker:
+    def __init__(self, max_workers=TREE_WALK_WORKERS, max_depth=None, exclude=(), follow_symlinks=False, cancel=None, progress=None):
+        self.max_workers = max_workers
+        self.max_depth = max_depth
+        self.exclude = re.compile("|".join(fnmatch.translate(pattern) for pattern in exclude)) if exclude else None
+        self.follow_symlinks = follow_symlinks
+        self.cancel = cancel or threading.Event()
+        # Called from the walking threads as progress(dirs, files) after each folder
+        self.progress = progress
+        self.lock = threading.Lock()
+        self.visited = set()
+        self.dirs_scanned = 0
+        self.files_scanned = 0
+
+    def walk(self, root, collector_factory):
+        self.visited.clear()
+        self.dirs_scanned = self.files_scanned = 0
+        if self.follow_symlinks:
+            self._first_visit(os.stat(root))
+        head = collector_factory()
+        _, subdirs = self._scan(head, root, -1, 0)
+        if not subdirs:
+            return [head]
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(subdirs))) as executor:
+            subtrees = list(executor.map(lambda path: self._walk_subtree(path, collector_factory), subdirs))
+        if self.cancel.is_set():
+            raise WalkCancelled(root)
+        return [head] + subtrees
+
+    def _walk_subtree(self, path, collector_factory):
+        collector = collector_factory()
+        stack = [(path, -1, 1)]
+        while stack and not self.cancel.is_set():
+            path, parent, depth = stack.pop()
+            dir_index, subdirs = self._scan(collector, path, parent, depth)
+            stack.extend((subdir, dir_index, depth + 1) for subdir in subdirs)
+        return collector
+
+    def _first_visit(self, st):
+        key = (st.st_dev, st.st_ino)
+        with self.lock:
+            if key in self.visited:
+                return False
+            self.visited.add(key)
+            return True
+
+    # Lists one folder into collector; returns its index and the subfolders to enter
+    def _scan(self, collector, path, parent, depth):
+        if self.cancel.is_set():
+            raise WalkCancelled(path)
+        dir_index = collector.add_dir(path, parent, depth)
+        subdirs = []
+        files = 0
+        descend = self.max_depth is None or depth < self.max_depth
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    if self.exclude and self.exclude.match(entry.name):
+                        continue
+                    try:
+                        if entry.is_dir(follow_symlinks=self.follow_symlinks):
+                            if descend and (not self.follow_symlinks or self._first_visit(entry.stat())):
+                                subdirs.append(entry.path)
+                            continue
+                        if not entry.is_file():
+                            continue
+                        st = entry.stat()
+                    except OSError:
+                        continue
+                    collector.add_file(dir_index, entry.name, st, depth)
+                    files += 1
+        except OSError as e:
+            logger.error(f"Error scanning {path}: {e}")
+        with self.lock:
+            self.dirs_scanned += 1
+            self.files_scanned += files
+            dirs, total = self.dirs_scanned, self.files_scanned
+        if self.progress:
+            self.progress(dirs, total)
+        return dir_index, subdirs
@@ -1,37 +1,209 @@
 import os
+import time
 import mimetypes
 import datetime
-import matplotlib.pyplot as plt
-import matplotlib.patches as patches
-from PIL import Image
-import numpy as np
-from wordcloud import WordCloud
-from collections import Counter
+from collections import OrderedDict
+from instrumentation import timed
+
+# NumPy, matplotlib, Pillow and wordcloud are imported inside the methods that
+# need them, so the file browser can come up before any of them are loaded.
+
+TREE_MAP_MAX_NODES = 40
+TREE_MAP_MIN_FRACTION = 0.005
+TAG_CLOUD_CELL = 32
+TAG_CLOUD_CACHE_SIZE = 8
+# The timeline counts per day for spans up to TIMELINE_DAY_SPAN days, per week up
+# to TIMELINE_WEEK_SPAN days and per month beyond that
+TIMELINE_DAY_SPAN = 120
+TIMELINE_WEEK_SPAN = 2 * 365
+# File age chart buckets, by age in whole days: under 1, under 7, under 30, the rest
+AGE_LABELS = ("Today", "This Week", "This Month", "Older")
+AGE_EDGES = (1, 7, 30)
+
+
+def format_size(num_bytes):
+    for unit in ("B", "KB", "MB", "GB", "TB"):
+        if num_bytes < 1024 or unit == "TB":
+            return f"{num_bytes:.0f} {unit}" if unit == "B" else f"{num_bytes:.1f} {unit}"
+        num_bytes /= 1024
+
+
+# Buckets mtimes (int64 seconds) by calendar day, week (from Monday) or month in
+# the current UTC offset, whichever keeps the whole span readable. Returns the unit, the bucket
+# edges as datetime64[D] (one more than there are buckets) and the total weight
+# in each bucket, which is the number of files when weights is None.
+def time_histogram(mtimes, weights=None):
+    import numpy as np
+    days = (mtimes + time.localtime().tm_gmtoff) // 86400
+    first = int(days.min())
+    span = int(days.max()) - first + 1
+    if span <= TIMELINE_DAY_SPAN:
+        unit, step, keys = "day", 1, days
+    elif span <= TIMELINE_WEEK_SPAN:
+        # Day 0 of the epoch was a Thursday
+        unit, step, keys = "week", 7, days - (days + 3) % 7
+    else:
+        unit, step, keys = "month", 1, days.astype("datetime64[D]").astype("datetime64[M]").astype(np.int64)
+    base = int(keys.min())
+    totals = np.bincount((keys - base) // step, weights=weights)
+    edges = base + np.arange(len(totals) + 1) * step
+    if unit == "month":
+        edges = edges.astype("datetime64[M]").astype("datetime64[D]")
+    else:
+        edges = edges.astype("datetime64[D]")
+    return unit, edges, totals
+
+
+def size_formatter():
+    from matplotlib.ticker import FuncFormatter
+    return FuncFormatter(lambda value, _: format_size(value))
+
+
+# Squarified tree map layout (Bruls et al.). Rows are grown along the shorter side
+# of the remaining space for as long as that keeps improving their worst aspect
+# ratio; the ratio for every candidate row length is computed in one NumPy pass.
+# Returns an (n, 4) array of x, y, width, height in the order of sizes, which must
+# be sorted largest first.
+def squarify(sizes, x, y, width, height):
+    import numpy as np
+    sizes = np.asarray(sizes, dtype=float)
+    rects = np.zeros((len(sizes), 4))
+    if not len(sizes) or sizes.sum() <= 0 or width <= 0 or height <= 0:
+        return rects
+    areas = np.maximum(sizes, 1e-12) * (width * height / sizes.sum())
+    i = 0
+    while i < len(areas) and width > 0 and height > 0:
+        side = min(width, height)
+        rest = areas[i:]
+        sums = np.cumsum(rest)
+        worst = np.maximum(side ** 2 * rest[0] / sums ** 2, sums ** 2 / (side ** 2 * rest))
+        worse = np.flatnonzero(np.diff(worst) > 0)
+        count = worse[0] + 1 if len(worse) else len(rest)
+        row = rest[:count]
+        offsets = np.concatenate(([0.0], np.cumsum(row)[:-1]))
+        if width >= height:
+            row_width = sums[count - 1] / height
+            rects[i:i + count] = np.column_stack([np.full(count, x), y + offsets / row_width,
+                                                  np.full(count, row_width), row / row_width])
+            x += row_width
+            width -= row_width
+        else:
+            row_height = sums[count - 1] / width
+            rects[i:i + count] = np.column_stack([x + offsets / row_height, np.full(count, y),
+                                                  row / row_height, np.full(count, row_height)])
+            y += row_height
+            height -= row_height
+        i += count
+    return rects
+
+# A tooltip that follows the mouse over a chart. The chart is drawn once and a copy
+# of it kept; each mouse move restores that copy and blits just the tooltip on top,
+# rather than redrawing the whole figure. lookup(x, y) gives the text to show at a
+# point in data coordinates, or None for no tooltip.
+class HoverTooltip:
+    def __init__(self, ax, lookup):
+        self.ax = ax
+        self.lookup = lookup
+        self.canvas = ax.figure.canvas
+        self.background = None
+        self.text = None
+        self.annotation = ax.annotate(
+            "", xy=(0, 0), xytext=(12, 12), textcoords="offset points", fontsize=10,
+            bbox={"boxstyle": "round", "fc": "lightyellow", "alpha": 0.9}, animated=True, visible=False
+        )
+
+    def on_draw(self, event):
+        # Animated artists are left out of a full draw, so this copy has no tooltip
+        self.background = self.canvas.copy_from_bbox(self.ax.figure.bbox)
+        self.text = None
+
+    def on_motion(self, event):
+        if self.background is None:
+            return
+        text = None
+        if event.inaxes is self.ax and event.xdata is not None and event.ydata is not None:
+            text = self.lookup(event.xdata, event.ydata)
+        if text is None and self.text is None:
+            return
+        self.text = text
+        self.canvas.restore_region(self.background)
+        if text is not None:
+            self.annotation.xy = (event.xdata, event.ydata)
+            self.annotation.set_text(text)
+            self.annotation.set_visible(True)
+            self.ax.draw_artist(self.annotation)
+        self.canvas.blit(self.ax.figure.bbox)
+
 
 class VisualizationManager:
-    def __init__(self):
+    def __init__(self, thumbnails=None):
         mimetypes.init()
-        self.colors = plt.cm.tab20(np.linspace(0, 1, 20))
+        self.thumbnails = thumbnails
+        self._colors = None
         self.on_click_callback = None
-        self.tag_positions = {}
+        self.tag_cloud_cache = OrderedDict()
+        self.connections = {}
+        self.tooltip = None
+
+    @property
+    def colors(self):
+        if self._colors is None:
+            import numpy as np
+            from matplotlib import colormaps
+            self._colors = colormaps["tab20"](np.linspace(0, 1, 20))
+        return self._colors
 
     def set_click_callback(self, callback):
         self.on_click_callback = callback
 
-    def get_file_type_distribution(self, directory):
+    # Canvas event handlers are connected under a name; connecting that name again
+    # replaces the handler, so redrawing a chart never stacks up another one
+    def connect(self, canvas, name, event, handler):
+        self.disconnect(name)
+        self.connections[name] = (canvas, canvas.mpl_connect(event, handler))
+
+    def disconnect(self, name):
+        connection = self.connections.pop(name, None)
+        if connection:
+            canvas, cid = connection
+            canvas.mpl_disconnect(cid)
+
+    def disconnect_all(self):
+        for name in list(self.connections):
+            self.disconnect(name)
+        self.tooltip = None
+
+    # Shows lookup's text under the mouse on canvases that can blit
+    def set_hover(self, ax, lookup):
+        canvas = ax.figure.canvas
+        if not getattr(canvas, "supports_blit", False):
+            return
+        # Canvases only hold weak references to bound methods
+        self.tooltip = HoverTooltip(ax, lookup)
+        self.connect(canvas, "hover.draw", "draw_event", self.tooltip.on_draw)
+        self.connect(canvas, "hover.motion", "motion_notify_event", self.tooltip.on_motion)
+
+    def build_snapshot(self, directory, walker=None):
+        from snapshot import DirectorySnapshot
+        return DirectorySnapshot.build(directory, walker)
+
+    @timed("visualize.file_type_distribution")
+    def get_file_type_distribution(self, snapshot):
+        import numpy as np
+        top = np.flatnonzero(snapshot.depths == 0)
+        codes = snapshot.ext_codes[top]
+        counts = np.bincount(codes, minlength=len(snapshot.exts))
+        sizes = np.bincount(codes, weights=snapshot.sizes[top] // 1024, minlength=len(snapshot.exts))
         file_types = {}
-        for item in os.listdir(directory):
-            full_path = os.path.join(directory, item)
-            if os.path.isfile(full_path):
-                ext = os.path.splitext(item)[1].lower() or "No Extension"
-                size = os.path.getsize(full_path) // 1024
-                if ext not in file_types:
-                    file_types[ext] = {"count": 0, "size": 0, "files": []}
-                file_types[ext]["count"] += 1
-                file_types[ext]["size"] += size
-                file_types[ext]["files"].append(full_path)
+        for code in np.unique(codes):
+            file_types[snapshot.exts[code]] = {
+                "count": int(counts[code]),
+                "size": int(sizes[code]),
+                "files": snapshot.paths(top[codes == code])
+            }
         return file_types
 
+    @timed("visualize.file_info")
     def get_file_info(self, file_path):
         try:
             size = os.path.getsize(file_path) // 1024
@@ -39,13 +211,8 @@ class VisualizationManager:
             file_type = mime_type if mime_type else "Unknown"
             modified = datetime.datetime.fromtimestamp(os.path.getmtime(file_path)).strftime('%Y-%m-%d %H:%M')
             thumbnail = None
-            if mime_type and mime_type.startswith("image"):
-                try:
-                    img = Image.open(file_path)
-                    img.thumbnail((100, 100))
-                    thumbnail = img
-                except:
-                    pass
+            if mime_type and mime_type.startswith("image") and self.thumbnails:
+                thumbnail = self.thumbnails.get(file_path)
             return {
                 "size_kb": size,
                 "type": file_type,
@@ -56,8 +223,10 @@ class VisualizationManager:
         except:
             return None
 
-    def get_file_icon(self, file_path):
-        if os.path.isdir(file_path):
+    def get_file_icon(self, file_path, is_dir=None):
+        if is_dir is None:
+            is_dir = os.path.isdir(file_path)
+        if is_dir:
             return "📁"
         mime_type, _ = mimetypes.guess_type(file_path)
         if mime_type:
@@ -71,176 +240,257 @@ class VisualizationManager:
                 return "📄"
         return "📄"
 
-    def plot_tree_map(self, ax, file_types):
-        if not file_types:
-            return
-        sizes = [data["size"] for data in file_types.values()]
-        total_size = sum(sizes)
-        if total_size == 0:
+    # Nodes shown inside one folder of the tree map: its subfolders by total size and
+    # its own files grouped by extension. Everything past the first few dozen nodes,
+    # or smaller than a sliver of the folder, is merged into a single node.
+    @timed("visualize.tree_map_nodes")
+    def tree_map_nodes(self, snapshot, dir_index):
+        import numpy as np
+        totals = snapshot.dir_totals()
+        nodes = []
+        for child in snapshot.subdirs(dir_index):
+            if totals[child] > 0:
+                nodes.append((os.path.basename(snapshot.dirs[child]) + os.sep, float(totals[child]), "dir", int(child)))
+        files = snapshot.files_in(dir_index)
+        if len(files):
+            codes = snapshot.ext_codes[files]
+            ext_sizes = np.bincount(codes, weights=snapshot.sizes[files])
+            for code in np.flatnonzero(ext_sizes):
+                nodes.append((snapshot.exts[code], float(ext_sizes[code]), "ext", files[codes == code]))
+        nodes.sort(key=lambda node: node[1], reverse=True)
+        total = sum(node[1] for node in nodes)
+        keep = 0
+        while keep < min(len(nodes), TREE_MAP_MAX_NODES) and nodes[keep][1] >= total * TREE_MAP_MIN_FRACTION:
+            keep += 1
+        rest = nodes[keep:]
+        nodes = nodes[:keep]
+        if rest:
+            nodes.append((f"{len(rest)} more", sum(node[1] for node in rest), "other", None))
+            nodes.sort(key=lambda node: node[1], reverse=True)
+        return nodes
+
+    @timed("visualize.plot.tree_map")
+    def plot_tree_map(self, ax, snapshot, dir_index=0):
+        import numpy as np
+        import matplotlib.patches as patches
+        from matplotlib.collections import PatchCollection
+        nodes = self.tree_map_nodes(snapshot, dir_index)
+        if not nodes:
+            ax.text(0.5, 0.5, "No files to display", ha="center", va="center", fontsize=12)
+            ax.axis('off')
             return
-        sizes = [s / total_size for s in sizes]
-        labels = [f"{ext}\n{data['count']} files\n{data['size']} KB" for ext, data in file_types.items()]
-        exts = list(file_types.keys())
-        colors = self.colors[:len(file_types)]
-
-        sizes = sorted(sizes, reverse=True)
-        rects = []
-        x, y, width, height = 0, 0, 1, 1
-        for size in sizes:
-            if width > height:
-                w = size / height
-                rects.append((x, y, w, height))
-                x += w
-                width -= w
-            else:
-                h = size / width
-                rects.append((x, y, width, h))
-                y += h
-                height -= h
-
-        self.rect_patches = []
-        for (x, y, w, h), label, ext, color in zip(rects, labels, exts, colors):
-            if w > 0 and h > 0:
-                patch = patches.Rectangle((x, y), w, h, facecolor=color, edgecolor="white")
-                self.rect_patches.append((patch, ext))
-                ax.add_patch(patch)
-                ax.text(x + w/2, y + h/2, label, ha="center", va="center", fontsize=10, wrap=True)
 
-        def on_click(event):
-            if event.inaxes != ax:
-                return
-            for patch, ext in self.rect_patches:
-                if patch.contains_point((event.x, event.y)):
-                    if self.on_click_callback:
-                        self.on_click_callback(ext, file_types[ext]["files"])
-                    break
+        rects = squarify([node[1] for node in nodes], 0, 0, 1, 1)
+        boxes, face_colors, edge_widths = [], [], []
+        for i, ((label, size, kind, payload), (x, y, w, h)) in enumerate(zip(nodes, rects)):
+            color = self.colors[i % len(self.colors)]
+            boxes.append(patches.Rectangle((x, y), w, h))
+            face_colors.append(color)
+            edge_widths.append(2)
+            if kind == "dir" and w > 0.02 and h > 0.02:
+                # One level of nesting shows how each subfolder is made up
+                inner = self.tree_map_nodes(snapshot, payload)
+                if inner:
+                    pad = min(w, h) * 0.04
+                    shade = np.clip(np.asarray(color) * [0.85, 0.85, 0.85, 1], 0, 1)
+                    for ix, iy, iw, ih in squarify([node[1] for node in inner], x + pad, y + pad, w - 2 * pad, h - 2 * pad):
+                        boxes.append(patches.Rectangle((ix, iy), iw, ih))
+                        face_colors.append(shade)
+                        edge_widths.append(0.5)
+            if w * h > 0.004:
+                ax.text(x + w / 2, y + h / 2, f"{label}\n{format_size(size)}", ha="center", va="center",
+                        fontsize=9 if w * h > 0.02 else 7, clip_on=True)
 
-        ax.figure.canvas.mpl_connect('button_press_event', on_click)
+        collection = PatchCollection(boxes, facecolors=face_colors, edgecolors="white", linewidths=edge_widths)
+        ax.add_collection(collection)
+        ax.set_xlim(0, 1)
+        ax.set_ylim(0, 1)
         ax.set_aspect('equal')
         ax.axis('off')
+        location = os.path.relpath(snapshot.dirs[dir_index], os.path.dirname(snapshot.root))
+        total = snapshot.dir_totals()[dir_index]
+        ax.set_title(f"{location} ({format_size(total)})\nClick a folder to open it, right-click to go up", fontsize=14)
+
+        def redraw(new_dir):
+            self.disconnect_all()
+            ax.clear()
+            self.plot_tree_map(ax, snapshot, new_dir)
+            ax.figure.canvas.draw_idle()
+
+        def node_at(x, y):
+            hit = np.flatnonzero((x >= rects[:, 0]) & (x < rects[:, 0] + rects[:, 2]) &
+                                 (y >= rects[:, 1]) & (y < rects[:, 1] + rects[:, 3]))
+            return nodes[hit[0]] if len(hit) else None
+
+        def on_click(event):
+            # The axes get reused by other charts, so only react while this map is on screen
+            if event.inaxes != ax or collection not in ax.collections:
+                return
+            if event.xdata is None or event.ydata is None:
+                return
+            if event.button == 3:
+                parent = int(snapshot.dir_parents[dir_index])
+                if parent >= 0:
+                    redraw(parent)
+                return
+            node = node_at(event.xdata, event.ydata)
+            if node is None:
+                return
+            label, _, kind, payload = node
+            if kind == "dir":
+                redraw(payload)
+            elif kind == "ext" and self.on_click_callback:
+                self.on_click_callback(label, snapshot.paths(payload))
+
+        def describe(x, y):
+            node = node_at(x, y)
+            if node is None:
+                return None
+            label, size, kind, payload = node
+            if kind == "ext":
+                return f"{label} files: {len(payload)}, {format_size(size)}"
+            return f"{label} {format_size(size)}"
+
+        self.connect(ax.figure.canvas, "tree_map.click", 'button_press_event', on_click)
+        self.set_hover(ax, describe)
 
-    def plot_timeline(self, ax, directory):
-        dates = []
-        for item in os.listdir(directory):
-            full_path = os.path.join(directory, item)
-            if os.path.isfile(full_path):
-                mtime = os.path.getmtime(full_path)
-                date = datetime.datetime.fromtimestamp(mtime).date()
-                dates.append(date)
-        if not dates:
+    # Every file in the tree, bucketed by modification date; by_bytes plots how
+    # much data was last modified in each bucket instead of how many files
+    @timed("visualize.plot.timeline")
+    def plot_timeline(self, ax, snapshot, by_bytes=False):
+        import matplotlib.dates as mdates
+        if not len(snapshot):
             ax.text(0.5, 0.5, "No files to display", ha="center", va="center", fontsize=12)
             return
 
-        date_counts = {}
-        for date in dates:
-            date_counts[date] = date_counts.get(date, 0) + 1
-
-        sorted_dates = sorted(date_counts.keys())
-        counts = [date_counts[d] for d in sorted_dates]
-        ax.plot(sorted_dates, counts, marker='o', color=self.colors[0])
-        ax.set_xlabel("Date", fontsize=14)
-        ax.set_ylabel("Number of Files", fontsize=14)
-        ax.set_title("Files by Modification Date", fontsize=16)
+        unit, edges, totals = time_histogram(snapshot.mtimes, snapshot.sizes if by_bytes else None)
+        ax.stairs(totals, mdates.date2num(edges), fill=True, color=self.colors[0])
+        ax.xaxis_date()
+        ax.set_xlabel(f"Date (per {unit})", fontsize=14)
+        ax.set_ylabel("Size" if by_bytes else "Number of Files", fontsize=14)
+        if by_bytes:
+            ax.yaxis.set_major_formatter(size_formatter())
+        ax.set_title("Files by Modification Date, including subfolders", fontsize=16)
         ax.tick_params(axis='x', rotation=45, labelsize=10)
         ax.grid(True, linestyle='--', alpha=0.7)
 
-    def plot_depth_pie(self, ax, directory):
-        depths = {}
-        for root, _, files in os.walk(directory):
-            depth = len(os.path.relpath(root, directory).split(os.sep)) - 1
-            if depth == -1:
-                depth = 0
-            depths[depth] = depths.get(depth, 0) + len(files)
+    @timed("visualize.plot.depth_pie")
+    def plot_depth_pie(self, ax, snapshot, by_bytes=False):
+        import numpy as np
+        totals = np.bincount(snapshot.depths, weights=snapshot.sizes if by_bytes else None)
+        depths = {depth: total for depth, total in enumerate(totals.tolist()) if total}
 
         if not depths:
             ax.text(0.5, 0.5, "No files to display", ha="center", va="center", fontsize=12)
             return
 
-        labels = [f"Depth {d}" for d in depths.keys()]
+        if by_bytes:
+            labels = [f"Depth {d}\n{format_size(total)}" for d, total in depths.items()]
+        else:
+            labels = [f"Depth {d}" for d in depths.keys()]
         sizes = list(depths.values())
         ax.pie(sizes, labels=labels, autopct='%1.1f%%', startangle=90, colors=self.colors[:len(depths)], textprops={'fontsize': 10})
         ax.axis('equal')
-        ax.set_title("Files by Directory Depth", fontsize=16)
-
-    def plot_tag_cloud(self, ax, directory, tags_cache):
-        tags = []
-        for item in os.listdir(directory):
-            full_path = os.path.join(directory, item)
-            if os.path.isfile(full_path):
-                tags.extend(tags_cache.get(full_path, []))
-        if not tags:
+        ax.set_title("Bytes by Directory Depth" if by_bytes else "Files by Directory Depth", fontsize=16)
+
+    # Bounding boxes of the placed words, bucketed into a coarse grid so a click
+    # only has to check the handful of words overlapping its cell
+    @staticmethod
+    def build_tag_index(wordcloud):
+        from PIL import Image, ImageDraw, ImageFont
+        draw = ImageDraw.Draw(Image.new("L", (1, 1)))
+        grid = {}
+        pad = wordcloud.margin // 2
+        for (word, _), font_size, (row, col), orientation, _ in wordcloud.layout_:
+            font = ImageFont.TransposedFont(ImageFont.truetype(wordcloud.font_path, font_size), orientation=orientation)
+            _, _, width, height = draw.textbbox((0, 0), word, font=font, anchor="lt")
+            box = (row - pad, col - pad, row + height + pad, col + width + pad, word)
+            for cell_row in range(int(box[0]) // TAG_CLOUD_CELL, int(box[2]) // TAG_CLOUD_CELL + 1):
+                for cell_col in range(int(box[1]) // TAG_CLOUD_CELL, int(box[3]) // TAG_CLOUD_CELL + 1):
+                    grid.setdefault((cell_row, cell_col), []).append(box)
+        return grid
+
+    @staticmethod
+    def find_tag(grid, x, y):
+        for top, left, bottom, right, word in grid.get((int(y) // TAG_CLOUD_CELL, int(x) // TAG_CLOUD_CELL), ()):
+            if top <= y < bottom and left <= x < right:
+                return word
+        return None
+
+    @timed("visualize.plot.tag_cloud")
+    def plot_tag_cloud(self, ax, snapshot, tags_cache):
+        import numpy as np
+        from wordcloud import WordCloud
+        version = getattr(tags_cache, "version", None)
+        key = (snapshot.root, snapshot.created, version)
+        cached = self.tag_cloud_cache.get(key)
+        if cached is None:
+            tag_files = {}
+            for full_path in snapshot.paths(np.flatnonzero(snapshot.depths == 0)):
+                for tag in tags_cache.get(full_path, []):
+                    tag_files.setdefault(tag, []).append(full_path)
+            if tag_files:
+                wordcloud = WordCloud(
+                    width=800, height=400,
+                    background_color='white',
+                    colormap='tab20',
+                    min_font_size=10,
+                    max_font_size=100
+                ).generate_from_frequencies({tag: len(files) for tag, files in tag_files.items()})
+                cached = (wordcloud.to_array(), self.build_tag_index(wordcloud), tag_files)
+            else:
+                cached = (None, {}, {})
+            # Looking tags up may have dropped stale entries, so key on the version after that
+            key = (snapshot.root, snapshot.created, getattr(tags_cache, "version", None))
+            self.tag_cloud_cache[key] = cached
+            while len(self.tag_cloud_cache) > TAG_CLOUD_CACHE_SIZE:
+                self.tag_cloud_cache.popitem(last=False)
+        else:
+            self.tag_cloud_cache.move_to_end(key)
+
+        image, grid, tag_files = cached
+        if image is None:
             ax.text(0.5, 0.5, "No tags to display", ha="center", va="center", fontsize=12)
             return
 
-        tag_counts = Counter(tags)
-        wordcloud = WordCloud(
-            width=800, height=400,
-            background_color='white',
-            colormap='tab20',
-            min_font_size=10,
-            max_font_size=100
-        ).generate_from_frequencies(tag_counts)
-
-        ax.imshow(wordcloud, interpolation='bilinear')
+        artist = ax.imshow(image, interpolation='bilinear')
         ax.axis('off')
         ax.set_title("Tag Cloud", fontsize=16)
 
-        self.tag_positions = {}
-        for word, freq in tag_counts.items():
-            self.tag_positions[word] = wordcloud.layout_[:len(tag_counts)]
-
         def on_click(event):
-            if event.inaxes != ax:
+            # The axes get reused by other charts, so only react while this cloud is on screen
+            if event.inaxes != ax or artist not in ax.images:
                 return
-            x, y = event.xdata, event.ydata
-            if x is None or y is None:
+            if event.xdata is None or event.ydata is None:
                 return
-            for tag in self.tag_positions:
-                files = [
-                    os.path.join(directory, item)
-                    for item in os.listdir(directory)
-                    if os.path.isfile(os.path.join(directory, item))
-                    and tag in tags_cache.get(os.path.join(directory, item), [])
-                ]
-                if files and self.on_click_callback:
-                    self.on_click_callback(tag, files)
-                    break
-
-        ax.figure.canvas.mpl_connect('button_press_event', on_click)
-
-    def plot_file_age_bar(self, ax, directory):
-        now = datetime.datetime.now()
-        age_categories = {
-            "Today": 0,
-            "This Week": 0,
-            "This Month": 0,
-            "Older": 0
-        }
-        for item in os.listdir(directory):
-            full_path = os.path.join(directory, item)
-            if os.path.isfile(full_path):
-                mtime = datetime.datetime.fromtimestamp(os.path.getmtime(full_path))
-                age_days = (now - mtime).days
-                if age_days < 1:
-                    age_categories["Today"] += 1
-                elif age_days < 7:
-                    age_categories["This Week"] += 1
-                elif age_days < 30:
-                    age_categories["This Month"] += 1
-                else:
-                    age_categories["Older"] += 1
-
-        if not any(age_categories.values()):
+            tag = self.find_tag(grid, event.xdata, event.ydata)
+            if tag and self.on_click_callback:
+                self.on_click_callback(tag, tag_files[tag])
+
+        def describe(x, y):
+            tag = self.find_tag(grid, x, y)
+            return f"{tag}: {len(tag_files[tag])} files" if tag else None
+
+        self.connect(ax.figure.canvas, "tag_cloud.click", 'button_press_event', on_click)
+        self.set_hover(ax, describe)
+
+    @timed("visualize.plot.file_age_bar")
+    def plot_file_age_bar(self, ax, snapshot, by_bytes=False):
+        import numpy as np
+        age_days = (int(time.time()) - snapshot.mtimes) // 86400
+        buckets = np.searchsorted(AGE_EDGES, age_days, side="right")
+        totals = np.bincount(buckets, weights=snapshot.sizes if by_bytes else None, minlength=len(AGE_LABELS))
+
+        if not totals.any():
             ax.text(0.5, 0.5, "No files to display", ha="center", va="center", fontsize=12)
             return
 
-        categories = list(age_categories.keys())
-        counts = list(age_categories.values())
-        max_count = max(counts) if counts else 1
-        ax.bar(categories, counts, color=self.colors[:len(categories)], edgecolor='black', width=0.2)
+        ax.bar(AGE_LABELS, totals, color=self.colors[:len(AGE_LABELS)], edgecolor='black', width=0.2)
         ax.set_xlabel("Age", fontsize=10)
-        ax.set_ylabel("Number of Files", fontsize=10)
-        ax.set_title("File Age Distribution", fontsize=14)
+        ax.set_ylabel("Size" if by_bytes else "Number of Files", fontsize=10)
+        if by_bytes:
+            ax.yaxis.set_major_formatter(size_formatter())
+        ax.set_title("File Age Distribution, including subfolders", fontsize=14)
         ax.tick_params(axis='both', labelsize=10)
-        ax.set_ylim(0, max_count * 1.1)  # Tight y-axis with 10% padding
-        ax.grid(True, linestyle='--', alpha=0.7)
\ No newline at end of file
+        ax.set_ylim(0, totals.max() * 1.1)  # Tight y-axis with 10% padding
+        ax.grid(True, linestyle='--', alpha=0.7)
@@ -0,0 +1,273 @@
+import os
+import sys
+import time
+import errno
+import queue
+import select
+import struct
+import threading
+import logging
+from abc import ABC, abstractmethod
+from config import WATCH_POLL_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+# inotify(7) constants
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (
+    IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+    | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR
+)
+EVENT_HEADER = struct.Struct("iIII")
+# A rename shows up as a MOVED_FROM/MOVED_TO pair; a MOVED_FROM left unpaired
+# this long means the entry was moved out of the watched folder
+MOVE_PAIR_TIMEOUT = 0.05
+
+
+class WatchEvent:
+    # kind is "created", "deleted", "modified", "moved" (src_path -> path) or
+    # "rescan" when the watcher lost track and the whole folder must be re-read
+    __slots__ = ("kind", "path", "src_path", "is_dir")
+
+    def __init__(self, kind, path, src_path=None, is_dir=False):
+        self.kind = kind
+        self.path = path
+        self.src_path = src_path
+        self.is_dir = is_dir
+
+    def __repr__(self):
+        if self.kind == "moved":
+            return f"WatchEvent(moved, {self.src_path} -> {self.path})"
+        return f"WatchEvent({self.kind}, {self.path})"
+
+
+# Watches one folder at a time on a background thread. Events queue up until the
+# UI drains them, the same way scan and tagging results are handed over.
+class DirectoryWatcher(ABC):
+    def __init__(self):
+        self.events = queue.Queue()
+        self.lock = threading.Lock()
+        self.directory = None
+        self.closed = threading.Event()
+        self.thread = None
+
+    def watch(self, directory):
+        directory = os.path.abspath(directory)
+        with self.lock:
+            if directory == self.directory:
+                return
+            self.directory = directory
+            self._switch(directory)
+        # Anything still queued belongs to the folder we just left
+        self.drain()
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._run, daemon=True)
+            self.thread.start()
+
+    def drain(self, max_events=None):
+        events = []
+        while max_events is None or len(events) < max_events:
+            try:
+                events.append(self.events.get_nowait())
+            except queue.Empty:
+                break
+        return events
+
+    def close(self):
+        self.closed.set()
+
+    def _emit(self, kind, path, src_path=None, is_dir=False):
+        self.events.put(WatchEvent(kind, path, src_path, is_dir))
+
+    @abstractmethod
+    def _switch(self, directory):
+        pass
+
+    @abstractmethod
+    def _run(self):
+        pass
+
+
+class InotifyWatcher(DirectoryWatcher):
+    def __init__(self):
+        super().__init__()
+        import ctypes
+        import ctypes.util
+        self.libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.wd = None
+        self.pending_moves = {}
+        self.wake_r, self.wake_w = os.pipe()
+
+    def _switch(self, directory):
+        import ctypes
+        if self.wd is not None:
+            self.libc.inotify_rm_watch(self.fd, self.wd)
+        self.pending_moves.clear()
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+        if wd < 0:
+            self.wd = None
+            logger.warning(f"Could not watch {directory}: {os.strerror(ctypes.get_errno())}")
+            return
+        self.wd = wd
+
+    def close(self):
+        super().close()
+        if self.thread is None:
+            for fd in (self.fd, self.wake_r, self.wake_w):
+                os.close(fd)
+        else:
+            os.write(self.wake_w, b"\0")
+
+    def _run(self):
+        try:
+            while not self.closed.is_set():
+                timeout = MOVE_PAIR_TIMEOUT if self.pending_moves else 1.0
+                ready, _, _ = select.select([self.fd, self.wake_r], [], [], timeout)
+                if self.fd in ready:
+                    try:
+                        data = os.read(self.fd, 64 * 1024)
+                    except OSError as e:
+                        if e.errno != errno.EAGAIN:
+                            raise
+                        data = b""
+                    with self.lock:
+                        self._parse(data)
+                with self.lock:
+                    self._flush_moves(time.monotonic() - MOVE_PAIR_TIMEOUT)
+        except Exception as e:
+            logger.error(f"Filesystem watcher stopped: {e}")
+        finally:
+            for fd in (self.fd, self.wake_r, self.wake_w):
+                os.close(fd)
+
+    def _parse(self, data):
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(data):
+            wd, mask, cookie, length = EVENT_HEADER.unpack_from(data, offset)
+            name = data[offset + EVENT_HEADER.size:offset + EVENT_HEADER.size + length].rstrip(b"\0")
+            offset += EVENT_HEADER.size + length
+            if mask & IN_Q_OVERFLOW:
+                self._emit("rescan", self.directory)
+                continue
+            # Events for a watch we already replaced are stale
+            if wd != self.wd:
+                continue
+            if mask & (IN_DELETE_SELF | IN_MOVE_SELF | IN_IGNORED):
+                self._emit("rescan", self.directory)
+                continue
+            path = os.path.join(self.directory, os.fsdecode(name))
+            is_dir = bool(mask & IN_ISDIR)
+            if mask & IN_MOVED_FROM:
+                self.pending_moves[cookie] = (path, is_dir, time.monotonic())
+            elif mask & IN_MOVED_TO:
+                src = self.pending_moves.pop(cookie, None)
+                if src:
+                    self._emit("moved", path, src[0], is_dir)
+                else:
+                    self._emit("created", path, is_dir=is_dir)
+            elif mask & IN_CREATE:
+                self._emit("created", path, is_dir=is_dir)
+            elif mask & IN_DELETE:
+                self._emit("deleted", path, is_dir=is_dir)
+            elif mask & (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE):
+                self._emit("modified", path, is_dir=is_dir)
+
+    def _flush_moves(self, older_than):
+        for cookie, (path, is_dir, seen) in list(self.pending_moves.items()):
+            if seen <= older_than:
+                del self.pending_moves[cookie]
+                self._emit("deleted", path, is_dir=is_dir)
+
+
+# Fallback for platforms without inotify: re-lists the folder every few seconds
+# and diffs the entries by size, mtime and inode
+class PollingWatcher(DirectoryWatcher):
+    def __init__(self, interval=WATCH_POLL_INTERVAL):
+        super().__init__()
+        self.interval = interval
+        self.baseline = None
+        self.wake = threading.Event()
+
+    def _switch(self, directory):
+        self.baseline = None
+        self.wake.set()
+
+    def close(self):
+        super().close()
+        self.wake.set()
+
+    @staticmethod
+    def _list(directory):
+        entries = {}
+        with os.scandir(directory) as it:
+            for entry in it:
+                try:
+                    st = entry.stat()
+                    entries[entry.path] = (entry.is_dir(), st.st_size, st.st_mtime_ns, st.st_ino)
+                except OSError:
+                    continue
+        return entries
+
+    def _run(self):
+        while not self.closed.is_set():
+            with self.lock:
+                directory = self.directory
+            try:
+                current = self._list(directory)
+            except OSError:
+                current = None
+            with self.lock:
+                if directory == self.directory:
+                    if current is None:
+                        if self.baseline is not None:
+                            self._emit("rescan", directory)
+                    elif self.baseline is not None:
+                        self._diff(self.baseline, current)
+                    self.baseline = current
+            self.wake.wait(self.interval)
+            self.wake.clear()
+
+    def _diff(self, old, new):
+        removed = {path: info for path, info in old.items() if path not in new}
+        # An inode that vanished under one name and appeared under another was renamed
+        by_inode = {info[3]: path for path, info in removed.items() if info[3]}
+        for path, info in new.items():
+            previous = old.get(path)
+            if previous is None:
+                src = by_inode.pop(info[3], None) if info[3] else None
+                if src:
+                    del removed[src]
+                    self._emit("moved", path, src, info[0])
+                else:
+                    self._emit("created", path, is_dir=info[0])
+            elif previous != info:
+                self._emit("modified", path, is_dir=info[0])
+        for path, info in removed.items():
+            self._emit("deleted", path, is_dir=info[0])
+
+
+def create_watcher():
+    if sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher()
+        except (OSError, AttributeError) as e:
+            logger.warning(f"inotify unavailable, polling for changes instead: {e}")
+    return PollingWatcher()